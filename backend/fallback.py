@@ -0,0 +1,112 @@
+"""
+Read Fallback Store
+Last good response body for every public read, kept in a local SQLite file so the
+API can keep answering from it while MongoDB is slow or unreachable. Bodies are
+only rewritten when they change, reads go through SQLite's memory map, and the
+least recently confirmed entries are dropped past max_entries.
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class FallbackStore:
+    """Response bodies keyed by read, with the time each was last confirmed by the database"""
+
+    def __init__(self, path, max_entries: int = 500, mmap_bytes: int = 256 * 1024 * 1024):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA mmap_size={int(mmap_bytes)}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS bodies ("
+            "key TEXT PRIMARY KEY, digest BLOB NOT NULL, body BLOB NOT NULL, saved_at REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+        # Digests of what is on disk, least recently confirmed first, so an unchanged body costs a hash and no write
+        self._digests = OrderedDict(self._conn.execute("SELECT key, digest FROM bodies ORDER BY saved_at"))
+        self._confirmed = {}  # key -> when the database last returned the stored body
+        self.saves = 0
+        self.served = 0
+        self.evictions = 0
+        with self._lock:
+            self._evict()
+
+    @staticmethod
+    def _digest(body: bytes) -> bytes:
+        return hashlib.blake2b(body, digest_size=16).digest()
+
+    def confirm(self, key: str, body: bytes) -> bool:
+        """Note a fresh body from the database; True when it differs from the stored one"""
+        if self._digests.get(key) == self._digest(body):
+            self._confirmed[key] = time.time()
+            with self._lock:
+                if key in self._digests:
+                    self._digests.move_to_end(key)
+            return False
+        return True
+
+    def save(self, key: str, body: bytes) -> None:
+        digest = self._digest(body)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO bodies (key, digest, body, saved_at) VALUES (?, ?, ?, ?)",
+                (key, digest, body, time.time())
+            )
+            self._digests[key] = digest
+            self._digests.move_to_end(key)
+            self._confirmed.pop(key, None)
+            self.saves += 1
+            self._evict()
+
+    def get(self, key: str):
+        """(body, age in seconds) for a stored read, or None"""
+        with self._lock:
+            row = self._conn.execute("SELECT body, saved_at FROM bodies WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self.served += 1
+        confirmed_at = max(row[1], self._confirmed.get(key, 0.0))
+        return bytes(row[0]), max(0.0, time.time() - confirmed_at)
+
+    def discard(self, *keys) -> None:
+        with self._lock:
+            self._conn.executemany("DELETE FROM bodies WHERE key = ?", [(key,) for key in keys])
+            for key in keys:
+                self._digests.pop(key, None)
+                self._confirmed.pop(key, None)
+
+    def _evict(self) -> None:
+        """Drop the least recently confirmed bodies past max_entries; call with the lock held"""
+        stale_keys = []
+        while len(self._digests) > self.max_entries:
+            key, _ = self._digests.popitem(last=False)
+            self._confirmed.pop(key, None)
+            stale_keys.append(key)
+        if stale_keys:
+            self._conn.executemany("DELETE FROM bodies WHERE key = ?", [(key,) for key in stale_keys])
+            self.evictions += len(stale_keys)
+
+    def __len__(self) -> int:
+        return len(self._digests)
+
+    def stats(self) -> dict:
+        return {
+            "path": str(self.path),
+            "entries": len(self._digests),
+            "max_entries": self.max_entries,
+            "bytes": self.path.stat().st_size if self.path.exists() else 0,
+            "saves": self.saves,
+            "served": self.served,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,264 @@
+"""
+Background Jobs
+Durable, MongoDB-backed job queue. Jobs are documents in the `jobs` collection,
+claimed atomically with a lease, so several API processes can share the queue and a
+job whose worker died is picked up again once its lease runs out.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+
+
+class JobType:
+    """Handler and limits for one kind of job"""
+
+    def __init__(self, name: str, handler, concurrency: int = 1, max_attempts: int = 5,
+                 backoff_seconds: float = 10.0, batch_size: int = 1, batch_wait: float = 0.0):
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.wakeup = asyncio.Event()
+
+
+class JobQueue:
+    """Leases jobs from MongoDB and runs them with per-type concurrency limits"""
+
+    def __init__(self, collection, lease_seconds: float = 300.0, poll_interval: float = 2.0,
+                 process_workers: int = 2, retention_days: int = 7):
+        self.collection = collection
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.process_workers = process_workers
+        self.retention_days = retention_days
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.types = {}
+        self._tasks = []
+        self._running = set()
+        self._process_pool = None
+        self._stopping = False
+
+    def register(self, name: str, handler, **options) -> None:
+        """Register an async handler; batch types receive a list of jobs, others a single job"""
+        self.types[name] = JobType(name, handler, **options)
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_index([("type", 1), ("status", 1), ("run_at", 1)])
+        await self.collection.create_index([("status", 1), ("lease_expires_at", 1)])
+        await self.collection.create_index(
+            [("idempotency_key", 1)], unique=True,
+            partialFilterExpression={"idempotency_key": {"$type": "string"}}
+        )
+        await self.collection.create_index(
+            [("finished_at", 1)], expireAfterSeconds=int(self.retention_days * 86400)
+        )
+
+    # Enqueueing
+
+    async def enqueue(self, job_type: str, payload: dict = None, idempotency_key: str = None,
+                      delay_seconds: float = 0.0, requeue=("failed",)) -> dict:
+        """Queue a job; with an idempotency key, an existing job with that key is returned instead.
+
+        An existing job whose status is in `requeue` is reset and queued again rather than returned.
+        """
+        now = datetime.utcnow()
+        job = {
+            "id": str(uuid.uuid4()),
+            "type": job_type,
+            "payload": payload or {},
+            "status": "queued",
+            "attempts": 0,
+            "run_at": now + timedelta(seconds=delay_seconds),
+            "created_at": now,
+            "updated_at": now,
+            "worker": None,
+            "lease_expires_at": None,
+            "last_error": None,
+            "result": None,
+            "finished_at": None,
+        }
+        if idempotency_key:
+            job["idempotency_key"] = idempotency_key
+            job_fields = dict(job)
+            try:
+                await self.collection.update_one(
+                    {"idempotency_key": idempotency_key}, {"$setOnInsert": job}, upsert=True
+                )
+            except DuplicateKeyError:
+                pass  # Another process inserted the same key first
+            job = await self.collection.find_one({"idempotency_key": idempotency_key}, {"_id": 0})
+            if job["status"] in requeue:
+                # Conditional on the status we saw, so concurrent callers re-queue it only once
+                fresh = {field: value for field, value in job_fields.items() if field not in ("id", "created_at")}
+                job = await self.collection.find_one_and_update(
+                    {"idempotency_key": idempotency_key, "status": job["status"]},
+                    {"$set": fresh, "$unset": {"started_at": ""}},
+                    projection={"_id": 0},
+                    return_document=ReturnDocument.AFTER,
+                ) or await self.collection.find_one({"idempotency_key": idempotency_key}, {"_id": 0})
+        else:
+            await self.collection.insert_one(dict(job))
+
+        if job_type in self.types and job["status"] == "queued":
+            self.types[job_type].wakeup.set()
+        return job
+
+    # Claiming and running
+
+    async def _claim(self, job_type: JobType):
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            {
+                "type": job_type.name,
+                "$or": [
+                    {"status": "queued", "run_at": {"$lte": now}},
+                    # A worker that died mid-job leaves a running job whose lease has expired
+                    {"status": "running", "lease_expires_at": {"$lt": now}},
+                ],
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "worker": self.worker_id,
+                    "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                    "started_at": now,
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("run_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _renew_leases(self, jobs) -> None:
+        """Keep extending leases while a handler runs so no other worker takes the jobs over"""
+        ids = [job["id"] for job in jobs]
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            await self.collection.update_many(
+                {"id": {"$in": ids}, "worker": self.worker_id, "status": "running"},
+                {"$set": {"lease_expires_at": datetime.utcnow() + timedelta(seconds=self.lease_seconds)}}
+            )
+
+    async def _run(self, job_type: JobType, jobs) -> None:
+        renewer = asyncio.ensure_future(self._renew_leases(jobs))
+        try:
+            result = await job_type.handler(jobs if job_type.batch_size > 1 else jobs[0])
+        except Exception as e:
+            error = f"{type(e).__name__}: {str(e)}"
+            logger.warning(f"Job {job_type.name} failed ({len(jobs)} job(s)): {error}")
+            logger.debug(traceback.format_exc())
+            await self._fail(job_type, jobs, error)
+        else:
+            await self._finish(jobs, "succeeded", result=result if isinstance(result, dict) else None)
+        finally:
+            renewer.cancel()
+
+    async def _finish(self, jobs, status: str, result: dict = None, error: str = None) -> None:
+        now = datetime.utcnow()
+        # Only the worker holding the lease may finish a job
+        await self.collection.update_many(
+            {"id": {"$in": [job["id"] for job in jobs]}, "worker": self.worker_id},
+            {"$set": {"status": status, "result": result, "last_error": error, "finished_at": now,
+                      "updated_at": now, "lease_expires_at": None}}
+        )
+
+    async def _fail(self, job_type: JobType, jobs, error: str) -> None:
+        now = datetime.utcnow()
+        for job in jobs:
+            if job["attempts"] >= job_type.max_attempts:
+                await self._finish([job], "failed", error=error)
+                continue
+            delay = job_type.backoff_seconds * (2 ** (job["attempts"] - 1))
+            await self.collection.update_one(
+                {"id": job["id"], "worker": self.worker_id},
+                {"$set": {"status": "queued", "run_at": now + timedelta(seconds=delay), "last_error": error,
+                          "updated_at": now, "worker": None, "lease_expires_at": None}}
+            )
+
+    async def _worker_loop(self, job_type: JobType) -> None:
+        slots = asyncio.Semaphore(job_type.concurrency)
+        while not self._stopping:
+            await slots.acquire()
+            try:
+                if job_type.batch_wait:
+                    await asyncio.sleep(job_type.batch_wait)
+                jobs = []
+                while len(jobs) < job_type.batch_size:
+                    job = await self._claim(job_type)
+                    if job is None:
+                        break
+                    jobs.append(job)
+            except Exception as e:
+                slots.release()
+                logger.warning(f"Claiming {job_type.name} jobs failed: {str(e)}")
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            if not jobs:
+                slots.release()
+                job_type.wakeup.clear()
+                try:
+                    await asyncio.wait_for(job_type.wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            task = asyncio.ensure_future(self._run(job_type, jobs))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+    def start(self) -> None:
+        self._stopping = False
+        self._tasks = [asyncio.ensure_future(self._worker_loop(job_type)) for job_type in self.types.values()]
+        logger.info(f"Job workers started ({self.worker_id}): {', '.join(self.types)}")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Stop claiming and give running jobs a moment; unfinished ones are re-run after their lease"""
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        if self._running:
+            await asyncio.wait(self._running, timeout=timeout)
+        if self._process_pool:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+
+    async def run_in_process(self, fn, *args):
+        """Run a CPU-bound, picklable function in the shared process pool"""
+        if self._process_pool is None:
+            # Spawn, not fork: forking a process that holds Motor's threads is unsafe
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.process_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return await asyncio.get_running_loop().run_in_executor(self._process_pool, fn, *args)
+
+    # Status
+
+    async def get(self, job_id: str):
+        return await self.collection.find_one({"id": job_id}, {"_id": 0})
+
+    async def stats(self) -> dict:
+        counts = {name: {status: 0 for status in JOB_STATUSES} for name in self.types}
+        pipeline = [{"$group": {"_id": {"type": "$type", "status": "$status"}, "count": {"$sum": 1}}}]
+        async for row in self.collection.aggregate(pipeline):
+            counts.setdefault(row["_id"]["type"], {status: 0 for status in JOB_STATUSES})[row["_id"]["status"]] = row["count"]
+        return {"worker": self.worker_id, "running_here": len(self._running), "jobs": counts}
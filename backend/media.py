@@ -0,0 +1,56 @@
+"""
+Media Processing
+CPU-bound image work run by background jobs in a separate process: thumbnails
+and EXIF camera settings.
+"""
+
+import io
+from fractions import Fraction
+
+from PIL import ExifTags, Image, ImageOps
+
+EXIF_IFD = 0x8769
+
+
+def make_thumbnail(data: bytes, max_size: int = 600, quality: int = 82) -> bytes:
+    """JPEG thumbnail that fits in max_size x max_size, respecting EXIF orientation"""
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        image.thumbnail((max_size, max_size))
+        output = io.BytesIO()
+        image.save(output, format="JPEG", quality=quality, optimize=True, progressive=True)
+    return output.getvalue()
+
+
+def _format_number(value) -> str:
+    value = float(value)
+    return f"{value:g}"
+
+
+def extract_camera_settings(data: bytes) -> dict:
+    """camera_settings dict (in the same format the admin form uses) read from EXIF"""
+    with Image.open(io.BytesIO(data)) as image:
+        exif = image.getexif()
+    tags = {ExifTags.TAGS.get(tag, tag): value for tag, value in exif.items()}
+    tags.update({ExifTags.TAGS.get(tag, tag): value for tag, value in exif.get_ifd(EXIF_IFD).items()})
+
+    settings = {}
+    if tags.get("FNumber"):
+        settings["aperture"] = f"f/{_format_number(tags['FNumber'])}"
+    if tags.get("ExposureTime"):
+        exposure = Fraction(float(tags["ExposureTime"])).limit_denominator(8000)
+        settings["shutter_speed"] = (
+            f"1/{exposure.denominator}s" if exposure < 1 and exposure.numerator == 1 else f"{_format_number(exposure)}s"
+        )
+    iso = tags.get("ISOSpeedRatings") or tags.get("PhotographicSensitivity")
+    if isinstance(iso, (tuple, list)):
+        iso = iso[0] if iso else None
+    if iso:
+        settings["iso"] = f"ISO {int(iso)}"
+    if tags.get("FocalLength"):
+        settings["focal_length"] = f"{_format_number(tags['FocalLength'])}mm"
+    if tags.get("LensModel"):
+        settings["lens"] = str(tags["LensModel"]).strip("\x00 ")
+    if tags.get("Model"):
+        settings["camera"] = " ".join(str(part).strip("\x00 ") for part in (tags.get("Make"), tags["Model"]) if part)
+    return settings
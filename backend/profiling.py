@@ -0,0 +1,212 @@
+"""
+Query Profiling
+Times every MongoDB command through pymongo command monitoring, attributes it to
+the HTTP request that issued it and explains the ones that run slow.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# Commands MongoDB can explain; anything else is timed but never explained
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct", "findAndModify", "update", "delete"}
+# Session and routing fields that are not allowed inside an explain
+_EXPLAIN_STRIPPED_FIELDS = {"lsid", "txnNumber", "autocommit", "startTransaction", "readConcern", "writeConcern"}
+
+
+class RequestProfile:
+    """Database time accumulated by one request; updated from Motor's executor threads"""
+
+    def __init__(self, path: str = ""):
+        self.path = path
+        self.db_time_ms = 0.0
+        self.queries = 0
+        self._lock = threading.Lock()
+
+    def record(self, duration_ms: float) -> None:
+        with self._lock:
+            self.db_time_ms += duration_ms
+            self.queries += 1
+
+    def server_timing(self, total_ms: float) -> str:
+        return f'db;dur={self.db_time_ms:.1f};desc="{self.queries} queries", total;dur={total_ms:.1f}'
+
+
+# Motor copies the caller's context into its executor, so listeners see the request's profile
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles each HTTP request and adds a Server-Timing header to its response"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        profile = RequestProfile(scope["path"])
+        started = time.perf_counter()
+
+        async def send_with_timing(message) -> None:
+            if message["type"] == "http.response.start":
+                timing = profile.server_timing((time.perf_counter() - started) * 1000)
+                message = {**message, "headers": [*message.get("headers", []), (b"server-timing", timing.encode())]}
+            await send(message)
+
+        # Runs in the request's own task, so there is no extra task or body stream per request
+        token = current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_profile.reset(token)
+
+
+def _filter_shape(command: dict) -> list:
+    """Field names a command filters on, without their values"""
+    query = command.get("filter") or command.get("query") or {}
+    if not query and command.get("pipeline"):
+        first_stage = command["pipeline"][0] if command["pipeline"] else {}
+        query = first_stage.get("$match", {})
+    if not query and command.get("updates"):
+        query = command["updates"][0].get("q", {})
+    if not query and command.get("deletes"):
+        query = command["deletes"][0].get("q", {})
+    return sorted(query.keys()) if isinstance(query, dict) else []
+
+
+def summarize_explain(explain: dict) -> dict:
+    """Boil an explain document down to the plan stages, indexes and examined counts"""
+    stages = set()
+    indexes = set()
+    stats = {"docs_examined": 0, "keys_examined": 0, "returned": 0}
+
+    def walk(node):
+        if isinstance(node, dict):
+            if node.get("stage"):
+                stages.add(node["stage"])
+            if node.get("indexName"):
+                indexes.add(node["indexName"])
+            if "totalDocsExamined" in node:
+                stats["docs_examined"] += node.get("totalDocsExamined", 0)
+                stats["keys_examined"] += node.get("totalKeysExamined", 0)
+                stats["returned"] += node.get("nReturned", 0)
+            for key, value in node.items():
+                if key not in ("rejectedPlans", "allPlansExecution"):
+                    walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(explain)
+    if "COLLSCAN" in stages:
+        plan = "COLLSCAN"
+    elif "IXSCAN" in stages or "EXPRESS_IXSCAN" in stages or "IDHACK" in stages:
+        plan = "IXSCAN"
+    else:
+        plan = "OTHER"
+    return {"plan": plan, "stages": sorted(stages), "indexes": sorted(indexes), **stats}
+
+
+class QueryProfiler(monitoring.CommandListener):
+    """Command listener that feeds request profiles and records slow queries with explain summaries"""
+
+    def __init__(self, slow_ms: float = 100.0, explain: bool = True, explain_interval: float = 300.0,
+                 history: int = 100):
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self.slow_queries = deque(maxlen=history)
+        self.client = None
+        self.loop = None
+        self._pending = {}
+        self._last_explained = {}
+        self._lock = threading.Lock()
+
+    def attach(self, client, loop) -> None:
+        """Give the profiler a client and event loop to run explains on"""
+        self.client = client
+        self.loop = loop
+
+    def started(self, event):
+        if self.explain and event.command_name in EXPLAINABLE_COMMANDS:
+            with self._lock:
+                self._pending[(event.connection_id, event.request_id)] = (event.database_name, event.command)
+
+    def succeeded(self, event):
+        self._finished(event)
+
+    def failed(self, event):
+        self._finished(event)
+
+    def _finished(self, event) -> None:
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+        duration_ms = event.duration_micros / 1000.0
+        profile = current_profile.get()
+        if profile is not None:
+            profile.record(duration_ms)
+        if duration_ms >= self.slow_ms and event.command_name != "explain":
+            self._record_slow(event, duration_ms, pending, profile)
+
+    def _record_slow(self, event, duration_ms: float, pending, profile) -> None:
+        command = pending[1] if pending else {}
+        collection = command.get(event.command_name) if command else None
+        entry = {
+            "timestamp": datetime.utcnow().isoformat(),
+            "command": event.command_name,
+            "collection": collection if isinstance(collection, str) else None,
+            "filter_fields": _filter_shape(command) if command else [],
+            "duration_ms": round(duration_ms, 2),
+            "request_path": profile.path if profile else None,
+            "explain": None,
+        }
+        self.slow_queries.append(entry)
+        logger.warning(
+            f"Slow query {entry['command']} on {entry['collection']} {entry['filter_fields']} "
+            f"took {duration_ms:.1f}ms (request: {entry['request_path']})"
+        )
+
+        if not (pending and self.client and self.loop and not self.loop.is_closed()):
+            return
+        shape = (event.command_name, entry["collection"], tuple(entry["filter_fields"]))
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_explained.get(shape, -self.explain_interval) < self.explain_interval:
+                return
+            self._last_explained[shape] = now
+        self.loop.call_soon_threadsafe(asyncio.ensure_future, self._explain(entry, pending[0], command))
+
+    async def _explain(self, entry: dict, database_name: str, command: dict) -> None:
+        explainable = {key: value for key, value in command.items()
+                       if not key.startswith("$") and key not in _EXPLAIN_STRIPPED_FIELDS}
+        try:
+            explain = await self.client[database_name].command(
+                {"explain": explainable, "verbosity": "executionStats"}
+            )
+        except Exception as e:
+            logger.warning(f"Explain failed for slow {entry['command']} on {entry['collection']}: {str(e)}")
+            return
+        entry["explain"] = summarize_explain(explain)
+        summary = entry["explain"]
+        logger.warning(
+            f"Explain for slow {entry['command']} on {entry['collection']}: {summary['plan']} "
+            f"indexes={summary['indexes']} examined {summary['docs_examined']} docs / "
+            f"{summary['keys_examined']} keys for {summary['returned']} returned"
+        )
+
+    def stats(self) -> dict:
+        return {
+            "slow_threshold_ms": self.slow_ms,
+            "slow_queries": list(self.slow_queries),
+        }
@@ -0,0 +1,191 @@
+"""
+Recipe Rendering Engine
+Applies PhotoTweaker-style Fujifilm recipes to real images with NumPy
+"""
+
+import hashlib
+import io
+import json
+
+import numpy as np
+from PIL import Image
+
+# Defaults mirror the initial state of PhotoTweaker.js so partial recipes render the same way
+DEFAULT_SETTINGS = {
+    "simulation": "Astia/Soft",
+    "grainEffect": "Off",
+    "colourChromeEffect": "Weak",
+    "colourChromeBlue": "Weak",
+    "whiteBalance": 7500,
+    "wbShiftRed": -4,
+    "wbShiftBlue": 4,
+    "dynamicRange": "DR400",
+    "highlights": -0.5,
+    "shadows": -1.5,
+    "color": 2,
+    "sharpness": 0,
+    "isoNoiseReduction": -4,
+    "clarity": -2,
+    "evCompensation": 0
+}
+
+# Film simulation: (saturation, contrast, 3x3 channel mix)
+FILM_SIMULATIONS = {
+    "Provia/Standard": (1.0, 1.0, np.eye(3)),
+    "Velvia/Vivid": (1.35, 1.12, np.eye(3)),
+    "Astia/Soft": (1.12, 0.92, np.array([
+        [1.02, -0.01, -0.01],
+        [0.00, 1.00, 0.00],
+        [-0.01, 0.00, 1.01]
+    ])),
+    "Classic Chrome": (0.75, 1.06, np.array([
+        [0.96, 0.04, 0.00],
+        [0.02, 0.96, 0.02],
+        [0.00, 0.06, 0.94]
+    ])),
+    "Sepia": (0.0, 1.0, np.array([
+        [0.393, 0.769, 0.189],
+        [0.349, 0.686, 0.168],
+        [0.272, 0.534, 0.131]
+    ]) / 1.351),
+}
+
+EFFECT_STRENGTH = {"Off": 0.0, "Weak": 0.5, "Strong": 1.0}
+DYNAMIC_RANGE_STRENGTH = {"DR100": 0.0, "DR200": 0.5, "DR400": 1.0}
+GRAIN_AMPLITUDE = {"Off": 0.0, "Weak": 0.025, "Strong": 0.05}
+
+LUT_SIZE = 33
+LUMA = np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
+
+
+def normalize_settings(settings: dict) -> dict:
+    """Merge a stored recipe over the defaults, dropping unknown keys"""
+    merged = dict(DEFAULT_SETTINGS)
+    for key, value in (settings or {}).items():
+        if key in merged and value is not None:
+            merged[key] = value
+    return merged
+
+
+def recipe_hash(settings: dict) -> str:
+    """Stable hash of the effective recipe, used as part of the render cache key"""
+    payload = json.dumps(normalize_settings(settings), sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def build_tone_curve(settings: dict) -> np.ndarray:
+    """256-entry tone curve covering exposure, highlights, shadows, DR and clarity"""
+    x = np.linspace(0.0, 1.0, 256, dtype=np.float32)
+    y = np.clip(x * (2.0 ** float(settings["evCompensation"])), 0.0, 1.0)
+
+    # Bumps that vanish at black, mid-grey and white so the endpoints stay put
+    highlight_bump = np.sin(np.pi * np.clip(2.0 * y - 1.0, 0.0, 1.0))
+    shadow_bump = np.sin(np.pi * np.clip(2.0 * y, 0.0, 1.0)) * (y < 0.5)
+
+    y = y + 0.03 * float(settings["highlights"]) * highlight_bump
+    y = y - 0.03 * float(settings["shadows"]) * shadow_bump
+    y = y - 0.06 * DYNAMIC_RANGE_STRENGTH.get(settings["dynamicRange"], 0.0) * highlight_bump
+    y = y - 0.015 * float(settings["clarity"]) * np.sin(2.0 * np.pi * y)
+    return np.clip(y, 0.0, 1.0).astype(np.float32)
+
+
+def build_color_lut(settings: dict, size: int = LUT_SIZE) -> np.ndarray:
+    """3D LUT (size x size x size x 3) for white balance, film simulation and colour effects"""
+    axis = np.linspace(0.0, 1.0, size, dtype=np.float32)
+    rgb = np.stack(np.meshgrid(axis, axis, axis, indexing="ij"), axis=-1)
+
+    # White balance: kelvin relative to daylight plus the red/blue fine shift
+    temperature = np.log2(max(float(settings["whiteBalance"]), 1000.0) / 5500.0)
+    gains = np.array([
+        (1.0 + 0.15 * temperature) * (1.0 + 0.02 * float(settings["wbShiftRed"])),
+        1.0,
+        (1.0 - 0.15 * temperature) * (1.0 + 0.02 * float(settings["wbShiftBlue"]))
+    ], dtype=np.float32)
+    rgb = rgb * gains
+
+    saturation, contrast, mix = FILM_SIMULATIONS.get(settings["simulation"], FILM_SIMULATIONS["Provia/Standard"])
+    rgb = rgb @ mix.T.astype(np.float32)
+    rgb = (rgb - 0.5) * contrast + 0.5
+
+    luma = (rgb @ LUMA)[..., None]
+    saturation = saturation * (1.0 + 0.1 * float(settings["color"]))
+    rgb = luma + (rgb - luma) * saturation
+
+    # Colour chrome darkens highly saturated tones; the blue variant only touches blues
+    chroma = np.clip(rgb.max(axis=-1) - rgb.min(axis=-1), 0.0, 1.0)[..., None]
+    rgb = rgb * (1.0 - 0.12 * EFFECT_STRENGTH.get(settings["colourChromeEffect"], 0.0) * chroma)
+    blueness = np.clip(rgb[..., 2:3] - np.maximum(rgb[..., 0:1], rgb[..., 1:2]), 0.0, 1.0)
+    rgb = rgb * (1.0 - 0.2 * EFFECT_STRENGTH.get(settings["colourChromeBlue"], 0.0) * blueness)
+
+    return np.clip(rgb, 0.0, 1.0).astype(np.float32)
+
+
+def apply_lut(pixels: np.ndarray, lut: np.ndarray) -> np.ndarray:
+    """Trilinear 3D LUT lookup over an (..., 3) float image in [0, 1]"""
+    size = lut.shape[0]
+    scaled = pixels * (size - 1)
+    base = np.clip(np.floor(scaled).astype(np.int32), 0, size - 2)
+    frac = scaled - base
+    r0, g0, b0 = base[..., 0], base[..., 1], base[..., 2]
+    fr, fg, fb = frac[..., 0:1], frac[..., 1:2], frac[..., 2:3]
+
+    out = np.zeros_like(pixels)
+    for dr, wr in ((0, 1.0 - fr), (1, fr)):
+        for dg, wg in ((0, 1.0 - fg), (1, fg)):
+            for db, wb in ((0, 1.0 - fb), (1, fb)):
+                out += lut[r0 + dr, g0 + dg, b0 + db] * (wr * wg * wb)
+    return out
+
+
+def _box_blur(pixels: np.ndarray) -> np.ndarray:
+    """3x3 box blur using shifted slices of an edge-padded copy"""
+    padded = np.pad(pixels, ((1, 1), (1, 1), (0, 0)), mode="edge")
+    height, width = pixels.shape[:2]
+    total = np.zeros_like(pixels)
+    for dy in range(3):
+        for dx in range(3):
+            total += padded[dy:dy + height, dx:dx + width]
+    return total / 9.0
+
+
+def render(image: np.ndarray, settings: dict, seed: int = 0) -> np.ndarray:
+    """Render an RGB uint8 image with a recipe and return a new uint8 image"""
+    settings = normalize_settings(settings)
+
+    tone_curve = build_tone_curve(settings)
+    pixels = tone_curve[image]
+    pixels = apply_lut(pixels, build_color_lut(settings))
+
+    # Positive noise reduction smooths fine texture; negative levels leave the image as is, because the
+    # source is an already processed JPEG with no sensor noise left to keep
+    noise_reduction = float(settings["isoNoiseReduction"])
+    if noise_reduction > 0:
+        pixels = pixels + 0.1 * noise_reduction * (_box_blur(pixels) - pixels)
+
+    sharpness = float(settings["sharpness"])
+    if sharpness:
+        pixels = pixels + 0.15 * sharpness * (pixels - _box_blur(pixels))
+
+    amplitude = GRAIN_AMPLITUDE.get(settings["grainEffect"], 0.0)
+    if amplitude:
+        rng = np.random.default_rng(seed)
+        noise = rng.standard_normal(pixels.shape[:2] + (1,), dtype=np.float32)
+        midtones = 4.0 * pixels * (1.0 - pixels)
+        pixels = pixels + amplitude * noise * midtones
+
+    return (np.clip(pixels, 0.0, 1.0) * 255.0 + 0.5).astype(np.uint8)
+
+
+def render_bytes(data: bytes, settings: dict, max_dimension: int = 1600, quality: int = 88) -> bytes:
+    """Decode an image, render the recipe on it and encode the result as JPEG"""
+    with Image.open(io.BytesIO(data)) as source:
+        source = source.convert("RGB")
+        source.thumbnail((max_dimension, max_dimension))
+        image = np.asarray(source, dtype=np.uint8)
+
+    seed = int(recipe_hash(settings), 16) & 0xFFFFFFFF
+    rendered = render(image, settings, seed=seed)
+
+    output = io.BytesIO()
+    Image.fromarray(rendered).save(output, format="JPEG", quality=quality, optimize=True)
+    return output.getvalue()
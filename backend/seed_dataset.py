@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Synthetic Dataset Generator
+Creates a seeded, reproducible portfolio dataset at realistic scale and bulk-loads
+it into MongoDB with batched, unordered writes.
+
+Usage:
+    python seed_dataset.py                       # 200 photos, 100k gallery, 10k articles, 1M comments
+    python seed_dataset.py --comments 5000000 --drop
+    python seed_dataset.py --gallery 1000 --articles 100 --comments 10000 --seed 7
+"""
+
+import asyncio
+import itertools
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+CATEGORIES = ["portrait", "street", "landscape", "wedding", "urban", "architecture", "macro", "abstract",
+              "concert", "travel", "black and white", "night"]
+TAGS = ["photography", "portrait", "lighting", "fujifilm", "techniques", "gear", "street", "editing", "film",
+        "natural light", "travel", "landscape", "beginner", "camera review", "composition", "color grading",
+        "wedding", "concert", "lenses", "x-t4", "black and white", "night", "workflow", "printing", "studio"]
+LENSES = [("Fujifilm XF 56mm f/1.2", "56mm"), ("Fujifilm XF 35mm f/1.4", "35mm"), ("Fujifilm XF 23mm f/1.4", "23mm"),
+          ("Fujifilm XF 16-55mm f/2.8", "35mm"), ("Fujifilm XF 80mm f/2.8 Macro", "80mm"),
+          ("Sony FE 24-70mm f/2.8", "50mm"), ("Vintage 50mm f/1.4", "50mm")]
+APERTURES = ["f/1.2", "f/1.4", "f/1.8", "f/2", "f/2.8", "f/4", "f/5.6", "f/8", "f/11", "f/16"]
+SHUTTER_SPEEDS = ["1/30s", "1/60s", "1/125s", "1/160s", "1/250s", "1/500s", "1/1000s", "1/4000s"]
+ISOS = ["ISO 100", "ISO 200", "ISO 400", "ISO 800", "ISO 1600", "ISO 3200", "ISO 6400"]
+WORDS = ("light shadow lens frame color grain portrait street film exposure focus story moment subject "
+         "background composition golden hour contrast texture mood depth field aperture shutter iso "
+         "sensor editing workflow natural studio window reflection silhouette candid emotion").split()
+NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Quinn", "Avery", "Linh", "Minh"]
+
+DEFAULT_ANCHOR = datetime(2025, 1, 1)
+
+
+def zipf_cum_weights(count: int, exponent: float):
+    """Cumulative Zipf weights for rank 1..count, for use with random.choices(cum_weights=...)"""
+    return list(itertools.accumulate(1.0 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+def make_id(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def random_timestamp(rng: random.Random, anchor: datetime, days: int) -> datetime:
+    return anchor - timedelta(seconds=rng.randrange(days * 86400))
+
+
+def generate_photos(rng: random.Random, count: int, anchor: datetime):
+    from server import Photo, normalize_camera_settings
+
+    lens_weights = zipf_cum_weights(len(LENSES), 0.8)
+    for i in range(count):
+        lens, focal_length = rng.choices(LENSES, cum_weights=lens_weights)[0]
+        camera_settings = {
+            "aperture": rng.choice(APERTURES),
+            "shutter_speed": rng.choice(SHUTTER_SPEEDS),
+            "iso": ISOS[min(len(ISOS) - 1, int(rng.expovariate(0.7)))],
+            "lens": lens,
+            "focal_length": focal_length
+        }
+        yield Photo(
+            id=make_id(rng),
+            title=f"Featured photo {i + 1}",
+            description=" ".join(rng.choices(WORDS, k=rng.randint(8, 20))),
+            image_url=f"https://images.unsplash.com/photo-synthetic-{i + 1}",
+            camera_settings=camera_settings,
+            timestamp=random_timestamp(rng, anchor, 3 * 365),
+            **normalize_camera_settings(camera_settings)
+        ).dict()
+
+
+def generate_gallery(rng: random.Random, count: int, anchor: datetime):
+    category_weights = zipf_cum_weights(len(CATEGORIES), 1.0)
+    for i in range(count):
+        category = rng.choices(CATEGORIES, cum_weights=category_weights)[0]
+        yield {
+            "id": make_id(rng),
+            "title": f"{category.title()} #{i + 1}",
+            "image_url": f"https://images.unsplash.com/photo-gallery-{i + 1}",
+            "thumbnail_url": None,
+            "description": " ".join(rng.choices(WORDS, k=rng.randint(4, 12))),
+            "category": category,
+            "timestamp": random_timestamp(rng, anchor, 3 * 365)
+        }
+
+
+def generate_articles(rng: random.Random, count: int, anchor: datetime):
+    tag_weights = zipf_cum_weights(len(TAGS), 1.1)
+    for i in range(count):
+        title_words = rng.choices(WORDS, k=rng.randint(4, 9))
+        title = " ".join(title_words).capitalize()
+        # Lognormal body length: most posts are ~800 words, a long tail runs to several thousand
+        word_count = max(150, min(8000, int(rng.lognormvariate(6.7, 0.5))))
+        paragraphs = []
+        remaining = word_count
+        while remaining > 0:
+            length = min(remaining, rng.randint(40, 120))
+            paragraphs.append(" ".join(rng.choices(WORDS, k=length)).capitalize() + ".")
+            remaining -= length
+        content = "\n\n".join(paragraphs)
+        tags = []
+        for tag in rng.choices(TAGS, cum_weights=tag_weights, k=rng.randint(1, 5)):
+            if tag not in tags:
+                tags.append(tag)
+        publish_date = random_timestamp(rng, anchor, 5 * 365)
+        excerpt = content[:180]
+        yield {
+            "id": make_id(rng),
+            "title": title,
+            "content": content,
+            "excerpt": excerpt,
+            "slug": f"{'-'.join(title_words)}-{i + 1}",
+            "author": "Viet",
+            "tags": tags,
+            "publish_date": publish_date,
+            "is_published": rng.random() < 0.9,
+            "featured_image": f"https://images.unsplash.com/photo-article-{i + 1}",
+            "meta_description": excerpt[:160],
+            "read_time": max(1, word_count // 200),
+            "updated_at": None
+        }
+
+
+def generate_comments(rng: random.Random, count: int, photo_ids, anchor: datetime):
+    # A few hot photos collect most of the comments
+    photo_weights = zipf_cum_weights(len(photo_ids), 1.2)
+    batch = 10000
+    produced = 0
+    while produced < count:
+        size = min(batch, count - produced)
+        for photo_id in rng.choices(photo_ids, cum_weights=photo_weights, k=size):
+            yield {
+                "id": make_id(rng),
+                "photo_id": photo_id,
+                "name": rng.choice(NAMES),
+                "comment": " ".join(rng.choices(WORDS, k=rng.randint(3, 25))),
+                "timestamp": random_timestamp(rng, anchor, 2 * 365)
+            }
+        produced += size
+
+
+async def bulk_load(collection, documents, total: int, batch_size: int = 5000, parallel: int = 4,
+                    label: str = None, progress: bool = True) -> int:
+    """Insert documents in unordered batches, keeping up to `parallel` batches in flight"""
+    label = label or collection.name
+    semaphore = asyncio.Semaphore(parallel)
+    pending = set()
+    inserted = 0
+    started = time.perf_counter()
+    last_report = 0.0
+
+    async def insert(batch):
+        nonlocal inserted, last_report
+        try:
+            result = await collection.insert_many(batch, ordered=False)
+            inserted += len(result.inserted_ids)
+        finally:
+            semaphore.release()
+        now = time.perf_counter()
+        if progress and (now - last_report > 1.0 or inserted >= total):
+            last_report = now
+            rate = inserted / max(now - started, 1e-9)
+            print(f"   {label}: {inserted:,}/{total:,} ({inserted / max(total, 1):.0%}) - {rate:,.0f} docs/s")
+
+    iterator = iter(documents)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            break
+        await semaphore.acquire()
+        task = asyncio.ensure_future(insert(batch))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    if pending:
+        await asyncio.gather(*pending)
+    return inserted
+
+
+async def load_dataset(db, photos: int = 200, gallery: int = 100000, articles: int = 10000,
+                       comments: int = 1000000, seed: int = 42, anchor: datetime = DEFAULT_ANCHOR,
+                       drop: bool = False, batch_size: int = 5000, parallel: int = 4, progress: bool = True) -> dict:
+    """Generate and load the full dataset; the same seed always produces the same documents"""
+    rng = random.Random(seed)
+    if drop:
+        for name in ("photos", "gallery", "articles", "comments"):
+            await db[name].drop()
+
+    counts = {}
+    options = {"batch_size": batch_size, "parallel": parallel, "progress": progress}
+    counts["photos"] = await bulk_load(db.photos, generate_photos(rng, photos, anchor), photos, **options)
+    counts["gallery"] = await bulk_load(db.gallery, generate_gallery(rng, gallery, anchor), gallery, **options)
+    counts["articles"] = await bulk_load(db.articles, generate_articles(rng, articles, anchor), articles, **options)
+
+    photo_ids = [photo["id"] async for photo in db.photos.find({}, {"id": 1}).sort("timestamp", -1)]
+    if photo_ids and comments:
+        counts["comments"] = await bulk_load(
+            db.comments, generate_comments(rng, comments, photo_ids, anchor), comments, **options
+        )
+    else:
+        counts["comments"] = 0
+    return counts
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate and bulk-load a synthetic portfolio dataset")
+    parser.add_argument("--photos", type=int, default=200, help="Featured photos (default: 200)")
+    parser.add_argument("--gallery", type=int, default=100000, help="Gallery items (default: 100000)")
+    parser.add_argument("--articles", type=int, default=10000, help="Articles (default: 10000)")
+    parser.add_argument("--comments", type=int, default=1000000, help="Comments (default: 1000000)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Documents per bulk write (default: 5000)")
+    parser.add_argument("--parallel", type=int, default=4, help="Bulk writes in flight (default: 4)")
+    parser.add_argument("--drop", action="store_true", help="Drop the collections before loading")
+    args = parser.parse_args()
+
+    import server
+
+    print(f"🌱 Seeding {server.db_name} (seed {args.seed})")
+    started = time.perf_counter()
+    counts = asyncio.run(load_dataset(
+        server.db, photos=args.photos, gallery=args.gallery, articles=args.articles, comments=args.comments,
+        seed=args.seed, drop=args.drop, batch_size=args.batch_size, parallel=args.parallel
+    ))
+    print(f"✅ Loaded {', '.join(f'{count:,} {name}' for name, count in counts.items())} "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
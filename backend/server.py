@@ -1,18 +1,44 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter, create_model
 from typing import List, Optional
 import uuid
-from datetime import datetime
+import re
+import json
+import asyncio
+import anyio
+import time
+import hashlib
+import threading
+from functools import lru_cache
+from collections import OrderedDict, deque
+from urllib.parse import urljoin, urlparse
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from xml.sax.saxutils import escape, quoteattr
 import psutil
 import boto3
-from botocore.exceptions import ClientError, NoCredentialsError
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
 import mimetypes
+import secrets
+import requests
+import recipe_renderer
+from snapshot_export import SnapshotExporter, LocalSnapshotStore, SNAPSHOT_GROUPS
+from profiling import QueryProfiler, ProfilingMiddleware
+from jobs import JobQueue
+from fallback import FallbackStore
+from storage import S3Storage, LocalStorage, IMMUTABLE, IMAGE_CONTENT_TYPES, file_response
+import media
+from tracing import Tracer, InMemoryExporter, FileExporter, TracingCommandListener, TracingMiddleware, instrument_s3
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -28,7 +54,22 @@ logger = logging.getLogger(__name__)
 mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
 db_name = os.environ.get('DB_NAME', 'portfolio_db')
 
-client = AsyncIOMotorClient(mongo_url)
+# Query profiling: every command is timed and attributed to its request, slow ones are explained
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '100'))
+EXPLAIN_SLOW_QUERIES = os.environ.get('EXPLAIN_SLOW_QUERIES', 'true').lower() == 'true'
+query_profiler = QueryProfiler(slow_ms=SLOW_QUERY_MS, explain=EXPLAIN_SLOW_QUERIES)
+
+# Request tracing: a sampled fraction of requests records spans for Mongo, S3 and serialization
+TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', '0.01'))
+TRACE_FILE = os.environ.get('TRACE_FILE')
+TRACE_BUFFER = int(os.environ.get('TRACE_BUFFER', '200'))
+trace_buffer = InMemoryExporter(max_traces=TRACE_BUFFER)
+tracer = Tracer(
+    sample_rate=TRACE_SAMPLE_RATE,
+    exporters=[trace_buffer] + ([FileExporter(TRACE_FILE)] if TRACE_FILE else [])
+)
+
+client = AsyncIOMotorClient(mongo_url, event_listeners=[query_profiler, TracingCommandListener(tracer)])
 db = client[db_name]
 
 # AWS S3 Configuration
@@ -37,6 +78,21 @@ AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
 AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
 AWS_BUCKET_NAME = os.environ.get('AWS_BUCKET_NAME')
 
+# Upload storage: 's3', or 'local' to keep files under STORAGE_DIR and serve them from /media
+STORAGE_BACKEND = os.environ.get(
+    'STORAGE_BACKEND', 's3' if AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY and AWS_BUCKET_NAME else 'local'
+)
+STORAGE_DIR = Path(os.environ.get('STORAGE_DIR', ROOT_DIR / 'uploads'))
+# Public base URL of this API for local storage; only development falls back to localhost
+ENVIRONMENT = os.environ.get('ENVIRONMENT', 'production' if os.environ.get('RAILWAY_ENVIRONMENT') else 'development')
+STORAGE_PUBLIC_URL = os.environ.get('STORAGE_PUBLIC_URL') or (
+    f"https://{os.environ['RAILWAY_PUBLIC_DOMAIN']}" if os.environ.get('RAILWAY_PUBLIC_DOMAIN')
+    else 'http://localhost:8000' if ENVIRONMENT == 'development' else None
+)
+# Signs local upload URLs; set it explicitly when running more than one worker
+STORAGE_SIGNING_KEY = os.environ.get('STORAGE_SIGNING_KEY') or secrets.token_hex(32)
+STORAGE_MAX_UPLOAD_MB = int(os.environ.get('STORAGE_MAX_UPLOAD_MB', '25'))
+
 # Initialize S3 client
 s3_client = None
 if AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY and AWS_BUCKET_NAME:
@@ -47,12 +103,86 @@ if AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY and AWS_BUCKET_NAME:
             aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
             region_name=AWS_REGION
         )
+        instrument_s3(s3_client, tracer)
         logger.info("S3 client initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize S3 client: {str(e)}")
-else:
+elif STORAGE_BACKEND == 's3':
     logger.warning("S3 credentials not provided - upload functionality will be limited")
 
+storage = None
+if STORAGE_BACKEND == 's3' and s3_client:
+    storage = S3Storage(s3_client, AWS_BUCKET_NAME, AWS_REGION)
+elif STORAGE_BACKEND == 'local' and not STORAGE_PUBLIC_URL:
+    logger.error(f"STORAGE_PUBLIC_URL is required for local storage in {ENVIRONMENT} - upload functionality disabled")
+elif STORAGE_BACKEND == 'local':
+    storage = LocalStorage(STORAGE_DIR, STORAGE_PUBLIC_URL, STORAGE_SIGNING_KEY)
+    logger.info(f"Uploads stored locally in {STORAGE_DIR}, served from {STORAGE_PUBLIC_URL}/media")
+
+# Recipe rendering configuration
+RENDER_CACHE_DIR = Path(os.environ.get('RENDER_CACHE_DIR', ROOT_DIR / 'cache' / 'renders'))
+RENDER_CACHE_MAX_MB = int(os.environ.get('RENDER_CACHE_MAX_MB', '512'))
+RENDER_MAX_SOURCE_MB = int(os.environ.get('RENDER_MAX_SOURCE_MB', '25'))
+RENDER_ALLOWED_HOSTS = [
+    host.strip() for host in os.environ.get('RENDER_ALLOWED_HOSTS', 'images.unsplash.com').split(',') if host.strip()
+]
+
+# Image proxy: /img/<host>/<path> serves images from allowed origins through a bounded disk cache
+IMAGE_CACHE_DIR = Path(os.environ.get('IMAGE_CACHE_DIR', ROOT_DIR / 'cache' / 'images'))
+IMAGE_CACHE_MAX_MB = int(os.environ.get('IMAGE_CACHE_MAX_MB', '1024'))
+IMAGE_PROXY_MAX_MB = int(os.environ.get('IMAGE_PROXY_MAX_MB', '25'))
+IMAGE_PROXY_MAX_AGE = int(os.environ.get('IMAGE_PROXY_MAX_AGE', str(7 * 86400)))
+IMAGE_PROXY_HOSTS = [
+    host.strip() for host in os.environ.get('IMAGE_PROXY_HOSTS', 'images.unsplash.com').split(',') if host.strip()
+] + list(getattr(storage, 'hosts', ()))
+
+# Hot article cache configuration
+ARTICLE_CACHE_SIZE = int(os.environ.get('ARTICLE_CACHE_SIZE', '512'))
+ARTICLE_CACHE_TTL = float(os.environ.get('ARTICLE_CACHE_TTL', '300'))
+ARTICLE_NEGATIVE_CACHE_TTL = float(os.environ.get('ARTICLE_NEGATIVE_CACHE_TTL', '30'))
+
+# Admin dashboard stats are recomputed at most this often
+ADMIN_STATS_TTL = float(os.environ.get('ADMIN_STATS_TTL', '30'))
+
+# Sitemap and feed configuration
+SITE_URL = os.environ.get('SITE_URL', os.environ.get('FRONTEND_URL', 'https://viet-portphotio.vercel.app')).rstrip('/')
+FEED_ARTICLE_LIMIT = int(os.environ.get('FEED_ARTICLE_LIMIT', '50'))
+SITEMAP_IMAGE_LIMIT = 1000  # Google's cap on <image:image> entries per URL
+SYNDICATION_MAX_AGE = float(os.environ.get('SYNDICATION_MAX_AGE', '300'))  # Rebuild to pick up other workers' writes
+
+# Live dashboard metrics stream
+METRICS_STREAM_INTERVAL = float(os.environ.get('METRICS_STREAM_INTERVAL', '5'))
+METRICS_DB_INTERVAL = float(os.environ.get('METRICS_DB_INTERVAL', '30'))
+
+# Live comment streams ("change_stream" relays inserts from every worker; needs a replica set such as Atlas)
+COMMENT_FANOUT = os.environ.get('COMMENT_FANOUT', 'local').lower()
+COMMENT_STREAM_HEARTBEAT = float(os.environ.get('COMMENT_STREAM_HEARTBEAT', '25'))
+COMMENT_STREAM_BACKLOG = 50  # Recent events per photo replayed to reconnecting clients
+
+# Background jobs (set JOB_WORKERS_ENABLED=false on processes that should only enqueue)
+JOB_WORKERS_ENABLED = os.environ.get('JOB_WORKERS_ENABLED', 'true').lower() == 'true'
+JOB_LEASE_SECONDS = float(os.environ.get('JOB_LEASE_SECONDS', '300'))
+JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', '2'))
+JOB_PROCESS_WORKERS = int(os.environ.get('JOB_PROCESS_WORKERS', '2'))
+JOB_RETENTION_DAYS = int(os.environ.get('JOB_RETENTION_DAYS', '7'))
+THUMBNAIL_MAX_SIZE = int(os.environ.get('THUMBNAIL_MAX_SIZE', '600'))
+EXIF_FIELDS = ("aperture", "shutter_speed", "iso", "focal_length")
+
+# Orphaned upload collection: objects under these prefixes that nothing references
+S3_GC_PREFIXES = [prefix.strip() for prefix in os.environ.get('S3_GC_PREFIXES', 'uploads/').split(',') if prefix.strip()]
+S3_GC_GRACE_HOURS = float(os.environ.get('S3_GC_GRACE_HOURS', '48'))
+S3_GC_REPORT_KEYS = 200  # Orphan keys listed in the job result
+
+# Serve the last good body of a public read when MongoDB errors or is slower than FALLBACK_AFTER_SECONDS
+# (set FALLBACK_DB to an empty string to disable)
+FALLBACK_DB = os.environ.get('FALLBACK_DB', str(ROOT_DIR / 'cache' / 'fallback.sqlite3'))
+FALLBACK_AFTER_SECONDS = float(os.environ.get('FALLBACK_AFTER_SECONDS', '1.5'))
+FALLBACK_MAX_ENTRIES = int(os.environ.get('FALLBACK_MAX_ENTRIES', '500'))
+FALLBACK_MAX_SKIP = 100  # Deeper pages are not worth keeping
+
+# Static snapshot export (disabled unless SNAPSHOT_DIR is set)
+SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR')
+
 # Create the main app without a prefix
 app = FastAPI(
     title="Viet's Photography Portfolio API",
@@ -78,6 +208,12 @@ class Photo(BaseModel):
     description: str
     image_url: str
     camera_settings: dict
+    # Numeric copies of camera_settings, normalized at write time for range queries
+    f_number: Optional[float] = None
+    exposure_seconds: Optional[float] = None
+    iso: Optional[int] = None
+    focal_length_mm: Optional[float] = None
+    lens_id: Optional[str] = None
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 class PhotoCreate(BaseModel):
@@ -121,6 +257,21 @@ class Article(BaseModel):
     featured_image: Optional[str] = None
     meta_description: Optional[str] = None
     read_time: int = 5  # estimated read time in minutes
+    updated_at: Optional[datetime] = None
+
+class ArticleSummary(BaseModel):
+    """Article list entry without the body"""
+    id: str
+    title: str
+    excerpt: str
+    slug: str
+    author: str = "Viet"
+    tags: List[str] = []
+    publish_date: datetime
+    is_published: bool = True
+    featured_image: Optional[str] = None
+    read_time: int = 5
+    updated_at: Optional[datetime] = None
 
 class ArticleCreate(BaseModel):
     title: str
@@ -151,6 +302,15 @@ class GalleryPhoto(BaseModel):
     category: str = "general"
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
+class GalleryPhotoSummary(BaseModel):
+    """Gallery grid entry"""
+    id: str
+    title: str
+    image_url: str
+    thumbnail_url: Optional[str] = None
+    category: str = "general"
+    timestamp: datetime
+
 class GalleryPhotoCreate(BaseModel):
     title: str
     image_url: str
@@ -158,7 +318,7 @@ class GalleryPhotoCreate(BaseModel):
     description: Optional[str] = None
     category: str = "general"
 
-# S3 Upload Models
+# Upload Models
 class S3UploadRequest(BaseModel):
     filename: str
     content_type: str
@@ -246,6 +406,1116 @@ class SEOSettingsCreate(BaseModel):
     twitter_image: Optional[str] = None
     social_media: Optional[SocialMediaSettings] = None
 
+# Camera settings normalization
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+_FRACTION_RE = re.compile(r"(\d+(?:\.\d+)?)\s*/\s*(\d+(?:\.\d+)?)")
+# Full-stop ISO boundaries used for the histogram buckets
+ISO_STOPS = [50, 100, 200, 400, 800, 1600, 3200, 6400, 12800, 25600, 51200, 102400]
+
+def _parse_number(value) -> Optional[float]:
+    """Pull the first number out of a free-form value like 'f/2.8' or 'ISO 800'"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER_RE.search(str(value))
+    return float(match.group()) if match else None
+
+def parse_shutter_speed(value) -> Optional[float]:
+    """Convert a shutter speed like '1/160s', '0.5s' or '2"' to seconds"""
+    if isinstance(value, str):
+        fraction = _FRACTION_RE.search(value)
+        if fraction:
+            denominator = float(fraction.group(2))
+            return float(fraction.group(1)) / denominator if denominator else None
+    return _parse_number(value)
+
+def make_lens_id(lens) -> Optional[str]:
+    """Slugify a lens name so the same lens always groups together"""
+    if not lens:
+        return None
+    lens_id = re.sub(r"[^a-z0-9]+", "-", str(lens).lower()).strip("-")
+    return lens_id or None
+
+def normalize_camera_settings(camera_settings: dict) -> dict:
+    """Derive the typed, indexed photo fields from the free-form camera_settings dict"""
+    camera_settings = camera_settings or {}
+    iso = _parse_number(camera_settings.get("iso"))
+    return {
+        "f_number": _parse_number(camera_settings.get("aperture")),
+        "exposure_seconds": parse_shutter_speed(camera_settings.get("shutter_speed")),
+        "iso": int(iso) if iso is not None else None,
+        "focal_length_mm": _parse_number(camera_settings.get("focal_length")),
+        "lens_id": make_lens_id(camera_settings.get("lens")),
+    }
+
+async def backfill_camera_settings(batch_size: int = 500) -> int:
+    """Normalize camera settings on photos written before the typed fields existed"""
+    updated = 0
+    operations = []
+    cursor = db.photos.find({"lens_id": {"$exists": False}}, {"id": 1, "camera_settings": 1})
+    async for photo in cursor:
+        operations.append(UpdateOne(
+            {"_id": photo["_id"]},
+            {"$set": normalize_camera_settings(photo.get("camera_settings"))}
+        ))
+        if len(operations) >= batch_size:
+            result = await db.photos.bulk_write(operations, ordered=False)
+            updated += result.modified_count
+            operations = []
+    if operations:
+        result = await db.photos.bulk_write(operations, ordered=False)
+        updated += result.modified_count
+    return updated
+
+async def run_migration_once(name: str, migrate):
+    """Run a one-off data migration once per database, in whichever worker claims it first"""
+    try:
+        await db.migrations.insert_one({"_id": name, "started_at": datetime.utcnow()})
+    except DuplicateKeyError:
+        return None  # Done already, or another worker is running it
+    try:
+        result = await migrate()
+    except Exception:
+        await db.migrations.delete_one({"_id": name})  # Try again on the next boot
+        raise
+    await db.migrations.update_one({"_id": name}, {"$set": {"finished_at": datetime.utcnow(), "result": result}})
+    return result
+
+# Size-bounded LRU cache of files on local disk
+class DiskLRUCache:
+    """Stores blobs as files under a directory and evicts least recently used ones past max_bytes"""
+
+    def __init__(self, directory: Path, max_bytes: int, suffix: str = ""):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> size, least recently used first
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        
+        # Rebuild the index from disk, oldest access first, so the cache survives restarts
+        existing = sorted(
+            (path for path in self.directory.iterdir() if path.is_file() and path.name.endswith(suffix)),
+            key=lambda path: path.stat().st_mtime
+        )
+        for path in existing:
+            key = path.name[:len(path.name) - len(suffix)] if suffix else path.name
+            size = path.stat().st_size
+            self._entries[key] = size
+            self.total_bytes += size
+        self._evict()
+
+    def path_for(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        path = self.path_for(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+            return data
+        except FileNotFoundError:
+            self.discard(key)
+            return None
+
+    def lookup(self, key: str):
+        """(path, stat) of a cached file without reading it, or None"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+            return path, path.stat()
+        except FileNotFoundError:
+            self.discard(key)
+            return None
+
+    def temp_path_for(self, key: str) -> Path:
+        path = self.path_for(key)
+        return path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+
+    def put(self, key: str, data: bytes) -> None:
+        temp_path = self.temp_path_for(key)
+        temp_path.write_bytes(data)
+        self.put_file(key, temp_path)
+
+    def put_file(self, key: str, temp_path: Path) -> None:
+        """Move a fully written file from temp_path_for into the cache"""
+        size = temp_path.stat().st_size
+        os.replace(temp_path, self.path_for(key))
+        with self._lock:
+            self.total_bytes -= self._entries.pop(key, 0)
+            self._entries[key] = size
+            self.total_bytes += size
+            self._evict()
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self.total_bytes -= self._entries.pop(key, 0)
+        self.path_for(key).unlink(missing_ok=True)
+
+    def _evict(self) -> None:
+        while self.total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            self.path_for(key).unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+# Bounded in-memory LRU cache with per-entry expiry
+class TTLCache:
+    """LRU cache whose entries expire after a TTL; caches misses too when asked to"""
+
+    MISSING = object()
+
+    def __init__(self, max_entries: int, ttl: float, negative_ttl: float = 0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.invalidations = 0
+        self.stale_writes = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value), least recently used first
+        self._generations = {}  # key -> times invalidated
+        self._epoch = 0  # Bumped by clear()
+
+    def get(self, key):
+        """Return the cached value, TTLCache.MISSING for a cached miss, or None if not cached"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        if entry[1] is self.MISSING:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return entry[1]
+
+    def generation(self, key):
+        """Token to take before loading a value; set() refuses it once the key has been invalidated"""
+        return self._epoch, self._generations.get(key, 0)
+
+    def _current(self, key, generation) -> bool:
+        if generation is None or generation == self.generation(key):
+            return True
+        self.stale_writes += 1
+        return False
+
+    def set(self, key, value, generation=None) -> None:
+        if self._current(key, generation):
+            self._store(key, value, self.ttl)
+
+    def set_missing(self, key, generation=None) -> None:
+        if self.negative_ttl > 0 and self._current(key, generation):
+            self._store(key, self.MISSING, self.negative_ttl)
+
+    def _store(self, key, value, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, *keys) -> None:
+        if len(self._generations) > 4 * self.max_entries:
+            # A new epoch refuses every older token, so the per-key counters can start over
+            self._generations.clear()
+            self._epoch += 1
+        for key in keys:
+            # Bumped even when nothing is cached: a load may be in flight
+            self._generations[key] = self._generations.get(key, 0) + 1
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+        self._generations.clear()
+        self._epoch += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "stale_writes": self.stale_writes,
+            "hit_rate": round((self.hits + self.negative_hits) / lookups, 4) if lookups else 0.0
+        }
+
+# Published articles keyed by "slug:<slug>" and "id:<id>"; each worker keeps its own copy,
+# so the TTL bounds how long another worker can serve an edited article
+article_cache = TTLCache(ARTICLE_CACHE_SIZE, ARTICLE_CACHE_TTL, negative_ttl=ARTICLE_NEGATIVE_CACHE_TTL)
+
+def cache_article(article: "Article", lookup_key: str, generation) -> None:
+    """Cache under slug and id, unless the article was invalidated after its load began"""
+    if article.is_published and article_cache.generation(lookup_key) == generation:
+        article_cache.set(f"slug:{article.slug}", article)
+        article_cache.set(f"id:{article.id}", article)
+
+def invalidate_article(article_id: str, *slugs) -> None:
+    article_cache.invalidate(f"id:{article_id}", *(f"slug:{slug}" for slug in slugs if slug))
+    if fallback_store is not None:
+        fallback_store.discard(fallback_key(("article", article_id)), *(fallback_key(("article_slug", slug)) for slug in slugs if slug))
+
+# Request coalescing for identical concurrent reads
+class SingleFlight:
+    """Runs one call per key at a time and hands its result to every concurrent caller"""
+
+    def __init__(self):
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self._in_flight = {}
+
+    async def do(self, key, fn):
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shield so one disconnecting client doesn't cancel the shared call for everyone else
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight)
+        }
+
+read_flight = SingleFlight()
+
+@lru_cache(maxsize=None)
+def response_adapter(response_model) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+def serialize_json(data, response_model=None) -> bytes:
+    """Encode a response body the same way FastAPI does, validating and filtering through response_model if given"""
+    if response_model is not None:
+        adapter = response_adapter(response_model)
+        return adapter.dump_json(adapter.validate_python(data))
+    return json.dumps(
+        jsonable_encoder(data), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+# Sparse fieldsets: fields= becomes a Mongo projection, so unused fields are never read or validated
+def projection_for(names) -> dict:
+    return {"_id": 0, **{name: 1 for name in names}}
+
+def parse_fields(model, fields: Optional[str], summary_model=None):
+    """Projection and row model for fields=: everything, 'summary', or a comma-separated list of names"""
+    if not fields:
+        return None, model
+    if fields == "summary" and summary_model is not None:
+        return projection_for(summary_model.model_fields), summary_model
+    names = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = sorted(names - set(model.model_fields))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    names = tuple(sorted(names | {"id"}))
+    return projection_for(names), partial_model(model, names)
+
+@lru_cache(maxsize=256)
+def partial_model(model, names: tuple):
+    """Row model for an explicit field list: the named fields of model, each optional"""
+    return create_model(
+        f"{model.__name__}Fields",
+        **{name: (Optional[model.model_fields[name].annotation], None) for name in names}
+    )
+
+def to_rows(documents, row_model) -> list:
+    return [row_model(**document) for document in documents]
+
+fallback_store = FallbackStore(FALLBACK_DB, FALLBACK_MAX_ENTRIES) if FALLBACK_DB else None
+
+def fallback_key(key) -> str:
+    return repr(key)
+
+def fallback_page(skip: int, limit: int, fields: Optional[str]) -> bool:
+    """Whether a list page is canonical enough to keep in the fallback store"""
+    return 0 <= skip <= FALLBACK_MAX_SKIP and 0 < limit <= 100 and fields in (None, "summary")
+
+async def coalesced_body(key, loader, fallback: bool = True, response_model=None):
+    """Share one database call and one serialized body among identical in-flight reads.
+
+    Returns (body, stale_age): stale_age is None for a live body, or the age in seconds
+    of the stored body served because the database failed or missed its deadline.
+    Reads shaped by free-form input pass fallback=False so they never grow the store.
+    Routes pass their response_model so the shared body keeps the route's response contract.
+    """
+    async def load_and_serialize():
+        with tracer.span("load"):
+            data = await loader()
+        with tracer.span("serialize") as span:
+            body = serialize_json(data, response_model)
+            if span:
+                span.attributes["bytes"] = len(body)
+        # An empty list is never worth serving stale, and skipping it keeps junk filters out
+        if fallback and body != b"[]" and fallback_store.confirm(fallback_key(key), body):
+            await run_in_threadpool(fallback_store.save, fallback_key(key), body)
+        return body
+    
+    fallback = fallback and fallback_store is not None
+    live = asyncio.ensure_future(read_flight.do(key, load_and_serialize))
+    if not fallback:
+        return await live, None
+    try:
+        return await asyncio.wait_for(asyncio.shield(live), FALLBACK_AFTER_SECONDS), None
+    except asyncio.TimeoutError:
+        stale = await run_in_threadpool(fallback_store.get, fallback_key(key))
+        if stale is None:
+            return await live, None
+        # The live read keeps going and refreshes the store when it completes
+        live.add_done_callback(lambda task: task.cancelled() or task.exception())
+        logger.warning(f"Serving stored {key[0]} read: database slower than {FALLBACK_AFTER_SECONDS}s")
+        return stale
+    except PyMongoError as e:
+        stale = await run_in_threadpool(fallback_store.get, fallback_key(key))
+        if stale is None:
+            raise
+        logger.warning(f"Serving stored {key[0]} read: {type(e).__name__}: {str(e)}")
+        return stale
+
+def stale_headers(stale_age) -> dict:
+    if stale_age is None:
+        return {}
+    return {"Warning": '110 - "Response is Stale"', "X-Fallback-Age": str(int(stale_age))}
+
+async def coalesced_response(key, loader, fallback: bool = True, response_model=None) -> Response:
+    body, stale_age = await coalesced_body(key, loader, fallback, response_model)
+    return Response(content=body, media_type="application/json", headers=stale_headers(stale_age))
+
+# Sitemap and Atom feed, kept as per-entry XML fragments
+def _w3c_datetime(value: datetime) -> str:
+    return value.replace(tzinfo=None, microsecond=0).isoformat() + "Z"
+
+class SyndicationIndex:
+    """Pre-rendered sitemap/feed fragments that writes patch one entry at a time"""
+
+    STATIC_PAGES = ["/", "/blog", "/photos", "/tweaker"]
+    ARTICLE_FIELDS = {"id": 1, "title": 1, "slug": 1, "excerpt": 1, "author": 1, "tags": 1,
+                      "publish_date": 1, "updated_at": 1, "is_published": 1, "featured_image": 1}
+    GALLERY_FIELDS = {"id": 1, "title": 1, "image_url": 1, "description": 1, "timestamp": 1}
+
+    def __init__(self, max_age: float = SYNDICATION_MAX_AGE):
+        self.articles = {}  # id -> (publish_date, lastmod, sitemap fragment, feed fragment)
+        self.gallery = {}  # id -> (timestamp, image fragment), newest SITEMAP_IMAGE_LIMIT only
+        self.last_modified = datetime.utcnow()
+        self.max_age = max_age
+        self._gallery_complete = True  # False once an evicted photo may need to be backfilled
+        self._loaded = False
+        self._loaded_at = 0.0
+        self._content_digest = None
+        self._lock = asyncio.Lock()
+
+    def _expired(self) -> bool:
+        return time.monotonic() - self._loaded_at > self.max_age
+
+    async def ensure_loaded(self) -> None:
+        if self._loaded and self._gallery_complete and not self._expired():
+            return
+        async with self._lock:
+            if not self._loaded or self._expired():
+                await self._rebuild()
+            elif not self._gallery_complete:
+                self.gallery = await self._load_gallery()
+                self._gallery_complete = True
+
+    async def _load_gallery(self) -> dict:
+        gallery = {}
+        cursor = db.gallery.find({}, self.GALLERY_FIELDS).sort("timestamp", -1).limit(SITEMAP_IMAGE_LIMIT)
+        async for photo in cursor:
+            gallery[photo["id"]] = self._gallery_entry(photo)
+        return gallery
+
+    async def _rebuild(self) -> None:
+        """Reload every entry into fresh dicts and swap them in, so streaming responses keep a stable view"""
+        articles = {}
+        async for article in db.articles.find({"is_published": True}, self.ARTICLE_FIELDS):
+            articles[article["id"]] = self._article_entry(article)
+        gallery = await self._load_gallery()
+        
+        digest = hashlib.sha1()
+        for fragment in sorted([entry[3] for entry in articles.values()] + [entry[1] for entry in gallery.values()]):
+            digest.update(fragment.encode())
+        content_digest = digest.hexdigest()
+        if self._content_digest is None:
+            newest = [entry[1] for entry in articles.values()] + [entry[0] for entry in gallery.values()]
+            self.last_modified = max(newest, default=datetime.utcnow())
+        elif content_digest != self._content_digest:
+            # Changed by another worker (or a deletion this one saw) since the last rebuild
+            self._touch()
+        
+        self.articles, self.gallery = articles, gallery
+        self._content_digest = content_digest
+        self._gallery_complete = True
+        self._loaded = True
+        self._loaded_at = time.monotonic()
+
+    def _touch(self) -> None:
+        self.last_modified = datetime.utcnow()
+
+    def _article_entry(self, article: dict) -> tuple:
+        publish_date = article.get("publish_date") or datetime.utcnow()
+        lastmod = article.get("updated_at") or publish_date
+        url = f"{SITE_URL}/blog/{article['slug']}"
+        sitemap_fragment = (
+            f"<url><loc>{escape(url)}</loc><lastmod>{_w3c_datetime(lastmod)}</lastmod>"
+            f"<changefreq>monthly</changefreq></url>"
+        )
+        categories = "".join(f"<category term={quoteattr(tag)}/>" for tag in article.get("tags") or [])
+        feed_fragment = (
+            f"<entry><id>{escape(url)}</id><title>{escape(article.get('title', ''))}</title>"
+            f"<link href={quoteattr(url)}/><published>{_w3c_datetime(publish_date)}</published>"
+            f"<updated>{_w3c_datetime(lastmod)}</updated>"
+            f"<author><name>{escape(article.get('author') or 'Viet')}</name></author>"
+            f"<summary>{escape(article.get('excerpt', ''))}</summary>{categories}</entry>"
+        )
+        return publish_date, lastmod, sitemap_fragment, feed_fragment
+
+    def _gallery_entry(self, photo: dict) -> tuple:
+        caption = photo.get("description") or photo.get("title", "")
+        fragment = (
+            f"<image:image><image:loc>{escape(photo['image_url'])}</image:loc>"
+            f"<image:title>{escape(photo.get('title', ''))}</image:title>"
+            f"<image:caption>{escape(caption)}</image:caption></image:image>"
+        )
+        return photo.get("timestamp") or datetime.utcnow(), fragment
+
+    def article_changed(self, article: dict) -> None:
+        if not self._loaded:
+            return
+        if article.get("is_published", True):
+            self.articles[article["id"]] = self._article_entry(article)
+        else:
+            self.articles.pop(article["id"], None)
+        self._touch()
+
+    def article_removed(self, article_id: str) -> None:
+        if self._loaded and self.articles.pop(article_id, None) is not None:
+            self._touch()
+
+    def gallery_changed(self, photo: dict) -> None:
+        if not self._loaded:
+            return
+        self.gallery[photo["id"]] = self._gallery_entry(photo)
+        if len(self.gallery) > SITEMAP_IMAGE_LIMIT:
+            oldest = min(self.gallery, key=lambda photo_id: self.gallery[photo_id][0])
+            del self.gallery[oldest]
+        self._touch()
+
+    def gallery_removed(self, photo_id: str) -> None:
+        if self._loaded and self.gallery.pop(photo_id, None) is not None:
+            # An older photo may now fall inside the window; refill on the next read
+            self._gallery_complete = self._gallery_complete and len(self.gallery) < SITEMAP_IMAGE_LIMIT - 1
+            self._touch()
+
+    def reset(self) -> None:
+        self.articles, self.gallery = {}, {}
+        self._loaded = False
+        self._touch()
+
+    def etag(self, extra: str = "") -> str:
+        """Weak validator over the index state plus anything else rendered into the response"""
+        validator = f"{self.last_modified.isoformat()}|{len(self.articles)}|{len(self.gallery)}|{extra}"
+        return f'W/"{hashlib.sha1(validator.encode()).hexdigest()[:16]}"'
+
+    def sitemap_chunks(self):
+        pages = [f"<url><loc>{escape(SITE_URL + path)}</loc></url>" for path in self.STATIC_PAGES if path != "/photos"]
+        images = [fragment for _, fragment in sorted(self.gallery.values(), key=lambda entry: entry[0], reverse=True)]
+        articles = [entry[2] for entry in self.articles.values()]
+        
+        yield ('<?xml version="1.0" encoding="UTF-8"?>\n'
+               '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" '
+               'xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">\n')
+        yield "\n".join(pages) + "\n"
+        yield f"<url><loc>{escape(SITE_URL + '/photos')}</loc><lastmod>{_w3c_datetime(self.last_modified)}</lastmod>"
+        for start in range(0, len(images), 200):
+            yield "".join(images[start:start + 200])
+        yield "</url>\n"
+        for start in range(0, len(articles), 500):
+            yield "\n".join(articles[start:start + 500]) + "\n"
+        yield "</urlset>\n"
+
+    def feed_chunks(self, title: str):
+        latest = sorted(self.articles.values(), key=lambda entry: entry[0], reverse=True)[:FEED_ARTICLE_LIMIT]
+        yield ('<?xml version="1.0" encoding="UTF-8"?>\n<feed xmlns="http://www.w3.org/2005/Atom">'
+               f"<title>{escape(title)}</title><id>{escape(SITE_URL + '/blog')}</id>"
+               f"<link href={quoteattr(SITE_URL + '/blog')}/><link rel=\"self\" href={quoteattr(SITE_URL + '/feed.xml')}/>"
+               f"<updated>{_w3c_datetime(self.last_modified)}</updated>\n")
+        for entry in latest:
+            yield entry[3] + "\n"
+        yield "</feed>\n"
+
+syndication_index = SyndicationIndex()
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+
+def not_modified(request: Request, last_modified: datetime, etag: str) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since against the current validators"""
+    if request.headers.get("if-none-match") is not None:
+        return etag_matches(request, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).astimezone(timezone.utc).replace(tzinfo=None)
+        except (TypeError, ValueError):
+            return False
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+async def syndication_response(request: Request, chunks, media_type: str, validator: str = ""):
+    index = syndication_index
+    etag = index.etag(validator)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(index.last_modified.replace(tzinfo=timezone.utc), usegmt=True),
+        "Cache-Control": "public, max-age=300"
+    }
+    if not_modified(request, index.last_modified, etag):
+        return Response(status_code=304, headers=headers)
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
+render_cache = DiskLRUCache(RENDER_CACHE_DIR, RENDER_CACHE_MAX_MB * 1024 * 1024, suffix=".jpg")
+image_cache = DiskLRUCache(IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_MB * 1024 * 1024, suffix=".img")
+
+def render_cache_key(image: str, max_dimension: int, settings: dict) -> str:
+    settings_hash = recipe_renderer.recipe_hash(settings)
+    return hashlib.sha256(f"{image}|{max_dimension}|{settings_hash}".encode()).hexdigest()
+
+def fetch_source_image(url: str) -> bytes:
+    """Download a source image for rendering from our storage or an allowed host, capped in size"""
+    max_bytes = RENDER_MAX_SOURCE_MB * 1024 * 1024
+    key = stored_key_for_url(url)
+    if key is not None:
+        try:
+            source = storage.get(key)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Image not found in storage")
+        if len(source) > max_bytes:
+            raise HTTPException(status_code=413, detail="Source image too large")
+        return source
+    
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or parsed.hostname not in RENDER_ALLOWED_HOSTS:
+        raise HTTPException(status_code=400, detail="Image host not allowed")
+    
+    with open_allowed_url(url, RENDER_ALLOWED_HOSTS) as response:
+        if response.status_code != 200:
+            raise HTTPException(status_code=502, detail=f"Failed to fetch image: HTTP {response.status_code}")
+        chunks = []
+        received = 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            received += len(chunk)
+            if received > max_bytes:
+                raise HTTPException(status_code=413, detail="Source image too large")
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+# Dashboard metrics: one shared sampler pushes deltas to every connected viewer
+def dict_delta(previous: dict, current: dict) -> dict:
+    """Leaves of current that differ from previous, keeping the nesting"""
+    delta = {}
+    for key, value in current.items():
+        old = previous.get(key) if isinstance(previous, dict) else None
+        if isinstance(value, dict):
+            nested = dict_delta(old if isinstance(old, dict) else {}, value)
+            if nested:
+                delta[key] = nested
+        elif old != value:
+            delta[key] = value
+    return delta
+
+def sse_event(event: str, data) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + serialize_json(data) + b"\n\n"
+
+class MetricsSampler:
+    """Samples dashboard metrics on a fixed cadence while anyone is watching"""
+    
+    def __init__(self, interval: float, db_interval: float):
+        self.interval = interval
+        self.db_interval = db_interval
+        self.latest = None
+        self.sampled_at = 0.0
+        self.subscribers = set()
+        self._db_stats = None
+        self._db_sampled_at = 0.0
+        self._lock = asyncio.Lock()
+        self._task = None
+    
+    @staticmethod
+    def _usage() -> dict:
+        # Non-blocking: CPU percent since the previous sample instead of a fresh one-second measurement
+        memory = psutil.virtual_memory()
+        return {
+            "cpu_percent": psutil.cpu_percent(interval=None),
+            "memory_percent": memory.percent,
+            "memory_used_mb": round(memory.used / (1024 * 1024), 2),
+            "active_connections": len(psutil.net_connections())
+        }
+    
+    async def _sample(self) -> dict:
+        usage_stats = await run_in_threadpool(self._usage)
+        
+        # Collection counts move slowly; refresh them on their own, longer cadence
+        if self._db_stats is None or time.monotonic() - self._db_sampled_at >= self.db_interval:
+            counts = await asyncio.gather(
+                db.photos.count_documents({}),
+                db.articles.count_documents({}),
+                db.comments.count_documents({}),
+                db.gallery.count_documents({})
+            )
+            self._db_stats = dict(zip(("photos", "articles", "comments", "gallery"), counts))
+            self._db_sampled_at = time.monotonic()
+        
+        return {
+            "timestamp": datetime.utcnow().isoformat(),
+            "usage": usage_stats,
+            "database": dict(self._db_stats),
+            "cost_estimate": {
+                "cpu_cost": round(usage_stats["cpu_percent"] * 0.01, 2),
+                "memory_cost": round(usage_stats["memory_used_mb"] * 0.001, 2),
+                "estimated_total": round(usage_stats["cpu_percent"] * 0.01 + usage_stats["memory_used_mb"] * 0.001, 2)
+            },
+            "alerts": {
+                "high_cpu": usage_stats["cpu_percent"] > 80,
+                "high_memory": usage_stats["memory_percent"] > 80,
+                "high_connections": usage_stats["active_connections"] > 100
+            }
+        }
+    
+    async def current(self, max_age: float = None) -> dict:
+        """Latest sample, taking a new one if it is older than max_age (default: the interval)"""
+        max_age = self.interval if max_age is None else max_age
+        async with self._lock:
+            if self.latest is None or time.monotonic() - self.sampled_at >= max_age:
+                self.latest = await self._sample()
+                self.sampled_at = time.monotonic()
+            return self.latest
+    
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=8)
+        self.subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+        return queue
+    
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self.subscribers.discard(queue)
+    
+    def _broadcast(self, message: bytes) -> None:
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Too far behind: end that stream so the browser reconnects and resyncs from a snapshot
+                self.subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+    
+    async def _run(self) -> None:
+        previous = None
+        while self.subscribers:
+            await asyncio.sleep(self.interval)
+            if not self.subscribers:
+                break
+            # Viewers start from the snapshot they were sent, so the first delta is against that
+            previous = previous or self.latest
+            try:
+                sample = await self.current(max_age=self.interval / 2)
+            except Exception as e:
+                logger.warning(f"Metrics sample failed: {str(e)}")
+                continue
+            delta = dict_delta(previous, sample) if previous else sample
+            previous = sample
+            # Serialized once, however many viewers are connected
+            self._broadcast(sse_event("delta", delta))
+
+metrics_sampler = MetricsSampler(METRICS_STREAM_INTERVAL, METRICS_DB_INTERVAL)
+
+# Live comments: one broadcast channel per photo, shared by everyone viewing it
+class CommentChannel:
+    """Recent events for one photo and a single future that all of its subscribers wait on"""
+
+    __slots__ = ("events", "seq", "waiter", "subscribers")
+
+    def __init__(self, backlog: int):
+        self.events = deque(maxlen=backlog)  # (seq, comment id, encoded SSE event)
+        self.seq = 0
+        self.waiter = asyncio.get_running_loop().create_future()
+        self.subscribers = 0
+
+    def wake(self) -> None:
+        waiter, self.waiter = self.waiter, asyncio.get_running_loop().create_future()
+        waiter.set_result(None)
+
+def comment_event_id(comment: dict) -> int:
+    """SSE id for a comment: its timestamp in epoch milliseconds, the same on every worker"""
+    return int(comment["timestamp"].replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+class CommentHub:
+    """Pushes new comments to SSE subscribers without a database query per viewer"""
+
+    def __init__(self, backlog: int = 50, heartbeat: float = 25.0):
+        self.backlog = backlog
+        self.heartbeat = heartbeat
+        self.channels = {}
+        self.published = 0
+        self._tick = None
+        self._ticker = None
+        self._watcher = None
+
+    def publish(self, comment: dict) -> None:
+        self.published += 1
+        channel = self.channels.get(comment["photo_id"])
+        if channel is None:
+            return  # Nobody is watching this photo
+        channel.seq += 1
+        channel.events.append((channel.seq, comment["id"], self._encode(comment)))
+        channel.wake()
+
+    @staticmethod
+    def _encode(comment: dict) -> bytes:
+        return f"id: {comment_event_id(comment)}\n".encode() + sse_event("comment", comment)
+
+    async def _heartbeat(self) -> None:
+        """One timer for every connection: keepalive comments stop proxies from closing idle streams"""
+        while self.channels:
+            await asyncio.sleep(self.heartbeat)
+            tick, self._tick = self._tick, asyncio.get_running_loop().create_future()
+            tick.set_result(None)
+
+    async def stream(self, photo_id: str, collection=None, since: Optional[datetime] = None):
+        # A subscriber is only a cursor plus a wait on the channel's shared future,
+        # so an idle connection costs one suspended generator
+        channel = self.channels.get(photo_id)
+        if channel is None:
+            channel = self.channels[photo_id] = CommentChannel(self.backlog)
+        channel.subscribers += 1
+        if self._ticker is None or self._ticker.done():
+            self._tick = asyncio.get_running_loop().create_future()
+            self._ticker = asyncio.ensure_future(self._heartbeat())
+        cursor = channel.seq
+        replayed = set()
+        try:
+            yield b"retry: 5000\n\n"
+            if since is not None and collection is not None:
+                # A reconnecting client gets what it missed from the database, whichever worker it was on;
+                # comments published meanwhile wait in the channel and are sent once
+                query = {"photo_id": photo_id, "timestamp": {"$gte": since}}
+                async for comment in collection.find(query, {"_id": 0}).sort("timestamp", 1).limit(self.backlog):
+                    replayed.add(comment["id"])
+                    yield self._encode(comment)
+            while True:
+                if channel.seq > cursor:
+                    pending = [event for seq, comment_id, event in channel.events
+                               if seq > cursor and comment_id not in replayed]
+                    cursor = channel.seq
+                    for event in pending:
+                        yield event
+                    continue
+                waiter = channel.waiter
+                await asyncio.wait((waiter, self._tick), return_when=asyncio.FIRST_COMPLETED)
+                if not waiter.done():
+                    yield b": ping\n\n"
+        finally:
+            channel.subscribers -= 1
+            if channel.subscribers == 0 and self.channels.get(photo_id) is channel:
+                del self.channels[photo_id]
+
+    async def _watch(self, collection) -> None:
+        resume_token = None
+        while True:
+            try:
+                pipeline = [{"$match": {"operationType": "insert"}}]
+                async with collection.watch(pipeline, resume_after=resume_token) as changes:
+                    async for change in changes:
+                        resume_token = changes.resume_token
+                        comment = change["fullDocument"]
+                        comment.pop("_id", None)
+                        self.publish(comment)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Comment change stream interrupted: {str(e)}")
+                await asyncio.sleep(5)
+
+    def watch(self, collection) -> None:
+        """Publish comments inserted by any worker, read from a MongoDB change stream"""
+        self._watcher = asyncio.ensure_future(self._watch(collection))
+
+    async def stop(self) -> None:
+        for task in (self._watcher, self._ticker):
+            if task:
+                task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "fanout": COMMENT_FANOUT,
+            "photos_watched": len(self.channels),
+            "subscribers": sum(channel.subscribers for channel in self.channels.values()),
+            "published": self.published,
+        }
+
+comment_hub = CommentHub(COMMENT_STREAM_BACKLOG, COMMENT_STREAM_HEARTBEAT)
+
+# Background jobs: cleanup after deletes, thumbnails, EXIF parsing and recipe pre-rendering
+def stored_key_for_url(url: Optional[str]) -> Optional[str]:
+    """Storage key for a URL that points at our uploads, or None for external images"""
+    return storage.key_for_url(url) if storage else None
+
+def enqueue_photo_cleanup(photo_id: str, *urls):
+    """Queue removal of a deleted photo's comments and its objects in our bucket"""
+    s3_keys = sorted({key for key in (stored_key_for_url(url) for url in urls) if key})
+    return job_queue.enqueue(
+        "photo_cleanup", {"photo_id": photo_id, "s3_keys": s3_keys}, idempotency_key=f"photo_cleanup:{photo_id}"
+    )
+
+async def photo_cleanup_job(jobs):
+    """Batch handler: one delete_many for all photos' comments, then one storage delete for all their objects"""
+    photo_ids = [job["payload"]["photo_id"] for job in jobs]
+    s3_keys = sorted({key for job in jobs for key in job["payload"].get("s3_keys", [])})
+    
+    comments_deleted = 0
+    for start in range(0, len(photo_ids), 1000):
+        result = await db.comments.delete_many({"photo_id": {"$in": photo_ids[start:start + 1000]}})
+        comments_deleted += result.deleted_count
+    
+    if s3_keys and not storage:
+        raise RuntimeError(f"Storage not configured; cannot delete {len(s3_keys)} objects")
+    kept = 0
+    if s3_keys:
+        # Another photo, article or setting may still point at the same object
+        referenced = await still_referenced_keys(s3_keys)
+        unreferenced = [key for key in s3_keys if key_digest(key) not in referenced]
+        kept = len(s3_keys) - len(unreferenced)
+        s3_keys = unreferenced
+    failed_keys = await run_in_threadpool(storage.delete, s3_keys) if s3_keys else []
+    if failed_keys:
+        # Deletes are idempotent, so retrying the whole batch is safe
+        raise RuntimeError(f"Storage could not delete {len(failed_keys)} objects, e.g. {failed_keys[0]}")
+    
+    logger.info(
+        f"Cleanup batch: {comments_deleted} comments for {len(photo_ids)} photos, "
+        f"{len(s3_keys)} stored objects deleted, {kept} still referenced"
+    )
+    return {"comments_deleted": comments_deleted, "objects_deleted": len(s3_keys), "objects_kept": kept}
+
+async def gallery_thumbnail_job(job):
+    """Create a thumbnail for a gallery photo uploaded to our bucket"""
+    photo = await db.gallery.find_one({"id": job["payload"]["photo_id"]})
+    key = stored_key_for_url(photo.get("image_url")) if photo else None
+    if key is None or photo.get("thumbnail_url"):
+        return {"skipped": True}
+    
+    source = await run_in_threadpool(storage.get, key)
+    thumbnail = await job_queue.run_in_process(media.make_thumbnail, source, THUMBNAIL_MAX_SIZE)
+    thumbnail_key = f"thumbnails/{key.rsplit('.', 1)[0]}.jpg"
+    await run_in_threadpool(storage.put, thumbnail_key, thumbnail, "image/jpeg", IMMUTABLE)
+    await db.gallery.update_one(
+        {"id": photo["id"], "thumbnail_url": None}, {"$set": {"thumbnail_url": storage.url(thumbnail_key)}}
+    )
+    if snapshot_exporter:
+        snapshot_exporter.schedule("gallery")
+    return {"thumbnail_key": thumbnail_key, "bytes": len(thumbnail)}
+
+async def photo_exif_job(job):
+    """Fill in a photo's missing camera settings from the EXIF data of its uploaded original"""
+    photo = await db.photos.find_one({"id": job["payload"]["photo_id"]})
+    key = stored_key_for_url(photo.get("image_url")) if photo else None
+    if key is None:
+        return {"skipped": True}
+    
+    source = await run_in_threadpool(storage.get, key)
+    exif_settings = await job_queue.run_in_process(media.extract_camera_settings, source)
+    camera_settings = {**exif_settings, **{k: v for k, v in (photo.get("camera_settings") or {}).items() if v}}
+    await db.photos.update_one(
+        {"id": photo["id"]},
+        {"$set": {"camera_settings": camera_settings, **normalize_camera_settings(camera_settings)}}
+    )
+    if snapshot_exporter:
+        snapshot_exporter.schedule("photos")
+    return {"camera_settings": camera_settings}
+
+async def recipe_render_job(job):
+    """Render a recipe preview into the render cache ahead of the first request"""
+    payload = job["payload"]
+    recipe = await db.recipes.find_one({"id": payload["recipe_id"]})
+    if recipe is None:
+        return {"skipped": True}
+    settings = recipe.get("settings", {})
+    cache_key = render_cache_key(payload["image"], payload["max_dimension"], settings)
+    if await run_in_threadpool(render_cache.get, cache_key) is not None:
+        return {"cache_key": cache_key, "cached": True}
+    
+    source = await run_in_threadpool(fetch_source_image, payload["image"])
+    rendered = await job_queue.run_in_process(recipe_renderer.render_bytes, source, settings, payload["max_dimension"])
+    await run_in_threadpool(render_cache.put, cache_key, rendered)
+    return {"cache_key": cache_key, "bytes": len(rendered)}
+
+def key_digest(key: str) -> bytes:
+    # 8-byte digests keep the reference set small; a collision can only spare an orphan, never delete a live object
+    return hashlib.blake2b(key.encode(), digest_size=8).digest()
+
+# Document fields that hold URLs into our storage; avatar_urls is a list
+STORAGE_URL_FIELDS = {
+    "photos": ("image_url",),
+    "gallery": ("image_url", "thumbnail_url"),
+    "articles": ("featured_image",),
+    "portfolio_settings": ("avatar_urls",),
+    "seo_settings": ("og_image", "og_url", "twitter_image"),
+}
+CONTENT_URL_RE = re.compile(r"https?://[^\s\"'<>)]+")
+
+async def scan_storage_references(urls: Optional[list] = None) -> set:
+    """Digests of the storage keys documents point at; with urls, only documents mentioning one are read"""
+    referenced = set()
+    for collection, fields in STORAGE_URL_FIELDS.items():
+        projection = {"_id": 0, **{field: 1 for field in fields}}
+        query = {}
+        if urls is not None:
+            query = {"$or": [{field: {"$in": urls}} for field in fields]}
+        if collection == "articles":
+            # Images pasted into the article body count as references too
+            projection["content"] = 1
+            if urls is not None:
+                query["$or"].append({"content": {"$regex": "|".join(re.escape(url) for url in urls)}})
+        
+        async for document in db[collection].find(query, projection):
+            values = []
+            for field in fields:
+                value = document.get(field)
+                values.extend(value if isinstance(value, list) else [value])
+            values.extend(CONTENT_URL_RE.findall(document.get("content") or ""))
+            for url in values:
+                key = stored_key_for_url(url)
+                if key:
+                    referenced.add(key_digest(key))
+    return referenced
+
+async def referenced_storage_keys() -> set:
+    """Digests of every storage key the database points at"""
+    return await scan_storage_references()
+
+async def still_referenced_keys(keys) -> set:
+    """Digests of those keys some document still points at, found with targeted queries instead of a full scan"""
+    if not keys:
+        return set()
+    return await scan_storage_references(sorted({url for key in keys for url in storage.url_variants(key)}))
+
+async def s3_orphan_gc_job(job):
+    """Find objects under the GC prefixes that nothing references and, unless dry_run, delete them"""
+    if not storage:
+        raise RuntimeError("Storage not configured")
+    dry_run = job["payload"].get("dry_run", True)
+    grace_hours = job["payload"].get("grace_hours", S3_GC_GRACE_HOURS)
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=grace_hours)
+    
+    referenced = await referenced_storage_keys()
+    scanned = scanned_bytes = recent = 0
+    candidates = []
+    for prefix in S3_GC_PREFIXES:
+        pages = storage.list(prefix)
+        # Each page is a blocking listing call, so fetch them off the event loop one at a time
+        while True:
+            page = await run_in_threadpool(next, pages, None)
+            if page is None:
+                break
+            for item in page:
+                scanned += 1
+                scanned_bytes += item.size
+                if key_digest(item.key) in referenced:
+                    continue
+                if item.last_modified > cutoff:
+                    recent += 1  # Possibly an upload whose form has not been saved yet
+                    continue
+                candidates.append((item.key, item.size))
+    
+    # References added while the bucket was being listed must not lose their object
+    if candidates:
+        referenced = await referenced_storage_keys()
+        candidates = [(key, size) for key, size in candidates if key_digest(key) not in referenced]
+    
+    report = {
+        "dry_run": dry_run,
+        "prefixes": S3_GC_PREFIXES,
+        "grace_hours": grace_hours,
+        "scanned": scanned,
+        "scanned_bytes": scanned_bytes,
+        "referenced": len(referenced),
+        "within_grace": recent,
+        "orphans": len(candidates),
+        "orphan_bytes": sum(size for _, size in candidates),
+        "orphan_keys": [key for key, _ in candidates[:S3_GC_REPORT_KEYS]],
+        "deleted": 0,
+    }
+    if not dry_run and candidates:
+        keys = [key for key, _ in candidates]
+        failed_keys = await run_in_threadpool(storage.delete, keys)
+        report["deleted"] = len(keys) - len(failed_keys)
+        report["failed_keys"] = failed_keys[:S3_GC_REPORT_KEYS]
+    logger.info(
+        f"Storage orphan GC{' (dry run)' if dry_run else ''}: {scanned} scanned, {report['orphans']} orphans "
+        f"({report['orphan_bytes'] / (1024 * 1024):.1f} MB), {report['deleted']} deleted"
+    )
+    return report
+
+job_queue = JobQueue(
+    db.jobs,
+    lease_seconds=JOB_LEASE_SECONDS,
+    poll_interval=JOB_POLL_INTERVAL,
+    process_workers=JOB_PROCESS_WORKERS,
+    retention_days=JOB_RETENTION_DAYS
+)
+job_queue.register("photo_cleanup", photo_cleanup_job, concurrency=1, batch_size=500, batch_wait=2.0)
+job_queue.register("gallery_thumbnail", gallery_thumbnail_job, concurrency=2)
+job_queue.register("photo_exif", photo_exif_job, concurrency=2)
+job_queue.register("recipe_render", recipe_render_job, concurrency=JOB_PROCESS_WORKERS)
+job_queue.register("s3_orphan_gc", s3_orphan_gc_job, concurrency=1, max_attempts=3, backoff_seconds=60.0)
+
 # Health check endpoint for Railway
 @app.get("/health")
 async def health_check():
@@ -254,6 +1524,9 @@ async def health_check():
         await db.command('ping')
         return {"status": "healthy", "database": "connected"}
     except Exception as e:
+        if fallback_store is not None and len(fallback_store):
+            # Public reads are still answered from the fallback store; restarting would not help
+            return {"status": "degraded", "database": f"unreachable: {str(e)}", "fallback_entries": len(fallback_store)}
         raise HTTPException(status_code=503, detail=f"Database connection failed: {str(e)}")
 
 # Monitoring endpoints
@@ -306,39 +1579,81 @@ async def detailed_health_check():
 @api_router.get("/monitoring/dashboard")
 async def monitoring_dashboard():
     """Simple monitoring dashboard data"""
+    return await metrics_sampler.current()
+
+@api_router.get("/monitoring/stream")
+async def monitoring_stream():
+    """Server-Sent Events: a full snapshot, then metric deltas every METRICS_STREAM_INTERVAL seconds"""
+    queue = metrics_sampler.subscribe()
     
-    # Get current usage
-    usage_stats = {
-        "cpu_percent": psutil.cpu_percent(interval=1),
-        "memory_percent": psutil.virtual_memory().percent,
-        "memory_used_mb": round(psutil.virtual_memory().used / (1024 * 1024), 2),
-        "active_connections": len(psutil.net_connections())
-    }
-    
-    # Get database stats
-    db_stats = {
-        "photos": await db.photos.count_documents({}),
-        "articles": await db.articles.count_documents({}),
-        "comments": await db.comments.count_documents({}),
-        "gallery": await db.gallery.count_documents({})
-    }
+    async def events():
+        try:
+            yield b"retry: 5000\n" + sse_event("snapshot", await metrics_sampler.current())
+            while True:
+                message = await queue.get()
+                if message is None:
+                    break
+                yield message
+        finally:
+            metrics_sampler.unsubscribe(queue)
     
-    # Estimate monthly cost (rough calculation)
-    estimated_monthly_cost = {
-        "cpu_cost": round(usage_stats["cpu_percent"] * 0.01, 2),  # Rough estimate
-        "memory_cost": round(usage_stats["memory_used_mb"] * 0.001, 2),  # Rough estimate
-        "estimated_total": round(usage_stats["cpu_percent"] * 0.01 + usage_stats["memory_used_mb"] * 0.001, 2)
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.get("/jobs")
+async def job_stats():
+    """Background job counts by type and status"""
+    return await job_queue.stats()
+
+@api_router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@api_router.get("/monitoring/cache")
+async def cache_stats():
+    """Hit/miss counters for the in-process caches"""
+    return {
+        "articles": article_cache.stats(),
+        "renders": render_cache.stats(),
+        "images": image_cache.stats(),
+        "coalescing": read_flight.stats(),
+        "fallback": fallback_store.stats() if fallback_store is not None else None
     }
-    
+
+# Sitemap and feed for crawlers and feed readers
+@app.get("/sitemap.xml")
+async def sitemap(request: Request):
+    await syndication_index.ensure_loaded()
+    return await syndication_response(request, syndication_index.sitemap_chunks(), "application/xml")
+
+@app.get("/feed.xml")
+async def atom_feed(request: Request):
+    await syndication_index.ensure_loaded()
+    seo = await db.seo_settings.find_one({}, {"site_title": 1})
+    title = (seo or {}).get("site_title") or SEOSettings().site_title
+    return await syndication_response(request, syndication_index.feed_chunks(title), "application/atom+xml", title)
+
+@api_router.get("/monitoring/comment-streams")
+async def comment_stream_stats():
+    return comment_hub.stats()
+
+@api_router.get("/monitoring/slow-queries")
+async def slow_queries():
+    """Recent queries over the slow threshold with their explain plan summaries"""
+    return query_profiler.stats()
+
+@api_router.get("/monitoring/traces")
+async def recent_traces(limit: int = 20, min_ms: float = 0.0, path: Optional[str] = None):
+    """Recently sampled request traces, newest first"""
     return {
-        "usage": usage_stats,
-        "database": db_stats,
-        "cost_estimate": estimated_monthly_cost,
-        "alerts": {
-            "high_cpu": usage_stats["cpu_percent"] > 80,
-            "high_memory": usage_stats["memory_percent"] > 80,
-            "high_connections": usage_stats["active_connections"] > 100
-        }
+        **tracer.stats(),
+        "traces": trace_buffer.recent(limit=min(limit, TRACE_BUFFER), min_ms=min_ms, path=path)
     }
 
 # Root endpoint
@@ -365,9 +1680,111 @@ async def get_status_checks():
 
 # Photo routes
 @api_router.get("/photos", response_model=List[Photo])
-async def get_photos():
-    photos = await db.photos.find().to_list(1000)
-    return [Photo(**photo) for photo in photos]
+async def get_photos(
+    aperture_min: Optional[float] = None,
+    aperture_max: Optional[float] = None,
+    shutter_min: Optional[float] = None,
+    shutter_max: Optional[float] = None,
+    iso_min: Optional[int] = None,
+    iso_max: Optional[int] = None,
+    focal_min: Optional[float] = None,
+    focal_max: Optional[float] = None,
+    lens: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    projection, row_model = parse_fields(Photo, fields)
+    
+    async def load():
+        query = {}
+        ranges = [
+            ("f_number", aperture_min, aperture_max),
+            ("exposure_seconds", shutter_min, shutter_max),
+            ("iso", iso_min, iso_max),
+            ("focal_length_mm", focal_min, focal_max),
+        ]
+        for field, minimum, maximum in ranges:
+            bounds = {}
+            if minimum is not None:
+                bounds["$gte"] = minimum
+            if maximum is not None:
+                bounds["$lte"] = maximum
+            if bounds:
+                query[field] = bounds
+        
+        if lens:
+            query["lens_id"] = make_lens_id(lens)
+        
+        photos = await db.photos.find(query, projection).to_list(1000)
+        return to_rows(photos, row_model)
+    filters = (aperture_min, aperture_max, shutter_min, shutter_max, iso_min, iso_max, focal_min, focal_max, lens)
+    return await coalesced_response(
+        ("photos", *filters, fields), load, fallback=fields is None and all(value is None for value in filters),
+        response_model=List[row_model]
+    )
+
+@api_router.get("/photos/stats/camera")
+async def get_camera_stats():
+    """Distributions of lens usage and exposure settings across all photos"""
+    pipeline = [
+        {"$facet": {
+            "lenses": [
+                {"$match": {"lens_id": {"$ne": None}}},
+                {"$group": {"_id": "$lens_id", "lens": {"$first": "$camera_settings.lens"}, "count": {"$sum": 1}}},
+                {"$sort": {"count": -1}}
+            ],
+            "iso": [
+                {"$match": {"iso": {"$gt": 0}}},
+                {"$bucket": {"groupBy": "$iso", "boundaries": ISO_STOPS, "default": "other"}}
+            ],
+            "apertures": [
+                {"$match": {"f_number": {"$ne": None}}},
+                {"$group": {"_id": "$f_number", "count": {"$sum": 1}}},
+                {"$sort": {"_id": 1}}
+            ],
+            "focal_lengths": [
+                {"$match": {"focal_length_mm": {"$ne": None}}},
+                {"$group": {"_id": "$focal_length_mm", "count": {"$sum": 1}}},
+                {"$sort": {"_id": 1}}
+            ],
+            "summary": [
+                {"$group": {
+                    "_id": None,
+                    "photos": {"$sum": 1},
+                    "avg_f_number": {"$avg": "$f_number"},
+                    "avg_iso": {"$avg": "$iso"},
+                    "min_exposure_seconds": {"$min": "$exposure_seconds"},
+                    "max_exposure_seconds": {"$max": "$exposure_seconds"}
+                }}
+            ]
+        }}
+    ]
+    result = await db.photos.aggregate(pipeline).to_list(1)
+    facets = result[0] if result else {}
+    summary = (facets.get("summary") or [{}])[0]
+    summary.pop("_id", None)
+    return {
+        "summary": summary,
+        "lenses": [
+            {"lens_id": item["_id"], "lens": item.get("lens"), "count": item["count"]}
+            for item in facets.get("lenses", [])
+        ],
+        "iso_histogram": [
+            {
+                "min": item["_id"] if item["_id"] != "other" else None,
+                "max": ISO_STOPS[ISO_STOPS.index(item["_id"]) + 1] if item["_id"] != "other" else None,
+                "count": item["count"]
+            }
+            for item in facets.get("iso", [])
+        ],
+        "apertures": [{"f_number": item["_id"], "count": item["count"]} for item in facets.get("apertures", [])],
+        "focal_lengths": [{"focal_length_mm": item["_id"], "count": item["count"]} for item in facets.get("focal_lengths", [])]
+    }
+
+@api_router.post("/photos/normalize-camera-settings")
+async def normalize_photo_camera_settings():
+    """Backfill typed camera fields on photos created before normalization"""
+    updated = await backfill_camera_settings()
+    return {"message": "Camera settings normalized", "updated": updated}
 
 @api_router.get("/photos/{photo_id}", response_model=Photo)
 async def get_photo(photo_id: str):
@@ -379,32 +1796,34 @@ async def get_photo(photo_id: str):
 @api_router.post("/photos", response_model=Photo)
 async def create_photo(photo: PhotoCreate):
     photo_dict = photo.dict()
+    photo_dict.update(normalize_camera_settings(photo_dict["camera_settings"]))
     photo_obj = Photo(**photo_dict)
     _ = await db.photos.insert_one(photo_obj.dict())
+    if stored_key_for_url(photo_obj.image_url) and not all(photo_obj.camera_settings.get(field) for field in EXIF_FIELDS):
+        await job_queue.enqueue("photo_exif", {"photo_id": photo_obj.id}, idempotency_key=f"photo_exif:{photo_obj.id}")
     return photo_obj
 
 @api_router.put("/photos/{photo_id}", response_model=Photo)
 async def update_photo(photo_id: str, photo_update: PhotoCreate):
-    photo = await db.photos.find_one({"id": photo_id})
-    if not photo:
-        raise HTTPException(status_code=404, detail="Photo not found")
-    
     update_dict = photo_update.dict()
+    update_dict.update(normalize_camera_settings(update_dict["camera_settings"]))
     update_dict["timestamp"] = datetime.utcnow()
     
-    await db.photos.update_one(
+    updated_photo = await db.photos.find_one_and_update(
         {"id": photo_id},
-        {"$set": update_dict}
+        {"$set": update_dict},
+        return_document=ReturnDocument.AFTER
     )
-    
-    updated_photo = await db.photos.find_one({"id": photo_id})
+    if updated_photo is None:
+        raise HTTPException(status_code=404, detail="Photo not found")
     return Photo(**updated_photo)
 
 @api_router.delete("/photos/{photo_id}")
 async def delete_photo(photo_id: str):
-    result = await db.photos.delete_one({"id": photo_id})
-    if result.deleted_count == 0:
+    deleted_photo = await db.photos.find_one_and_delete({"id": photo_id}, {"image_url": 1})
+    if deleted_photo is None:
         raise HTTPException(status_code=404, detail="Photo not found")
+    await enqueue_photo_cleanup(photo_id, deleted_photo.get("image_url"))
     return {"message": "Photo deleted successfully"}
 
 # Comment routes
@@ -419,8 +1838,23 @@ async def create_comment(photo_id: str, comment: CommentCreate):
     comment_dict["photo_id"] = photo_id
     comment_obj = Comment(**comment_dict)
     _ = await db.comments.insert_one(comment_obj.dict())
+    if COMMENT_FANOUT != "change_stream":
+        comment_hub.publish(comment_obj.dict())
     return comment_obj
 
+@api_router.get("/photos/{photo_id}/comments/stream")
+async def stream_comments(photo_id: str, request: Request):
+    """Server-Sent Events: each new comment on this photo as it is posted"""
+    last_event_id = request.headers.get("last-event-id")
+    since = None
+    if last_event_id and last_event_id.isdigit():
+        since = datetime.fromtimestamp(int(last_event_id) / 1000, timezone.utc).replace(tzinfo=None)
+    return StreamingResponse(
+        comment_hub.stream(photo_id, db.comments, since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @api_router.get("/comments", response_model=List[Comment])
 async def get_all_comments():
     comments = await db.comments.find().to_list(1000)
@@ -446,38 +1880,123 @@ async def get_recipe(recipe_id: str):
         raise HTTPException(status_code=404, detail="Recipe not found")
     return PhotoRecipe(**recipe)
 
+@api_router.get("/recipes/{recipe_id}/render")
+async def render_recipe(recipe_id: str, image: str, request: Request, max_dimension: int = 1600):
+    """Render a saved recipe onto an image, serving repeat previews from the disk cache"""
+    recipe = await db.recipes.find_one({"id": recipe_id})
+    if recipe is None:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    
+    max_dimension = max(64, min(max_dimension, 4096))
+    cache_key = render_cache_key(image, max_dimension, recipe.get("settings", {}))
+    headers = {"ETag": f'"{cache_key}"', "Cache-Control": "public, max-age=86400"}
+    # The key covers every input, so a matching validator needs neither the cache nor a render
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    
+    rendered = await run_in_threadpool(render_cache.get, cache_key)
+    if rendered is not None:
+        return Response(content=rendered, media_type="image/jpeg", headers={**headers, "X-Render-Cache": "hit"})
+    
+    source = await run_in_threadpool(fetch_source_image, image)
+    try:
+        rendered = await run_in_threadpool(
+            recipe_renderer.render_bytes, source, recipe.get("settings", {}), max_dimension
+        )
+    except Exception as e:
+        logger.error(f"Error rendering recipe {recipe_id}: {str(e)}")
+        raise HTTPException(status_code=422, detail=f"Failed to render image: {str(e)}")
+    
+    await run_in_threadpool(render_cache.put, cache_key, rendered)
+    return Response(content=rendered, media_type="image/jpeg", headers={**headers, "X-Render-Cache": "miss"})
+
+@api_router.post("/recipes/{recipe_id}/render-jobs", status_code=202)
+async def queue_recipe_render(recipe_id: str, image: str, max_dimension: int = 1600):
+    """Pre-render a recipe preview in the background; poll /api/jobs/{id} for the result"""
+    recipe = await db.recipes.find_one({"id": recipe_id}, {"settings": 1})
+    if recipe is None:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    
+    max_dimension = max(64, min(max_dimension, 4096))
+    cache_key = render_cache_key(image, max_dimension, recipe.get("settings", {}))
+    # A finished render whose output has since been evicted has to run again
+    requeue = ("failed",) if cache_key in render_cache else ("failed", "succeeded")
+    return await job_queue.enqueue(
+        "recipe_render",
+        {"recipe_id": recipe_id, "image": image, "max_dimension": max_dimension},
+        idempotency_key=f"recipe_render:{cache_key}",
+        requeue=requeue
+    )
+
 # Blog Article routes
 @api_router.get("/articles", response_model=List[Article])
-async def get_articles(skip: int = 0, limit: int = 10, search: Optional[str] = None, tag: Optional[str] = None):
-    query = {"is_published": True}
-    
-    if search:
-        query["$or"] = [
-            {"title": {"$regex": search, "$options": "i"}},
-            {"content": {"$regex": search, "$options": "i"}},
-            {"excerpt": {"$regex": search, "$options": "i"}},
-            {"tags": {"$regex": search, "$options": "i"}}
-        ]
+async def get_articles(
+    skip: int = 0,
+    limit: int = 10,
+    search: Optional[str] = None,
+    tag: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """Published articles, newest first; fields=summary leaves out the body"""
+    projection, row_model = parse_fields(Article, fields, ArticleSummary)
     
-    if tag:
-        query["tags"] = {"$in": [tag]}
-    
-    articles = await db.articles.find(query).sort("publish_date", -1).skip(skip).limit(limit).to_list(limit)
-    return [Article(**article) for article in articles]
+    async def load():
+        query = {"is_published": True}
+        
+        if search:
+            query["$or"] = [
+                {"title": {"$regex": search, "$options": "i"}},
+                {"content": {"$regex": search, "$options": "i"}},
+                {"excerpt": {"$regex": search, "$options": "i"}},
+                {"tags": {"$regex": search, "$options": "i"}}
+            ]
+        
+        if tag:
+            query["tags"] = {"$in": [tag]}
+        
+        cursor = db.articles.find(query, projection).sort("publish_date", -1).skip(skip).limit(limit)
+        return to_rows(await cursor.to_list(limit), row_model)
+    return await coalesced_response(
+        ("articles", skip, limit, search, tag, fields), load, fallback=search is None and fallback_page(skip, limit, fields),
+        response_model=List[row_model]
+    )
 
 @api_router.get("/articles/{article_id}", response_model=Article)
 async def get_article(article_id: str):
-    article = await db.articles.find_one({"id": article_id})
-    if article is None:
-        raise HTTPException(status_code=404, detail="Article not found")
-    return Article(**article)
+    cached = article_cache.get(f"id:{article_id}")
+    if isinstance(cached, Article):
+        return cached
+    
+    async def load():
+        generation = article_cache.generation(f"id:{article_id}")
+        article = await db.articles.find_one({"id": article_id})
+        if article is None:
+            raise HTTPException(status_code=404, detail="Article not found")
+        with tracer.span("validate", model="Article"):
+            article_obj = Article(**article)
+        cache_article(article_obj, f"id:{article_id}", generation)
+        return article_obj
+    return await coalesced_response(("article", article_id), load, response_model=Article)
 
 @api_router.get("/articles/slug/{slug}", response_model=Article)
 async def get_article_by_slug(slug: str):
-    article = await db.articles.find_one({"slug": slug, "is_published": True})
-    if article is None:
+    cached = article_cache.get(f"slug:{slug}")
+    if cached is TTLCache.MISSING:
         raise HTTPException(status_code=404, detail="Article not found")
-    return Article(**article)
+    if cached is not None:
+        return cached
+    
+    async def load():
+        generation = article_cache.generation(f"slug:{slug}")
+        article = await db.articles.find_one({"slug": slug, "is_published": True})
+        if article is None:
+            article_cache.set_missing(f"slug:{slug}", generation)
+            raise HTTPException(status_code=404, detail="Article not found")
+        with tracer.span("validate", model="Article"):
+            article_obj = Article(**article)
+        cache_article(article_obj, f"slug:{slug}", generation)
+        return article_obj
+    return await coalesced_response(("article_slug", slug), load, response_model=Article)
 
 @api_router.post("/articles", response_model=Article)
 async def create_article(article: ArticleCreate):
@@ -492,32 +2011,42 @@ async def create_article(article: ArticleCreate):
     if not article_dict.get("meta_description"):
         article_dict["meta_description"] = article.excerpt[:160] + "..." if len(article.excerpt) > 160 else article.excerpt
     
-    article_obj = Article(**article_dict)
+    article_obj = Article(**article_dict, updated_at=datetime.utcnow())
     await db.articles.insert_one(article_obj.dict())
+    invalidate_article(article_obj.id, article_obj.slug)
+    syndication_index.article_changed(article_obj.dict())
     return article_obj
 
 @api_router.put("/articles/{article_id}", response_model=Article)
 async def update_article(article_id: str, article_update: ArticleUpdate):
-    existing_article = await db.articles.find_one({"id": article_id})
-    if existing_article is None:
-        raise HTTPException(status_code=404, detail="Article not found")
-    
     update_dict = {k: v for k, v in article_update.dict().items() if v is not None}
     
     # Recalculate read time if content is updated
     if "content" in update_dict:
         word_count = len(update_dict["content"].split())
         update_dict["read_time"] = max(1, word_count // 200)
+    update_dict["updated_at"] = datetime.utcnow()
     
-    await db.articles.update_one({"id": article_id}, {"$set": update_dict})
-    updated_article = await db.articles.find_one({"id": article_id})
+    # The old slug is needed for invalidation; $set alone determines the new document
+    existing_article = await db.articles.find_one_and_update(
+        {"id": article_id}, {"$set": update_dict}, return_document=ReturnDocument.BEFORE
+    )
+    if existing_article is None:
+        raise HTTPException(status_code=404, detail="Article not found")
+    updated_article = {**existing_article, **update_dict}
+    
+    # Drop the old slug, and any cached miss for the new one, before the next read
+    invalidate_article(article_id, existing_article.get("slug"), updated_article.get("slug"))
+    syndication_index.article_changed(updated_article)
     return Article(**updated_article)
 
 @api_router.delete("/articles/{article_id}")
 async def delete_article(article_id: str):
-    result = await db.articles.delete_one({"id": article_id})
-    if result.deleted_count == 0:
+    deleted_article = await db.articles.find_one_and_delete({"id": article_id}, {"slug": 1})
+    if deleted_article is None:
         raise HTTPException(status_code=404, detail="Article not found")
+    invalidate_article(article_id, deleted_article.get("slug"))
+    syndication_index.article_removed(article_id)
     return {"message": "Article deleted successfully"}
 
 @api_router.get("/articles/tags/all")
@@ -532,13 +2061,20 @@ async def get_all_tags():
 
 # Gallery routes
 @api_router.get("/gallery", response_model=List[GalleryPhoto])
-async def get_gallery_photos(skip: int = 0, limit: int = 20, category: Optional[str] = None):
-    query = {}
-    if category:
-        query["category"] = category
+async def get_gallery_photos(skip: int = 0, limit: int = 20, category: Optional[str] = None, fields: Optional[str] = None):
+    projection, row_model = parse_fields(GalleryPhoto, fields, GalleryPhotoSummary)
     
-    photos = await db.gallery.find(query).sort("timestamp", -1).skip(skip).limit(limit).to_list(limit)
-    return [GalleryPhoto(**photo) for photo in photos]
+    async def load():
+        query = {}
+        if category:
+            query["category"] = category
+        
+        photos = await db.gallery.find(query, projection).sort("timestamp", -1).skip(skip).limit(limit).to_list(limit)
+        return to_rows(photos, row_model)
+    return await coalesced_response(
+        ("gallery", skip, limit, category, fields), load, fallback=fallback_page(skip, limit, fields),
+        response_model=List[row_model]
+    )
 
 @api_router.get("/gallery/{photo_id}", response_model=GalleryPhoto)
 async def get_gallery_photo(photo_id: str):
@@ -552,13 +2088,20 @@ async def create_gallery_photo(photo: GalleryPhotoCreate):
     photo_dict = photo.dict()
     photo_obj = GalleryPhoto(**photo_dict)
     await db.gallery.insert_one(photo_obj.dict())
+    syndication_index.gallery_changed(photo_obj.dict())
+    if photo_obj.thumbnail_url is None and stored_key_for_url(photo_obj.image_url):
+        await job_queue.enqueue(
+            "gallery_thumbnail", {"photo_id": photo_obj.id}, idempotency_key=f"gallery_thumbnail:{photo_obj.id}"
+        )
     return photo_obj
 
 @api_router.delete("/gallery/{photo_id}")
 async def delete_gallery_photo(photo_id: str):
-    result = await db.gallery.delete_one({"id": photo_id})
-    if result.deleted_count == 0:
+    deleted_photo = await db.gallery.find_one_and_delete({"id": photo_id}, {"image_url": 1, "thumbnail_url": 1})
+    if deleted_photo is None:
         raise HTTPException(status_code=404, detail="Gallery photo not found")
+    await enqueue_photo_cleanup(photo_id, deleted_photo.get("image_url"), deleted_photo.get("thumbnail_url"))
+    syndication_index.gallery_removed(photo_id)
     return {"message": "Gallery photo deleted successfully"}
 
 @api_router.get("/gallery/categories/all")
@@ -668,7 +2211,7 @@ async def init_sample_data():
     
     # Insert sample photos
     for photo_data in sample_photos:
-        photo_obj = Photo(**photo_data)
+        photo_obj = Photo(**photo_data, **normalize_camera_settings(photo_data["camera_settings"]))
         await db.photos.insert_one(photo_obj.dict())
     
     # Sample blog articles
@@ -876,8 +2419,9 @@ Making mistakes is part of the learning process. The photographers who improve f
         word_count = len(article_data["content"].split())
         article_data["read_time"] = max(1, word_count // 200)
         
-        article_obj = Article(**article_data)
+        article_obj = Article(**article_data, updated_at=datetime.utcnow())
         await db.articles.insert_one(article_obj.dict())
+    article_cache.clear()
     
     # Sample gallery photos
     sample_gallery_photos = [
@@ -953,13 +2497,12 @@ Making mistakes is part of the learning process. The photographers who improve f
     for gallery_photo_data in sample_gallery_photos:
         gallery_photo_obj = GalleryPhoto(**gallery_photo_data)
         await db.gallery.insert_one(gallery_photo_obj.dict())
+    syndication_index.reset()
     
     return {"message": "Sample data initialized successfully"}
 
 # Portfolio Settings endpoints
-@api_router.get("/portfolio-settings", response_model=PortfolioSettings)
-async def get_portfolio_settings():
-    """Get current portfolio settings"""
+async def load_portfolio_settings() -> PortfolioSettings:
     settings = await db.portfolio_settings.find_one()
     if not settings:
         # Create default settings
@@ -968,91 +2511,63 @@ async def get_portfolio_settings():
         return default_settings
     return PortfolioSettings(**settings)
 
+async def upsert_settings(collection, model, update: dict) -> dict:
+    """Apply an update to a singleton settings document in one round trip, creating it with defaults if missing"""
+    touched = {field.split(".")[0] for operator in update.values() for field in operator}
+    defaults = {key: value for key, value in model().dict().items() if key not in touched}
+    return await collection.find_one_and_update(
+        {},
+        {**update, "$setOnInsert": defaults},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+
+@api_router.get("/portfolio-settings", response_model=PortfolioSettings)
+async def get_portfolio_settings():
+    """Get current portfolio settings"""
+    return await coalesced_response(("portfolio_settings",), load_portfolio_settings, response_model=PortfolioSettings)
+
 @api_router.put("/portfolio-settings", response_model=PortfolioSettings)
 async def update_portfolio_settings(settings_update: PortfolioSettingsCreate):
     """Update portfolio settings"""
-    existing_settings = await db.portfolio_settings.find_one()
-    
-    if not existing_settings:
-        # Create new settings if none exist
-        update_dict = settings_update.dict(exclude_none=True)
-        new_settings = PortfolioSettings(**update_dict)
-        await db.portfolio_settings.insert_one(new_settings.dict())
-        return new_settings
-    
-    # Update existing settings
     update_dict = settings_update.dict(exclude_none=True)
     update_dict["timestamp"] = datetime.utcnow()
     
-    await db.portfolio_settings.update_one(
-        {"id": existing_settings["id"]}, 
-        {"$set": update_dict}
-    )
-    
-    updated_settings = await db.portfolio_settings.find_one({"id": existing_settings["id"]})
+    updated_settings = await upsert_settings(db.portfolio_settings, PortfolioSettings, {"$set": update_dict})
     return PortfolioSettings(**updated_settings)
 
 @api_router.post("/portfolio-settings/equipment", response_model=PortfolioSettings)
 async def add_equipment_item(item: EquipmentItem):
     """Add equipment item"""
-    settings = await db.portfolio_settings.find_one()
-    if not settings:
-        # Create default settings with the new item
-        default_settings = PortfolioSettings(equipment_items=[item])
-        await db.portfolio_settings.insert_one(default_settings.dict())
-        return default_settings
-    
-    # Add item to existing equipment
-    await db.portfolio_settings.update_one(
-        {"id": settings["id"]},
-        {"$push": {"equipment_items": item.dict()}}
+    updated_settings = await upsert_settings(
+        db.portfolio_settings, PortfolioSettings, {"$push": {"equipment_items": item.dict()}}
     )
-    
-    updated_settings = await db.portfolio_settings.find_one({"id": settings["id"]})
     return PortfolioSettings(**updated_settings)
 
 @api_router.delete("/portfolio-settings/equipment/{item_id}")
 async def delete_equipment_item(item_id: str):
     """Delete equipment item"""
-    settings = await db.portfolio_settings.find_one()
-    if not settings:
+    result = await db.portfolio_settings.update_one({}, {"$pull": {"equipment_items": {"id": item_id}}})
+    if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Portfolio settings not found")
     
-    await db.portfolio_settings.update_one(
-        {"id": settings["id"]},
-        {"$pull": {"equipment_items": {"id": item_id}}}
-    )
-    
     return {"message": "Equipment item deleted successfully"}
 
 @api_router.put("/portfolio-settings/equipment/{item_id}", response_model=PortfolioSettings)
 async def update_equipment_item(item_id: str, item_update: EquipmentItem):
     """Update equipment item"""
-    settings = await db.portfolio_settings.find_one()
-    if not settings:
-        raise HTTPException(status_code=404, detail="Portfolio settings not found")
-    
-    # Find and update the specific equipment item
-    equipment_items = settings.get("equipment_items", [])
-    for i, item in enumerate(equipment_items):
-        if item.get("id") == item_id:
-            equipment_items[i] = item_update.dict()
-            break
-    else:
-        raise HTTPException(status_code=404, detail="Equipment item not found")
-    
-    await db.portfolio_settings.update_one(
-        {"id": settings["id"]},
-        {"$set": {"equipment_items": equipment_items}}
+    # Replace only the matched array element, so concurrent edits to other items are kept
+    updated_settings = await db.portfolio_settings.find_one_and_update(
+        {"equipment_items.id": item_id},
+        {"$set": {"equipment_items.$": {**item_update.dict(), "id": item_id}}},
+        return_document=ReturnDocument.AFTER
     )
-    
-    updated_settings = await db.portfolio_settings.find_one({"id": settings["id"]})
+    if updated_settings is None:
+        raise HTTPException(status_code=404, detail="Equipment item not found")
     return PortfolioSettings(**updated_settings)
 
 # SEO Settings endpoints
-@api_router.get("/seo-settings", response_model=SEOSettings)
-async def get_seo_settings():
-    """Get current SEO settings"""
+async def load_seo_settings() -> SEOSettings:
     settings = await db.seo_settings.find_one()
     if not settings:
         # Create default settings
@@ -1061,36 +2576,203 @@ async def get_seo_settings():
         return default_settings
     return SEOSettings(**settings)
 
+@api_router.get("/seo-settings", response_model=SEOSettings)
+async def get_seo_settings():
+    """Get current SEO settings"""
+    return await coalesced_response(("seo_settings",), load_seo_settings, response_model=SEOSettings)
+
 @api_router.put("/seo-settings", response_model=SEOSettings)
 async def update_seo_settings(settings_update: SEOSettingsCreate):
     """Update SEO settings"""
-    existing_settings = await db.seo_settings.find_one()
-    
-    if not existing_settings:
-        # Create new settings if none exist
-        update_dict = settings_update.dict(exclude_none=True)
-        new_settings = SEOSettings(**update_dict)
-        await db.seo_settings.insert_one(new_settings.dict())
-        return new_settings
-    
-    # Update existing settings
     update_dict = settings_update.dict(exclude_none=True)
     update_dict["timestamp"] = datetime.utcnow()
     
-    await db.seo_settings.update_one(
-        {"id": existing_settings["id"]}, 
-        {"$set": update_dict}
+    updated_settings = await upsert_settings(db.seo_settings, SEOSettings, {"$set": update_dict})
+    return SEOSettings(**updated_settings)
+
+# Homepage bootstrap: everything first paint needs in one response
+BOOTSTRAP_SECTIONS = ("portfolio_settings", "seo_settings", "photos", "gallery", "articles")
+
+def parse_bootstrap_fields(fields: Optional[str], sections) -> dict:
+    """'photos.id,photos.title' -> {"photos": {"id", "title"}}"""
+    selected = {}
+    for entry in filter(None, (part.strip() for part in (fields or "").split(","))):
+        section, _, field = entry.partition(".")
+        if section not in sections or not field:
+            raise HTTPException(status_code=400, detail=f"Invalid field '{entry}'; use <section>.<field>")
+        selected.setdefault(section, set()).add(field)
+    return selected
+
+def select_fields(data, fields):
+    if fields is None or isinstance(data, list):
+        return data  # List sections are already projected in the query
+    return {key: value for key, value in data.dict().items() if key in fields}
+
+@api_router.get("/bootstrap")
+async def get_bootstrap(
+    request: Request,
+    include: Optional[str] = None,
+    fields: Optional[str] = None,
+    gallery_limit: int = 12,
+    articles_limit: int = 3
+):
+    """Homepage data (settings, SEO, photos, recent gallery and articles) fetched concurrently as one payload"""
+    sections = [section.strip() for section in include.split(",") if section.strip()] if include else list(BOOTSTRAP_SECTIONS)
+    unknown = [section for section in sections if section not in BOOTSTRAP_SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown sections: {', '.join(unknown)}")
+    selected = parse_bootstrap_fields(fields, sections)
+    # Only the homepage's own request is kept for the fallback store
+    fallback = include is None and fields is None and (gallery_limit, articles_limit) == (12, 3)
+    gallery_limit = max(0, min(gallery_limit, 100))
+    articles_limit = max(0, min(articles_limit, 50))
+    
+    # List sections project their selected fields in Mongo; settings are trimmed after loading
+    def section_fields(section, model):
+        names = selected.get(section)
+        return parse_fields(model, ",".join(sorted(names)) if names else None)
+    
+    photo_projection, photo_model = section_fields("photos", Photo)
+    gallery_projection, gallery_model = section_fields("gallery", GalleryPhoto)
+    article_projection, article_model = section_fields("articles", Article)
+    
+    async def load_photos():
+        return to_rows(await db.photos.find({}, photo_projection).to_list(1000), photo_model)
+    
+    async def load_gallery():
+        cursor = db.gallery.find({}, gallery_projection).sort("timestamp", -1).limit(gallery_limit)
+        return to_rows(await cursor.to_list(gallery_limit), gallery_model)
+    
+    async def load_articles():
+        cursor = db.articles.find({"is_published": True}, article_projection).sort("publish_date", -1).limit(articles_limit)
+        return to_rows(await cursor.to_list(articles_limit), article_model)
+    
+    loaders = {
+        "portfolio_settings": load_portfolio_settings,
+        "seo_settings": load_seo_settings,
+        "photos": load_photos,
+        "gallery": load_gallery,
+        "articles": load_articles,
+    }
+    
+    async def load():
+        results = await asyncio.gather(*(loaders[section]() for section in sections))
+        return {section: select_fields(result, selected.get(section)) for section, result in zip(sections, results)}
+    
+    selection = tuple(sorted((section, tuple(sorted(names))) for section, names in selected.items()))
+    key = ("bootstrap", tuple(sections), selection, gallery_limit, articles_limit)
+    body, stale_age = await coalesced_body(key, load, fallback)
+    etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache", **stale_headers(stale_age)}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# Admin dashboard stats from counters and small indexed queries, never full collections
+admin_stats_cache = TTLCache(1, ADMIN_STATS_TTL)
+
+async def database_storage() -> Optional[dict]:
+    try:
+        stats = await db.command("dbStats")
+    except Exception as e:
+        logger.warning(f"dbStats failed: {str(e)}")
+        return None
+    return {
+        "data_bytes": int(stats.get("dataSize", 0)),
+        "storage_bytes": int(stats.get("storageSize", 0)),
+        "index_bytes": int(stats.get("indexSize", 0)),
+    }
+
+async def uploads_storage() -> Optional[dict]:
+    """Bucket usage as measured by the latest orphan collection run, so stats never list S3 themselves"""
+    job = await job_queue.collection.find_one(
+        {"type": "s3_orphan_gc", "status": "succeeded"}, {"_id": 0, "result": 1, "finished_at": 1},
+        sort=[("finished_at", -1)]
     )
+    if not job or "scanned_bytes" not in (job.get("result") or {}):
+        return None
+    result = job["result"]
+    return {
+        "objects": result["scanned"] - result["deleted"],
+        "bytes": result["scanned_bytes"],
+        "orphans": result["orphans"] - result["deleted"],
+        "measured_at": job["finished_at"],
+    }
+
+async def recent_activity(limit: int = 10) -> list:
+    """Newest photos, gallery items, articles and comments merged into one timeline"""
+    sources = [
+        ("photo", db.photos, "timestamp", "title"),
+        ("gallery", db.gallery, "timestamp", "title"),
+        ("article", db.articles, "updated_at", "title"),
+        ("comment", db.comments, "timestamp", "name"),
+    ]
     
-    updated_settings = await db.seo_settings.find_one({"id": existing_settings["id"]})
-    return SEOSettings(**updated_settings)
+    async def newest(kind, collection, time_field, label_field):
+        cursor = collection.find({}, {"_id": 0, "id": 1, label_field: 1, time_field: 1}).sort(time_field, -1).limit(limit)
+        return [
+            {"type": kind, "id": item.get("id"), "title": item.get(label_field), "timestamp": item.get(time_field)}
+            async for item in cursor
+        ]
+    
+    batches = await asyncio.gather(*(newest(*source) for source in sources))
+    items = [item for batch in batches for item in batch if item["timestamp"]]
+    return sorted(items, key=lambda item: item["timestamp"], reverse=True)[:limit]
+
+async def compute_admin_stats() -> dict:
+    now = datetime.utcnow()
+    week_ago = now - timedelta(days=7)
+    (
+        photos, gallery, comments, articles, published,
+        photos_week, gallery_week, articles_week, comments_day, comments_week,
+        activity, database, uploads
+    ) = await asyncio.gather(
+        db.photos.estimated_document_count(),
+        db.gallery.estimated_document_count(),
+        db.comments.estimated_document_count(),
+        db.articles.estimated_document_count(),
+        db.articles.count_documents({"is_published": True}),
+        db.photos.count_documents({"timestamp": {"$gte": week_ago}}),
+        db.gallery.count_documents({"timestamp": {"$gte": week_ago}}),
+        db.articles.count_documents({"updated_at": {"$gte": week_ago}}),
+        db.comments.count_documents({"timestamp": {"$gte": now - timedelta(days=1)}}),
+        db.comments.count_documents({"timestamp": {"$gte": week_ago}}),
+        recent_activity(),
+        database_storage(),
+        uploads_storage()
+    )
+    return {
+        "generated_at": now,
+        "photos": {"total": photos, "added_last_7_days": photos_week},
+        "gallery": {"total": gallery, "added_last_7_days": gallery_week},
+        "articles": {
+            "total": articles,
+            "published": published,
+            "drafts": max(0, articles - published),
+            "updated_last_7_days": articles_week,
+        },
+        "comments": {"total": comments, "last_24_hours": comments_day, "last_7_days": comments_week},
+        "recent_activity": activity,
+        "storage": {"database": database, "uploads": uploads},
+    }
+
+@api_router.get("/admin/stats")
+async def get_admin_stats():
+    """Totals, drafts, recent activity, storage and comment volume for the admin dashboard"""
+    stats = admin_stats_cache.get("stats")
+    if stats is None:
+        stats = await read_flight.do(("admin_stats",), compute_admin_stats)
+        admin_stats_cache.set("stats", stats)
+    return stats
 
-# S3 Upload endpoints
+# Upload endpoints
 @api_router.post("/upload/presigned-url", response_model=S3UploadResponse)
 async def get_presigned_upload_url(request: S3UploadRequest):
-    """Generate presigned URL for direct S3 upload"""
-    if not s3_client:
-        raise HTTPException(status_code=500, detail="S3 not configured")
+    """Generate a presigned URL the browser uploads the file to directly"""
+    if not storage:
+        raise HTTPException(status_code=500, detail="Storage not configured")
+    if request.content_type not in IMAGE_CONTENT_TYPES:
+        raise HTTPException(status_code=400, detail="Only JPEG, PNG, GIF, WebP and AVIF images can be uploaded")
     
     try:
         # Generate unique key for the file
@@ -1098,23 +2780,12 @@ async def get_presigned_upload_url(request: S3UploadRequest):
         unique_filename = f"{uuid.uuid4()}.{file_extension}" if file_extension else str(uuid.uuid4())
         key = f"uploads/{request.upload_type}/{unique_filename}"
         
-        # Generate presigned URL for PUT operation
-        presigned_url = s3_client.generate_presigned_url(
-            'put_object',
-            Params={
-                'Bucket': AWS_BUCKET_NAME,
-                'Key': key,
-                'ContentType': request.content_type
-            },
-            ExpiresIn=3600  # 1 hour
-        )
-        
-        # Generate the final public URL
-        file_url = f"https://{AWS_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{key}"
+        # Presigned PUT, valid for an hour
+        presigned_url = storage.presign_put(key, request.content_type, expires_in=3600)
         
         return S3UploadResponse(
             upload_url=presigned_url,
-            file_url=file_url,
+            file_url=storage.url(key),
             key=key
         )
         
@@ -1122,48 +2793,204 @@ async def get_presigned_upload_url(request: S3UploadRequest):
         logger.error(f"Error generating presigned URL: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate upload URL: {str(e)}")
 
+@api_router.put("/upload/{key:path}")
+async def put_uploaded_file(key: str, request: Request, expires: int, signature: str):
+    """Receive a presigned upload when files are stored locally"""
+    if not isinstance(storage, LocalStorage):
+        raise HTTPException(status_code=404, detail="Not Found")
+    content_type = request.headers.get("content-type", "")
+    if content_type not in IMAGE_CONTENT_TYPES:
+        raise HTTPException(status_code=415, detail="Only image uploads are accepted")
+    if not storage.verify_put(key, content_type, expires, signature):
+        raise HTTPException(status_code=403, detail="Upload URL is invalid or has expired")
+    
+    max_bytes = STORAGE_MAX_UPLOAD_MB * 1024 * 1024
+    if int(request.headers.get("content-length") or 0) > max_bytes:
+        raise HTTPException(status_code=413, detail="File too large")
+    try:
+        temp_path = storage.temp_path_for(key)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Streamed to disk chunk by chunk, so an upload never sits in memory
+    try:
+        received = 0
+        async with await anyio.open_file(temp_path, mode="wb") as file:
+            async for chunk in request.stream():
+                received += len(chunk)
+                if received > max_bytes:
+                    raise HTTPException(status_code=413, detail="File too large")
+                await file.write(chunk)
+        await run_in_threadpool(storage.put_file, key, temp_path)
+    finally:
+        temp_path.unlink(missing_ok=True)
+    return Response(status_code=200)
+
 @api_router.post("/upload/complete")
 async def upload_complete(request: S3UploadComplete):
     """Handle upload completion and optionally verify file exists"""
-    if not s3_client:
-        raise HTTPException(status_code=500, detail="S3 not configured")
+    if not storage:
+        raise HTTPException(status_code=500, detail="Storage not configured")
     
     try:
-        # Verify file exists in S3
-        s3_client.head_object(Bucket=AWS_BUCKET_NAME, Key=request.key)
-        
-        logger.info(f"Upload completed successfully for key: {request.key}")
-        return {
-            "success": True,
-            "message": "Upload completed successfully",
-            "key": request.key,
-            "upload_type": request.upload_type
-        }
-        
-    except ClientError as e:
-        if e.response['Error']['Code'] == '404':
-            raise HTTPException(status_code=404, detail="File not found in S3")
-        else:
-            logger.error(f"Error verifying upload: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Error verifying upload: {str(e)}")
+        # Verify the file arrived
+        stored = await run_in_threadpool(storage.head, request.key)
     except Exception as e:
-        logger.error(f"Error in upload completion: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Upload verification failed: {str(e)}")
+        logger.error(f"Error verifying upload: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error verifying upload: {str(e)}")
+    if stored is None:
+        raise HTTPException(status_code=404, detail="File not found in storage")
+    
+    logger.info(f"Upload completed successfully for key: {request.key}")
+    return {
+        "success": True,
+        "message": "Upload completed successfully",
+        "key": request.key,
+        "upload_type": request.upload_type
+    }
 
 @api_router.delete("/upload/{key:path}")
 async def delete_uploaded_file(key: str):
-    """Delete a file from S3"""
-    if not s3_client:
-        raise HTTPException(status_code=500, detail="S3 not configured")
+    """Delete an uploaded file"""
+    if not storage:
+        raise HTTPException(status_code=500, detail="Storage not configured")
     
     try:
-        s3_client.delete_object(Bucket=AWS_BUCKET_NAME, Key=key)
-        logger.info(f"File deleted successfully: {key}")
-        return {"success": True, "message": "File deleted successfully"}
-        
+        failed_keys = await run_in_threadpool(storage.delete, [key])
     except Exception as e:
+        failed_keys = [key]
         logger.error(f"Error deleting file {key}: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to delete file: {str(e)}")
+    if failed_keys:
+        raise HTTPException(status_code=500, detail=f"Failed to delete file: {key}")
+    logger.info(f"File deleted successfully: {key}")
+    return {"success": True, "message": "File deleted successfully"}
+
+@api_router.post("/upload/orphans", status_code=202)
+async def collect_orphaned_uploads(dry_run: bool = True, grace_hours: float = S3_GC_GRACE_HOURS):
+    """Queue a reconciliation of stored uploads against the database; dry runs only report"""
+    if not storage:
+        raise HTTPException(status_code=500, detail="Storage not configured")
+    if grace_hours < 1:
+        raise HTTPException(status_code=400, detail="grace_hours must be at least 1")
+    return await job_queue.enqueue("s3_orphan_gc", {"dry_run": dry_run, "grace_hours": grace_hours})
+
+# Locally stored uploads, served straight from disk
+@app.api_route("/media/{key:path}", methods=["GET", "HEAD"])
+async def serve_media(key: str, request: Request):
+    """Serve a locally stored upload with Range and conditional request support"""
+    if not isinstance(storage, LocalStorage) or key.rsplit("/", 1)[-1].startswith("."):
+        raise HTTPException(status_code=404, detail="Not Found")
+    try:
+        path = storage.path_for(key)
+        stat_result = await run_in_threadpool(os.stat, path)
+        media_type = mimetypes.guess_type(key)[0]
+        if media_type not in IMAGE_CONTENT_TYPES:
+            media_type = "application/octet-stream"
+        # Keys are unique per upload and never rewritten
+        return file_response(request, path, stat_result, media_type=media_type, cache_control=IMMUTABLE)
+    except (ValueError, FileNotFoundError):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+# Caching image proxy
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF8", "image/gif"),
+)
+
+def image_media_type(path: Path) -> str:
+    """Content type of a cached image from its first bytes"""
+    with open(path, "rb") as file:
+        head = file.read(16)
+    for signature, media_type in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return media_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[4:12] in (b"ftypavif", b"ftypavis"):
+        return "image/avif"
+    return "application/octet-stream"
+
+MAX_REDIRECTS = 3
+
+def open_allowed_url(url: str, allowed_hosts) -> requests.Response:
+    """Streaming GET that follows a redirect only when its target is also on an allowed host"""
+    for _ in range(MAX_REDIRECTS + 1):
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or parsed.hostname not in allowed_hosts:
+            raise HTTPException(status_code=502, detail="Image host not allowed")
+        response = requests.get(url, stream=True, timeout=15, allow_redirects=False)
+        if not response.is_redirect:
+            return response
+        url = urljoin(url, response.headers["location"])
+        response.close()
+    raise HTTPException(status_code=502, detail="Too many redirects")
+
+def download_image(url: str, temp_path: Path) -> None:
+    """Stream an origin image to temp_path in chunks, capped in size"""
+    max_bytes = IMAGE_PROXY_MAX_MB * 1024 * 1024
+    with open_allowed_url(url, IMAGE_PROXY_HOSTS) as response:
+        if response.status_code == 404:
+            raise HTTPException(status_code=404, detail="Image not found at origin")
+        if response.status_code != 200:
+            raise HTTPException(status_code=502, detail=f"Failed to fetch image: HTTP {response.status_code}")
+        content_type = response.headers.get("content-type", "")
+        # SVG can carry scripts, so only raster images are proxied
+        if not content_type.startswith("image/") or content_type.startswith("image/svg"):
+            raise HTTPException(status_code=502, detail="Origin did not return an image")
+        received = 0
+        try:
+            with open(temp_path, "wb") as file:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    received += len(chunk)
+                    if received > max_bytes:
+                        raise HTTPException(status_code=413, detail="Image too large")
+                    file.write(chunk)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+
+@app.api_route("/img/{source:path}", methods=["GET", "HEAD"])
+async def proxy_image(source: str, request: Request):
+    """Serve an image through the local disk cache, e.g. /img/images.unsplash.com/photo-1?w=800.
+
+    Only hosts in IMAGE_PROXY_HOSTS are served; concurrent misses for one image share
+    a single origin download.
+    """
+    host, _, path = source.partition("/")
+    if not path:
+        raise HTTPException(status_code=404, detail="Not Found")
+    origin_url = f"https://{source}" + (f"?{request.url.query}" if request.url.query else "")
+    
+    if isinstance(storage, LocalStorage):
+        key = storage.key_for_url(f"{storage.public_url.split('://', 1)[0]}://{source}")
+        if key is not None:
+            return await serve_media(key, request)
+    if host not in IMAGE_PROXY_HOSTS:
+        raise HTTPException(status_code=404, detail="Image host not proxied")
+    
+    cache_key = hashlib.sha256(origin_url.encode()).hexdigest()
+    cached = await run_in_threadpool(image_cache.lookup, cache_key)
+    if cached is None:
+        async def fetch():
+            temp_path = image_cache.temp_path_for(cache_key)
+            await run_in_threadpool(download_image, origin_url, temp_path)
+            await run_in_threadpool(image_cache.put_file, cache_key, temp_path)
+        await read_flight.do(("image", cache_key), fetch)
+        path = image_cache.path_for(cache_key)
+        try:
+            cached = path, await run_in_threadpool(os.stat, path)
+        except FileNotFoundError:
+            raise HTTPException(status_code=502, detail="Image could not be cached")
+    
+    path, stat_result = cached
+    media_type = await run_in_threadpool(image_media_type, path)
+    return file_response(
+        request, path, stat_result, media_type=media_type,
+        # The cached copy's mtime moves on every hit, so the ETag comes from the source URL and size
+        etag=f'"{cache_key[:16]}-{stat_result.st_size:x}"',
+        cache_control=f"public, max-age={IMAGE_PROXY_MAX_AGE}"
+    )
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -1198,11 +3025,50 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Re-export the static snapshot for whatever content a successful write touched
+snapshot_exporter = SnapshotExporter(app, db, LocalSnapshotStore(SNAPSHOT_DIR)) if SNAPSHOT_DIR else None
+
+def snapshot_groups_for(method: str, path: str):
+    """Snapshot groups whose public responses can change after a write to this path"""
+    if method in ("GET", "HEAD", "OPTIONS") or not path.startswith("/api/"):
+        return ()
+    if path.startswith("/api/init-sample-data"):
+        return SNAPSHOT_GROUPS
+    if path.startswith("/api/photos/") and path.endswith("/comments"):
+        return ()
+    for prefix, group in (
+        ("/api/photos", "photos"),
+        ("/api/articles", "articles"),
+        ("/api/gallery", "gallery"),
+        ("/api/portfolio-settings", "settings"),
+        ("/api/seo-settings", "settings"),
+    ):
+        if path.startswith(prefix):
+            return (group,)
+    return ()
+
+@app.middleware("http")
+async def schedule_snapshot_export(request: Request, call_next):
+    response = await call_next(request)
+    if snapshot_exporter and response.status_code < 400:
+        groups = snapshot_groups_for(request.method, request.url.path)
+        if groups:
+            snapshot_exporter.schedule(*groups)
+    return response
+
+# Attribute database time to each request and report it in a Server-Timing header
+app.add_middleware(ProfilingMiddleware)
+
+# Trace a sampled fraction of requests; "X-Trace: 1" forces a trace for one request
+app.add_middleware(TracingMiddleware, tracer=tracer)
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize app and create database indexes"""
     logger.info("Starting Viet's Photography Portfolio API")
     logger.info(f"Database: {db_name}")
+    query_profiler.attach(client, asyncio.get_running_loop())
+    psutil.cpu_percent(interval=None)  # Prime the non-blocking CPU measurement used by the dashboard
     
     # Create database indexes for better performance
     try:
@@ -1210,23 +3076,62 @@ async def startup_event():
         await db.articles.create_index([("slug", 1)], unique=True)
         await db.articles.create_index([("is_published", 1), ("publish_date", -1)])
         await db.articles.create_index([("tags", 1)])
+        await db.articles.create_index([("updated_at", -1)])
         
         # Index for photos
         await db.photos.create_index([("timestamp", -1)])
+        await db.photos.create_index([("f_number", 1)])
+        await db.photos.create_index([("exposure_seconds", 1)])
+        await db.photos.create_index([("iso", 1)])
+        await db.photos.create_index([("focal_length_mm", 1)])
+        await db.photos.create_index([("lens_id", 1)])
         
         # Index for comments
         await db.comments.create_index([("photo_id", 1), ("timestamp", -1)])
+        await db.comments.create_index([("timestamp", -1)])
         
         # Index for gallery
         await db.gallery.create_index([("category", 1), ("timestamp", -1)])
+        await db.gallery.create_index([("timestamp", -1)])
         
         logger.info("Database indexes created successfully")
     except Exception as e:
         logger.warning(f"Index creation failed (may already exist): {str(e)}")
     
+    # Normalize camera settings on photos stored before the typed fields existed; later writes normalize themselves
+    try:
+        normalized = await run_migration_once("camera_settings_v1", backfill_camera_settings)
+        if normalized:
+            logger.info(f"Normalized camera settings on {normalized} photos")
+    except Exception as e:
+        logger.warning(f"Camera settings backfill failed: {str(e)}")
+    
+    # Articles created before updated_at was set on insert count as updated when published
+    try:
+        result = await db.articles.update_many({"updated_at": None}, [{"$set": {"updated_at": "$publish_date"}}])
+        if result.modified_count:
+            logger.info(f"Backfilled updated_at on {result.modified_count} articles")
+    except Exception as e:
+        logger.warning(f"Article updated_at backfill failed: {str(e)}")
+    
+    if snapshot_exporter:
+        logger.info(f"Static snapshot export enabled: {SNAPSHOT_DIR}")
+        snapshot_exporter.schedule(*SNAPSHOT_GROUPS)
+    
+    try:
+        await job_queue.ensure_indexes()
+    except Exception as e:
+        logger.warning(f"Job index creation failed: {str(e)}")
+    if JOB_WORKERS_ENABLED:
+        job_queue.start()
+    if COMMENT_FANOUT == "change_stream":
+        comment_hub.watch(db.comments)
+    
     logger.info("API is ready to serve requests")
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await job_queue.stop()
+    await comment_hub.stop()
     logger.info("Shutting down database connection")
     client.close()
\ No newline at end of file
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Static Snapshot Exporter
+Renders the public read endpoints into versioned, precompressed JSON files
+so the frontend can read them from static hosting and only hit the API on a miss.
+
+Layout of a snapshot:
+    manifest.json            maps each canonical request ("/api/gallery?category=portrait&limit=50")
+                             to a content-addressed file, e.g. "v/3f2a9c1e4b7d6a05.json"
+    v/<hash>.json            immutable response body
+    v/<hash>.json.gz         the same body gzip-compressed
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import uuid
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlencode
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_GROUPS = ("settings", "photos", "gallery", "articles")
+
+
+def canonical_request(path: str, params: dict = None) -> str:
+    """Request key used in the manifest: path plus query parameters sorted by name"""
+    params = {key: value for key, value in (params or {}).items() if value is not None}
+    return f"{path}?{urlencode(sorted(params.items()))}" if params else path
+
+
+async def asgi_get(app, path: str, params: dict = None):
+    """Call a GET endpoint on the ASGI app in-process and return (status, body)"""
+    query_string = urlencode(sorted((params or {}).items())).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query_string,
+        "headers": [(b"host", b"snapshot"), (b"accept", b"application/json")],
+        "client": ("snapshot", 0),
+        "server": ("snapshot", 80),
+    }
+    status = 500
+    chunks = []
+    request_sent = False
+    response_done = asyncio.Event()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Like a real server, only report a disconnect once the response is finished
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_done.set()
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+class LocalSnapshotStore:
+    """Writes snapshot files under a local directory"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        (self.directory / "v").mkdir(parents=True, exist_ok=True)
+
+    def exists(self, name: str) -> bool:
+        return (self.directory / name).exists()
+
+    def read(self, name: str):
+        path = self.directory / name
+        return path.read_bytes() if path.exists() else None
+
+    def write(self, name: str, data: bytes, content_encoding: str = None, immutable: bool = True) -> None:
+        path = self.directory / name
+        # Unique per write, so two workers exporting the same file never share a temp file
+        temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            temp_path.write_bytes(data)
+            os.replace(temp_path, path)
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+    def delete(self, name: str) -> None:
+        (self.directory / name).unlink(missing_ok=True)
+
+
+class S3SnapshotStore:
+    """Writes snapshot files to an S3 bucket prefix with the right caching headers"""
+
+    def __init__(self, s3_client, bucket: str, prefix: str = "snapshot"):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+
+    def _key(self, name: str) -> str:
+        return f"{self.prefix}/{name}" if self.prefix else name
+
+    def exists(self, name: str) -> bool:
+        try:
+            self.s3_client.head_object(Bucket=self.bucket, Key=self._key(name))
+            return True
+        except Exception:
+            return False
+
+    def read(self, name: str):
+        try:
+            return self.s3_client.get_object(Bucket=self.bucket, Key=self._key(name))["Body"].read()
+        except Exception:
+            return None
+
+    def write(self, name: str, data: bytes, content_encoding: str = None, immutable: bool = True) -> None:
+        extra = {"ContentEncoding": content_encoding} if content_encoding else {}
+        self.s3_client.put_object(
+            Bucket=self.bucket,
+            Key=self._key(name),
+            Body=data,
+            ContentType="application/json",
+            CacheControl="public, max-age=31536000, immutable" if immutable else "public, max-age=60",
+            **extra
+        )
+
+    def delete(self, name: str) -> None:
+        self.s3_client.delete_object(Bucket=self.bucket, Key=self._key(name))
+
+
+class SnapshotExporter:
+    """Walks the public read endpoints and writes only the responses that changed"""
+
+    def __init__(self, app, db, store, page_depth: int = 5, debounce_seconds: float = 2.0):
+        self.app = app
+        self.db = db
+        self.store = store
+        self.page_depth = page_depth
+        self.debounce_seconds = debounce_seconds
+        self._pending = set()
+        self._task = None
+        self._lock = asyncio.Lock()
+
+    def _paged_targets(self, group: str, path: str, base_params: dict, page_size: int, total: int):
+        pages = min(self.page_depth, max(1, -(-total // page_size)))
+        return [(group, path, {**base_params, "limit": page_size, "skip": page * page_size or None})
+                for page in range(pages)]
+
+    async def targets(self, groups):
+        """Every (group, path, params) request to render for the given groups"""
+        targets = []
+        if "settings" in groups:
+            targets += [("settings", "/api/portfolio-settings", {}), ("settings", "/api/seo-settings", {})]
+        if "photos" in groups:
+            targets += [("photos", "/api/photos", {}), ("photos", "/api/photos/stats/camera", {})]
+        if "gallery" in groups:
+            targets.append(("gallery", "/api/gallery/categories/all", {}))
+            total = await self.db.gallery.count_documents({})
+            targets += self._paged_targets("gallery", "/api/gallery", {}, 50, total)
+            async for category in self.db.gallery.aggregate([{"$group": {"_id": "$category", "count": {"$sum": 1}}}]):
+                targets += self._paged_targets(
+                    "gallery", "/api/gallery", {"category": category["_id"]}, 50, category["count"]
+                )
+        if "articles" in groups:
+            targets.append(("articles", "/api/articles/tags/all", {}))
+            published = {"is_published": True}
+            total = await self.db.articles.count_documents(published)
+            targets += self._paged_targets("articles", "/api/articles", {}, 10, total)
+            tag_pipeline = [{"$match": published}, {"$unwind": "$tags"}, {"$group": {"_id": "$tags", "count": {"$sum": 1}}}]
+            async for tag in self.db.articles.aggregate(tag_pipeline):
+                targets += self._paged_targets("articles", "/api/articles", {"tag": tag["_id"]}, 10, tag["count"])
+                targets.append(("articles", "/api/articles", {"tag": tag["_id"], "limit": 3}))
+            async for article in self.db.articles.find(published, {"slug": 1}):
+                targets.append(("articles", f"/api/articles/slug/{article['slug']}", {}))
+        return targets
+
+    def _load_manifest(self) -> dict:
+        raw = self.store.read("manifest.json")
+        if raw:
+            try:
+                return json.loads(raw)
+            except ValueError:
+                logger.warning("Snapshot manifest is corrupt, rebuilding from scratch")
+        return {"version": 0, "entries": {}}
+
+    async def export(self, groups=SNAPSHOT_GROUPS) -> dict:
+        """Re-render the given groups, upload changed bodies and publish a new manifest"""
+        groups = set(groups)
+        async with self._lock:
+            manifest = self._load_manifest()
+            previous_entries = manifest.get("entries", {})
+            entries = {key: entry for key, entry in previous_entries.items() if entry.get("group") not in groups}
+            written = skipped = failed = 0
+
+            for group, path, params in await self.targets(groups):
+                params = {key: value for key, value in params.items() if value is not None}
+                status, body = await asgi_get(self.app, path, params)
+                if status != 200:
+                    failed += 1
+                    logger.warning(f"Snapshot skipped {path} {params}: HTTP {status}")
+                    continue
+                digest = hashlib.sha256(body).hexdigest()[:16]
+                file_name = f"v/{digest}.json"
+                if not self.store.exists(file_name):
+                    self.store.write(f"{file_name}.gz", gzip.compress(body, compresslevel=9), content_encoding="gzip")
+                    self.store.write(file_name, body)
+                    written += 1
+                else:
+                    skipped += 1
+                entries[canonical_request(path, params)] = {"file": file_name, "group": group, "bytes": len(body)}
+
+            changed = entries != previous_entries
+            if changed:
+                manifest = {
+                    "version": manifest.get("version", 0) + 1,
+                    "generated_at": datetime.utcnow().isoformat() + "Z",
+                    "entries": entries
+                }
+                manifest_body = json.dumps(manifest, separators=(",", ":")).encode()
+                self.store.write("manifest.json", manifest_body, immutable=False)
+
+                # Keep bodies still referenced by the previous manifest so clients holding it keep working
+                live = {entry["file"] for entry in entries.values()} | {entry["file"] for entry in previous_entries.values()}
+                self._prune(live)
+
+            result = {"version": manifest.get("version", 0), "written": written, "unchanged": skipped,
+                      "failed": failed, "entries": len(entries), "manifest_changed": changed}
+            logger.info(f"Snapshot export ({', '.join(sorted(groups))}): {result}")
+            return result
+
+    def _prune(self, live_files) -> None:
+        """Remove bodies no longer referenced by the current or previous manifest (local stores only)"""
+        directory = getattr(self.store, "directory", None)
+        if directory is None:
+            return
+        for path in (Path(directory) / "v").iterdir():
+            name = f"v/{path.name[:-3]}" if path.name.endswith(".gz") else f"v/{path.name}"
+            if name not in live_files:
+                path.unlink(missing_ok=True)
+
+    def schedule(self, *groups) -> None:
+        """Debounced background export of the groups touched by a write"""
+        self._pending.update(groups or SNAPSHOT_GROUPS)
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run_pending())
+
+    async def _run_pending(self) -> None:
+        while self._pending:
+            await asyncio.sleep(self.debounce_seconds)
+            groups, self._pending = self._pending, set()
+            try:
+                await self.export(groups)
+            except Exception as e:
+                logger.error(f"Snapshot export failed: {str(e)}")
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export the public API as a static JSON snapshot")
+    parser.add_argument("--out", help="Local output directory (default: SNAPSHOT_DIR or ./snapshot)")
+    parser.add_argument("--bucket", help="Write to this S3 bucket instead of a local directory")
+    parser.add_argument("--prefix", default="snapshot", help="Key prefix inside the bucket (default: snapshot)")
+    parser.add_argument("--groups", default=",".join(SNAPSHOT_GROUPS),
+                        help=f"Comma-separated groups to export (default: {','.join(SNAPSHOT_GROUPS)})")
+    parser.add_argument("--page-depth", type=int, default=5, help="List pages to export per filter (default: 5)")
+    args = parser.parse_args()
+
+    import server
+
+    if args.bucket:
+        if not server.s3_client:
+            parser.error("S3 is not configured")
+        store = S3SnapshotStore(server.s3_client, args.bucket, args.prefix)
+    else:
+        store = LocalSnapshotStore(args.out or os.environ.get("SNAPSHOT_DIR", "snapshot"))
+
+    exporter = SnapshotExporter(server.app, server.db, store, page_depth=args.page_depth)
+    groups = [group.strip() for group in args.groups.split(",") if group.strip()]
+    result = asyncio.run(exporter.export(groups))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+Object Storage
+Uploaded images live behind one interface (put/get/head/delete/list/presign) with
+two drivers: an S3 bucket, or a directory on local disk served by the API itself.
+The local driver makes uploads work without AWS credentials, for development and
+single-box deployments.
+"""
+
+import hashlib
+import hmac
+import logging
+import mimetypes
+import os
+import stat
+import time
+import uuid
+from datetime import datetime, timezone
+from email.utils import formatdate
+from pathlib import Path
+from typing import Optional
+from urllib.parse import quote, unquote, urlencode, urlparse
+
+import anyio
+from botocore.exceptions import ClientError
+from starlette.responses import Response
+
+logger = logging.getLogger(__name__)
+
+DELETE_BATCH = 1000  # S3 DeleteObjects limit per call
+LIST_PAGE_SIZE = 1000
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Uploads are photos; types a browser would render as a document (HTML, SVG) are never accepted
+IMAGE_CONTENT_TYPES = frozenset({"image/jpeg", "image/png", "image/gif", "image/webp", "image/avif"})
+
+
+class StoredObject:
+    """Metadata for one stored object"""
+
+    __slots__ = ("key", "size", "last_modified", "content_type")
+
+    def __init__(self, key: str, size: int, last_modified: datetime, content_type: Optional[str] = None):
+        self.key = key
+        self.size = size
+        self.last_modified = last_modified
+        self.content_type = content_type
+
+
+class S3Storage:
+    """Objects in an S3 bucket, uploaded by the browser straight to S3 with presigned PUTs"""
+
+    name = "s3"
+
+    def __init__(self, s3_client, bucket: str, region: str):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.region = region
+        self.hosts = (f"{bucket}.s3.{region}.amazonaws.com", f"{bucket}.s3.amazonaws.com")
+
+    def url(self, key: str) -> str:
+        return f"https://{self.hosts[0]}/{key}"
+
+    def url_variants(self, key: str) -> list:
+        """Every URL form that key_for_url maps back to key, for exact-match queries"""
+        return [f"https://{host}/{path}" for host in self.hosts for path in dict.fromkeys((key, quote(key)))]
+
+    def key_for_url(self, url: Optional[str]) -> Optional[str]:
+        """Object key for a URL that points into the bucket, or None for external images"""
+        if not url:
+            return None
+        parsed = urlparse(url)
+        if parsed.hostname not in self.hosts or not parsed.path.strip("/"):
+            return None
+        return unquote(parsed.path.lstrip("/"))
+
+    def put(self, key: str, data: bytes, content_type: str, cache_control: str = IMMUTABLE) -> None:
+        self.s3_client.put_object(
+            Bucket=self.bucket, Key=key, Body=data, ContentType=content_type, CacheControl=cache_control
+        )
+
+    def get(self, key: str) -> bytes:
+        try:
+            return self.s3_client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                raise FileNotFoundError(key)
+            raise
+
+    def head(self, key: str) -> Optional[StoredObject]:
+        try:
+            response = self.s3_client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                return None
+            raise
+        return StoredObject(key, response["ContentLength"], response["LastModified"], response.get("ContentType"))
+
+    def delete(self, keys) -> list:
+        """Delete keys with one DeleteObjects call per 1000, returning the keys S3 refused"""
+        failed_keys = []
+        for start in range(0, len(keys), DELETE_BATCH):
+            chunk = keys[start:start + DELETE_BATCH]
+            response = self.s3_client.delete_objects(
+                Bucket=self.bucket, Delete={"Objects": [{"Key": key} for key in chunk], "Quiet": True}
+            )
+            failed_keys += [error["Key"] for error in response.get("Errors", [])]
+        return failed_keys
+
+    def list(self, prefix: str = ""):
+        """Pages of StoredObjects under prefix; each page is one blocking ListObjectsV2 call"""
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix, PaginationConfig={"PageSize": LIST_PAGE_SIZE}):
+            yield [StoredObject(item["Key"], item["Size"], item["LastModified"]) for item in page.get("Contents", [])]
+
+    def presign_put(self, key: str, content_type: str, expires_in: int = 3600) -> str:
+        return self.s3_client.generate_presigned_url(
+            "put_object",
+            Params={"Bucket": self.bucket, "Key": key, "ContentType": content_type},
+            ExpiresIn=expires_in
+        )
+
+
+class LocalStorage:
+    """Objects as files under a directory; uploads and downloads go through the API's own routes"""
+
+    name = "local"
+
+    def __init__(self, directory, public_url: str, signing_key: str):
+        self.directory = Path(directory).resolve()
+        self.public_url = public_url.rstrip("/")
+        self.signing_key = signing_key.encode()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, key: str) -> Path:
+        """File for a key; keys that would escape the storage directory are rejected"""
+        path = (self.directory / key).resolve()
+        if self.directory not in path.parents:
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url}/media/{quote(key)}"
+
+    def url_variants(self, key: str) -> list:
+        return [f"{self.public_url}/media/{path}" for path in dict.fromkeys((quote(key), key))]
+
+    def key_for_url(self, url: Optional[str]) -> Optional[str]:
+        prefix = f"{self.public_url}/media/"
+        if not url or not url.startswith(prefix) or len(url) == len(prefix):
+            return None
+        return unquote(urlparse(url).path[len(urlparse(prefix).path):])
+
+    def temp_path_for(self, key: str) -> Path:
+        """Hidden file next to the key's final path, to be moved into place by put_file"""
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+
+    def put(self, key: str, data: bytes, content_type: str = None, cache_control: str = None) -> None:
+        temp_path = self.temp_path_for(key)
+        temp_path.write_bytes(data)
+        self.put_file(key, temp_path)
+
+    def put_file(self, key: str, temp_path: Path) -> None:
+        """Publish a fully written file from temp_path_for under key"""
+        os.replace(temp_path, self.path_for(key))
+
+    def get(self, key: str) -> bytes:
+        return self.path_for(key).read_bytes()
+
+    def head(self, key: str) -> Optional[StoredObject]:
+        try:
+            stat_result = self.path_for(key).stat()
+        except FileNotFoundError:
+            return None
+        return StoredObject(
+            key, stat_result.st_size, datetime.fromtimestamp(stat_result.st_mtime, timezone.utc),
+            mimetypes.guess_type(key)[0]
+        )
+
+    def delete(self, keys) -> list:
+        failed_keys = []
+        for key in keys:
+            try:
+                self.path_for(key).unlink(missing_ok=True)
+            except (OSError, ValueError):
+                failed_keys.append(key)
+        return failed_keys
+
+    def list(self, prefix: str = ""):
+        """Pages of StoredObjects whose key starts with prefix"""
+        page = []
+        start = self.directory / prefix.rsplit("/", 1)[0] if "/" in prefix else self.directory
+        for root, _, files in os.walk(start):
+            for name in files:
+                if name.startswith(".") and name.endswith(".tmp"):
+                    continue  # Upload still being written
+                path = Path(root) / name
+                key = path.relative_to(self.directory).as_posix()
+                if not key.startswith(prefix):
+                    continue
+                stat_result = path.stat()
+                page.append(StoredObject(key, stat_result.st_size, datetime.fromtimestamp(stat_result.st_mtime, timezone.utc)))
+                if len(page) == LIST_PAGE_SIZE:
+                    yield page
+                    page = []
+        if page:
+            yield page
+
+    def _signature(self, key: str, content_type: str, expires: int) -> str:
+        message = f"PUT\n{key}\n{content_type}\n{expires}".encode()
+        return hmac.new(self.signing_key, message, hashlib.sha256).hexdigest()
+
+    def presign_put(self, key: str, content_type: str, expires_in: int = 3600) -> str:
+        expires = int(time.time()) + expires_in
+        query = urlencode({"expires": expires, "signature": self._signature(key, content_type, expires)})
+        return f"{self.public_url}/api/upload/{quote(key)}?{query}"
+
+    def verify_put(self, key: str, content_type: str, expires: int, signature: str) -> bool:
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(self._signature(key, content_type, expires), signature)
+
+
+# Serving files with Range support
+
+def parse_range(header: Optional[str], size: int):
+    """(start, end) inclusive for a single-range Range header, or None to send the whole file.
+
+    Raises ValueError when the range cannot be satisfied.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None  # Multi-range requests may be answered with the full body
+    first, separator, last = header[6:].strip().partition("-")
+    if not separator or (first and not first.isdigit()) or (last and not last.isdigit()) or not (first or last):
+        return None  # Malformed headers are ignored, as RFC 9110 allows
+    if not first:
+        # Suffix range: the last N bytes
+        if int(last) == 0 or size == 0:
+            raise ValueError(header)
+        return max(0, size - int(last)), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError(header)
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+class FileRangeResponse(Response):
+    """Sends a file or one byte range of it in chunks, never holding more than one chunk in memory"""
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, path, size: int, status_code: int = 200, headers: dict = None,
+                 media_type: str = None, byte_range=None):
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.path = path
+        self.start, self.end = byte_range or (0, size - 1)
+        self.headers["content-length"] = str(max(0, self.end - self.start + 1))
+
+    async def __call__(self, scope, receive, send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        count = self.end - self.start + 1
+        if scope["method"].upper() == "HEAD" or count <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        else:
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                await file.seek(self.start)
+                remaining = count
+                while remaining > 0:
+                    chunk = await file.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+                if remaining > 0:
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def file_etag(stat_result: os.stat_result) -> str:
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def file_response(request, path, stat_result: os.stat_result = None, media_type: str = None,
+                  etag: str = None, cache_control: str = "public, max-age=3600") -> Response:
+    """Conditional, range-aware response for a file on disk"""
+    stat_result = stat_result or os.stat(path)
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise FileNotFoundError(path)
+    etag = etag or file_etag(stat_result)
+    media_type = media_type or mimetypes.guess_type(str(path))[0] or "application/octet-stream"
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "Accept-Ranges": "bytes",
+        "X-Content-Type-Options": "nosniff",
+    }
+    if media_type not in IMAGE_CONTENT_TYPES:
+        headers["Content-Disposition"] = "attachment"  # Never rendered inline on our origin
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+
+    size = stat_result.st_size
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and if_range and if_range.strip() != etag:
+        range_header = None  # The client's partial copy is of an older version
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    if byte_range is None:
+        return FileRangeResponse(path, size, headers=headers, media_type=media_type)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return FileRangeResponse(path, size, status_code=206, headers=headers, media_type=media_type, byte_range=byte_range)
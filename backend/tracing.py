@@ -0,0 +1,289 @@
+"""
+Request Tracing
+Lightweight in-process spans: one trace per sampled request with child spans for
+MongoDB commands, S3 calls and serialization. The active span travels in a
+contextvar, so it follows the request across awaits and into Motor's executor.
+"""
+
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+
+class Trace:
+    """Spans collected for one request; child spans may finish on other threads"""
+
+    def __init__(self, name: str):
+        self.trace_id = os.urandom(8).hex()
+        self.name = name
+        self.started_at = datetime.utcnow()
+        self.started = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span: "Span") -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def to_dict(self, root: "Span") -> dict:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.offset_ms)
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "timestamp": self.started_at.isoformat(),
+            "duration_ms": round(root.duration_ms, 3),
+            "attributes": root.attributes,
+            "error": root.error,
+            "spans": [span.to_dict() for span in spans if span is not root],
+        }
+
+
+class Span:
+    """One timed operation inside a trace"""
+
+    __slots__ = ("trace", "name", "span_id", "parent_id", "attributes", "offset_ms", "duration_ms", "error")
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str] = None, attributes: dict = None,
+                 started: float = None):
+        self.trace = trace
+        self.name = name
+        self.span_id = os.urandom(4).hex()
+        self.parent_id = parent_id
+        self.attributes = attributes or {}
+        self.offset_ms = ((started if started is not None else time.perf_counter()) - trace.started) * 1000
+        self.duration_ms = 0.0
+        self.error = None
+
+    def finish(self, ended: float = None) -> None:
+        ended = ended if ended is not None else time.perf_counter()
+        self.duration_ms = (ended - self.trace.started) * 1000 - self.offset_ms
+        self.trace.add(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "offset_ms": round(self.offset_ms, 3),
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+# Unsampled requests leave this unset, which turns every span() into a no-op
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class TracingMiddleware:
+    """ASGI middleware that traces a sampled fraction of HTTP requests; "X-Trace: 1" forces a trace"""
+
+    def __init__(self, app, tracer: "Tracer"):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method, path = scope["method"], scope["path"]
+        root = self.tracer.start_trace(
+            f"{method} {path}", force=(b"x-trace", b"1") in scope["headers"], method=method, path=path
+        )
+        if root is None:
+            # Unsampled requests pass straight through
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_trace_id(message) -> None:
+            if message["type"] == "http.response.start":
+                root.attributes["status"] = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (b"x-trace-id", root.trace.trace_id.encode())]}
+            await send(message)
+
+        token = current_span.set(root)
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        except Exception as e:
+            root.error = f"{type(e).__name__}: {str(e)}"
+            raise
+        finally:
+            current_span.reset(token)
+            self.tracer.finish_trace(root)
+
+
+class InMemoryExporter:
+    """Keeps the most recent traces for the monitoring endpoint"""
+
+    def __init__(self, max_traces: int = 200):
+        self.traces = deque(maxlen=max_traces)
+
+    def export(self, trace: dict) -> None:
+        self.traces.append(trace)
+
+    def recent(self, limit: int = 20, min_ms: float = 0.0, path: str = None) -> list:
+        matches = [
+            trace for trace in reversed(self.traces)
+            if trace["duration_ms"] >= min_ms and (not path or path in trace["name"])
+        ]
+        return matches[:limit]
+
+
+class FileExporter:
+    """Appends traces as JSON lines from a background thread so requests never wait on disk"""
+
+    def __init__(self, path):
+        self.path = path
+        self._queue = queue.Queue(maxsize=10000)
+        self._thread = threading.Thread(target=self._write_loop, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, trace: dict) -> None:
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            pass  # Drop traces rather than slow requests down
+
+    def _write_loop(self) -> None:
+        while True:
+            traces = [self._queue.get()]
+            while not self._queue.empty() and len(traces) < 500:
+                traces.append(self._queue.get_nowait())
+            try:
+                with open(self.path, "a") as f:
+                    for trace in traces:
+                        f.write(json.dumps(trace, default=str) + "\n")
+            except OSError as e:
+                logger.warning(f"Could not write traces to {self.path}: {str(e)}")
+
+
+class Tracer:
+    """Head-sampled tracer; a request is traced start to finish or not at all"""
+
+    def __init__(self, sample_rate: float = 0.01, exporters=None):
+        self.sample_rate = sample_rate
+        self.exporters = list(exporters or [])
+        self.started = 0
+        self.sampled = 0
+
+    def start_trace(self, name: str, force: bool = False, **attributes) -> Optional[Span]:
+        """Root span for a new trace, or None when the request is not sampled"""
+        self.started += 1
+        if not force and (self.sample_rate <= 0 or random.random() >= self.sample_rate):
+            return None
+        self.sampled += 1
+        trace = Trace(name)
+        return Span(trace, name, attributes=attributes, started=trace.started)
+
+    def finish_trace(self, root: Span) -> None:
+        root.duration_ms = (time.perf_counter() - root.trace.started) * 1000
+        exported = root.trace.to_dict(root)
+        for exporter in self.exporters:
+            try:
+                exporter.export(exported)
+            except Exception as e:
+                logger.warning(f"Trace export failed: {str(e)}")
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Child span of the active span; does nothing outside a sampled trace"""
+        parent = current_span.get()
+        if parent is None:
+            yield None
+            return
+        span = Span(parent.trace, name, parent.span_id, attributes)
+        token = current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.error = f"{type(e).__name__}: {str(e)}"
+            raise
+        finally:
+            current_span.reset(token)
+            span.finish()
+
+    def record(self, name: str, started: float, ended: float, error: str = None, **attributes) -> None:
+        """Add an already finished operation as a child of the active span"""
+        parent = current_span.get()
+        if parent is None:
+            return
+        span = Span(parent.trace, name, parent.span_id, attributes, started=started)
+        span.error = error
+        span.finish(ended)
+
+    def stats(self) -> dict:
+        return {"sample_rate": self.sample_rate, "requests": self.started, "sampled": self.sampled}
+
+
+class TracingCommandListener(monitoring.CommandListener):
+    """Turns MongoDB commands issued inside a sampled trace into child spans"""
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        if current_span.get() is None:
+            return
+        collection = event.command.get(event.command_name)
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (
+                time.perf_counter(), collection if isinstance(collection, str) else None
+            )
+
+    def succeeded(self, event):
+        self._finished(event, None)
+
+    def failed(self, event):
+        self._finished(event, str(event.failure.get("errmsg", "failed")) if isinstance(event.failure, dict) else "failed")
+
+    def _finished(self, event, error) -> None:
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        started, collection = pending
+        self.tracer.record(
+            f"mongo.{event.command_name}", started, started + event.duration_micros / 1e6,
+            error=error, collection=collection
+        )
+
+
+def instrument_s3(s3_client, tracer: Tracer) -> None:
+    """Record every S3 API call made through this boto3 client as a span"""
+
+    def before_call(model, params, context, **kwargs):
+        if current_span.get() is not None:
+            context["trace_started"] = (time.perf_counter(), model.name)
+
+    def after_call(context, http_response=None, exception=None, **kwargs):
+        # after-call-error carries no operation model, so the name comes from before-call
+        pending = context.pop("trace_started", None)
+        if pending is None:
+            return
+        started, operation = pending
+        status = getattr(http_response, "status_code", None)
+        error = f"{type(exception).__name__}: {str(exception)}" if exception else (
+            f"HTTP {status}" if status and status >= 300 else None
+        )
+        tracer.record(f"s3.{operation}", started, time.perf_counter(), error=error, status=status)
+
+    # Parameter build is the first event of an API call, so the span covers signing and the round trip
+    s3_client.meta.events.register("before-parameter-build.s3", before_call)
+    s3_client.meta.events.register("after-call.s3", after_call)
+    s3_client.meta.events.register("after-call-error.s3", after_call)
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from "react";
 import { useParams, Link } from "react-router-dom";
 import axios from "axios";
+import { proxiedImage } from "../utils/images";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -36,7 +37,7 @@ const ArticleDetail = () => {
   const fetchRelatedArticles = async () => {
     try {
       if (article.tags.length > 0) {
-        const response = await axios.get(`${API}/articles?tag=${article.tags[0]}&limit=3`);
+        const response = await axios.get(`${API}/articles?tag=${article.tags[0]}&limit=3&fields=summary`);
         const filtered = response.data.filter(a => a.id !== article.id);
         setRelatedArticles(filtered);
       }
@@ -155,7 +156,7 @@ const ArticleDetail = () => {
           {/* Featured Image */}
           {article.featured_image && (
             <img
-              src={article.featured_image}
+              src={proxiedImage(article.featured_image)}
               alt={article.title}
               className="w-full h-32 md:h-48 object-cover rounded-lg mb-8"
             />
@@ -230,7 +231,7 @@ const ArticleDetail = () => {
                 <div key={article.id} className="bg-gray-900 rounded-lg overflow-hidden hover:transform hover:scale-105 transition-all duration-300">
                   {article.featured_image && (
                     <img
-                      src={article.featured_image}
+                      src={proxiedImage(article.featured_image)}
                       alt={article.title}
                       className="w-full h-48 object-cover"
                     />
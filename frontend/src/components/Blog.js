@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from "react";
 import { useParams, Link } from "react-router-dom";
 import axios from "axios";
+import { proxiedImage } from "../utils/images";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -19,7 +20,7 @@ const Blog = () => {
 
   const fetchArticles = async () => {
     try {
-      let url = `${API}/articles?limit=10`;
+      let url = `${API}/articles?limit=10&fields=summary`;
       if (searchTerm) {
         url += `&search=${encodeURIComponent(searchTerm)}`;
       }
@@ -123,7 +124,7 @@ const Blog = () => {
             <article key={article.id} className="bg-gray-800 rounded-lg overflow-hidden hover:transform hover:scale-105 transition-all duration-300">
               {article.featured_image && (
                 <img
-                  src={article.featured_image}
+                  src={proxiedImage(article.featured_image)}
                   alt={article.title}
                   className="w-full h-48 object-cover"
                 />
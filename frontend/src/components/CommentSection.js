@@ -15,6 +15,32 @@ const CommentSection = ({ photoId }) => {
     }
   }, [photoId]);
 
+  // New comments from other visitors are pushed over Server-Sent Events
+  useEffect(() => {
+    if (!photoId || typeof EventSource === "undefined") {
+      return undefined;
+    }
+    const source = new EventSource(`${API}/photos/${photoId}/comments/stream`);
+    // The server replays what a reconnect missed only as far as its backlog; reload to close any gap
+    let opened = false;
+    source.onopen = () => {
+      if (opened) {
+        fetchComments();
+      }
+      opened = true;
+    };
+    source.addEventListener("comment", (event) => {
+      addComment(JSON.parse(event.data));
+    });
+    return () => source.close();
+  }, [photoId]);
+
+  const addComment = (comment) => {
+    setComments((current) =>
+      current.some((existing) => existing.id === comment.id) ? current : [...current, comment]
+    );
+  };
+
   const fetchComments = async () => {
     try {
       const response = await axios.get(`${API}/photos/${photoId}/comments`);
@@ -36,7 +62,7 @@ const CommentSection = ({ photoId }) => {
         comment: newComment.comment
       });
       
-      setComments([...comments, response.data]);
+      addComment(response.data);
       setNewComment({ name: "", comment: "" });
     } catch (error) {
       console.error("Error posting comment:", error);
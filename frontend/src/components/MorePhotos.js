@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from "react";
 import axios from "axios";
+import { proxiedImage } from "../utils/images";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -18,7 +19,7 @@ const MorePhotos = () => {
 
   const fetchPhotos = async () => {
     try {
-      let url = `${API}/gallery?limit=50`;
+      let url = `${API}/gallery?limit=50&fields=summary`;
       if (selectedCategory) {
         url += `&category=${encodeURIComponent(selectedCategory)}`;
       }
@@ -137,7 +138,7 @@ const MorePhotos = () => {
               onClick={() => openLightbox(photo)}
             >
               <img
-                src={photo.image_url}
+                src={proxiedImage(photo.image_url)}
                 alt={photo.title}
                 className="w-full h-full object-cover group-hover:opacity-80 transition-opacity"
                 loading="lazy"
@@ -202,7 +203,7 @@ const MorePhotos = () => {
 
             {/* Image */}
             <img
-              src={selectedPhoto.image_url}
+              src={proxiedImage(selectedPhoto.image_url)}
               alt={selectedPhoto.title}
               className="max-w-full max-h-full object-contain"
             />
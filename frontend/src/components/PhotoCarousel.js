@@ -1,4 +1,5 @@
 import React from "react";
+import { proxiedImage } from "../utils/images";
 
 const PhotoCarousel = ({ photos, currentIndex, onIndexChange }) => {
   const currentPhoto = photos[currentIndex];
@@ -31,7 +32,7 @@ const PhotoCarousel = ({ photos, currentIndex, onIndexChange }) => {
         <div className="relative bg-black rounded-lg overflow-hidden shadow-2xl border-2 border-orange-500/50 flex-1 max-w-full">
           <div className="w-full h-[300px] sm:h-[500px] lg:h-[700px] flex items-center justify-center bg-gradient-to-br from-black to-gray-900">
             <img 
-              src={currentPhoto.image_url} 
+              src={proxiedImage(currentPhoto.image_url)} 
               alt={currentPhoto.title}
               className="max-w-full max-h-full object-contain"
               style={{
@@ -1,4 +1,5 @@
 import React, { useState, useEffect } from "react";
+import { proxiedImage } from "../utils/images";
 
 const PhotoTweaker = () => {
   const [settings, setSettings] = useState({
@@ -81,7 +82,7 @@ const PhotoTweaker = () => {
           <div className="bg-gray-800 rounded-lg p-6">
             <h3 className="text-xl font-semibold mb-4">Original</h3>
             <img 
-              src={samplePhoto}
+              src={proxiedImage(samplePhoto)}
               alt="Original"
               className="w-full h-64 object-cover rounded-lg"
             />
@@ -89,7 +90,7 @@ const PhotoTweaker = () => {
           <div className="bg-gray-800 rounded-lg p-6">
             <h3 className="text-xl font-semibold mb-4">Modified</h3>
             <img 
-              src={samplePhoto}
+              src={proxiedImage(samplePhoto)}
               alt="Modified"
               className="w-full h-64 object-cover rounded-lg transition-all duration-300"
               style={previewStyle}
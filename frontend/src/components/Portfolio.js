@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from "react";
 import { Link } from "react-router-dom";
 import axios from "axios";
+import { proxiedImage } from "../utils/images";
 import PhotoCarousel from "./PhotoCarousel";
 import CommentSection from "./CommentSection";
 import SEOHead from "./SEOHead";
@@ -19,46 +20,41 @@ const Portfolio = () => {
   const defaultBackgroundImage = "https://images.unsplash.com/photo-1520166012956-add9ba0835cb?crop=entropy&cs=srgb&fm=jpg&ixid=M3w3NDk1NzZ8MHwxfHNlYXJjaHwyfHxlbGVjdHJpYyUyMGd1aXRhcnxlbnwwfHx8fDE3NTI5NjAxMzl8MA&ixlib=rb-4.1.0&q=85";
 
   useEffect(() => {
-    Promise.all([
-      fetchPhotos(),
-      fetchPortfolioSettings(),
-      fetchSeoSettings(),
-      initializeSampleData()
-    ]).then(() => {
+    fetchBootstrap().then(() => {
       setLoading(false);
     });
   }, []);
 
-  const fetchPhotos = async () => {
+  // Settings, SEO and photos arrive together in one request
+  const fetchBootstrap = async () => {
     try {
-      const response = await axios.get(`${API}/photos`);
-      setPhotos(response.data);
+      const response = await axios.get(`${API}/bootstrap`, {
+        params: { include: "portfolio_settings,seo_settings,photos" }
+      });
+      setPortfolioSettings(response.data.portfolio_settings);
+      setSeoSettings(response.data.seo_settings);
+      setPhotos(response.data.photos);
+      if (response.data.photos.length === 0) {
+        await initializeSampleData();
+      }
     } catch (error) {
-      console.error("Error fetching photos:", error);
+      console.error("Error fetching portfolio data:", error);
     }
   };
 
-  const fetchPortfolioSettings = async () => {
-    try {
-      const response = await axios.get(`${API}/portfolio-settings`);
-      setPortfolioSettings(response.data);
-    } catch (error) {
-      console.error("Error fetching portfolio settings:", error);
-    }
-  };
-
-  const fetchSeoSettings = async () => {
+  const fetchPhotos = async () => {
     try {
-      const response = await axios.get(`${API}/seo-settings`);
-      setSeoSettings(response.data);
+      const response = await axios.get(`${API}/photos`);
+      setPhotos(response.data);
     } catch (error) {
-      console.error("Error fetching SEO settings:", error);
+      console.error("Error fetching photos:", error);
     }
   };
 
   const initializeSampleData = async () => {
     try {
       await axios.post(`${API}/init-sample-data`);
+      await fetchPhotos();
     } catch (error) {
       console.error("Error initializing sample data:", error);
     }
@@ -105,7 +101,7 @@ const Portfolio = () => {
           <div className="mb-8">
             {/* Dynamic Avatar */}
             <img 
-              src={getCurrentAvatar()}
+              src={proxiedImage(getCurrentAvatar())}
               alt="Viet"
               className="w-48 h-48 rounded-full mx-auto mb-4 border-4 border-orange-400 shadow-xl transform hover:scale-110 transition-transform object-cover"
             />
@@ -12,6 +12,7 @@ const AdminDashboard = () => {
     photos: 0,
     gallery: 0,
     articles: 0,
+    drafts: 0,
     comments: 0
   });
   const [loading, setLoading] = useState(true);
@@ -22,17 +23,15 @@ const AdminDashboard = () => {
 
   const loadStats = async () => {
     try {
-      const [photosRes, galleryRes, articlesRes] = await Promise.all([
-        axios.get(`${API}/photos`),
-        axios.get(`${API}/gallery`),
-        axios.get(`${API}/articles`)
-      ]);
+      // Counts come from the server; the dashboard never downloads the collections themselves
+      const response = await axios.get(`${API}/admin/stats`);
 
       setStats({
-        photos: photosRes.data.length,
-        gallery: galleryRes.data.length,
-        articles: articlesRes.data.length,
-        comments: 0 // We'll implement comment counting later
+        photos: response.data.photos.total,
+        gallery: response.data.gallery.total,
+        articles: response.data.articles.total,
+        drafts: response.data.articles.drafts,
+        comments: response.data.comments.total
       });
     } catch (error) {
       console.error('Error loading stats:', error);
@@ -120,6 +119,9 @@ const AdminDashboard = () => {
                 <p className="text-2xl font-bold text-orange-300">
                   {loading ? '...' : stats.articles}
                 </p>
+                {!loading && stats.drafts > 0 && (
+                  <p className="text-xs text-orange-200">{stats.drafts} drafts</p>
+                )}
               </div>
             </div>
           </div>
@@ -17,7 +17,7 @@ const BlogManager = () => {
 
   const loadArticles = async () => {
     try {
-      const response = await axios.get(`${API}/articles`);
+      const response = await axios.get(`${API}/articles?fields=summary`);
       setArticles(response.data);
     } catch (error) {
       console.error('Error loading articles:', error);
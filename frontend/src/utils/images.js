@@ -0,0 +1,19 @@
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+
+// Hosts the backend's caching proxy serves; keep in step with IMAGE_PROXY_HOSTS on the backend
+const PROXY_HOSTS = (process.env.REACT_APP_IMAGE_PROXY_HOSTS || "images.unsplash.com")
+  .split(",")
+  .map((host) => host.trim())
+  .filter(Boolean);
+
+// Route images from proxied hosts through the backend's cache (/img/<host>/<path>)
+export const proxiedImage = (url) => {
+  if (!BACKEND_URL || !url) {
+    return url;
+  }
+  const match = /^https?:\/\/([^/?#]+)(.*)$/i.exec(url);
+  if (!match || !PROXY_HOSTS.includes(match[1].toLowerCase())) {
+    return url;
+  }
+  return `${BACKEND_URL}/img/${match[1]}${match[2]}`;
+};
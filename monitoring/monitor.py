@@ -8,18 +8,93 @@ import requests
 import json
 import time
 import os
+import math
+import random
+import asyncio
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List
+from timeseries import TimeSeriesStore, flatten_metrics
+
+# Endpoints real visitors hit; {slug}, {category} and {search} are filled in per request
+DEFAULT_PROBES = [
+    {"name": "gallery_page_1", "path": "/api/gallery", "params": {"limit": 20}},
+    {"name": "gallery_page_3", "path": "/api/gallery", "params": {"limit": 20, "skip": 40}},
+    {"name": "gallery_category", "path": "/api/gallery", "params": {"limit": 20, "category": "{category}"}},
+    {"name": "articles", "path": "/api/articles", "params": {"limit": 10}},
+    {"name": "article_slug", "path": "/api/articles/slug/{slug}", "params": {}},
+    {"name": "article_search", "path": "/api/articles", "params": {"limit": 10, "search": "{search}"}},
+    {"name": "portfolio_settings", "path": "/api/portfolio-settings", "params": {}},
+    {"name": "bootstrap", "path": "/api/bootstrap", "params": {"include": "portfolio_settings,seo_settings,photos"}},
+]
+DEFAULT_SEARCH_TERMS = ["portrait", "fujifilm", "street", "lighting", "film"]
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram; percentiles are accurate to within about 5%"""
+    
+    GROWTH = 1.05
+    FLOOR_MS = 0.1
+    
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+    
+    def record(self, latency_ms: float) -> None:
+        index = max(0, int(math.log(max(latency_ms, self.FLOOR_MS) / self.FLOOR_MS, self.GROWTH)))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+    
+    def record_error(self) -> None:
+        self.errors += 1
+    
+    def merge(self, other: "LatencyHistogram") -> None:
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.errors += other.errors
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+    
+    def percentile(self, fraction: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                # Geometric midpoint of the bucket
+                return min(self.FLOOR_MS * self.GROWTH ** (index + 0.5), self.max_ms)
+        return self.max_ms
+    
+    def summary(self) -> Dict[str, Any]:
+        attempts = self.count + self.errors
+        return {
+            "requests": attempts,
+            "errors": self.errors,
+            "error_rate": round(self.errors / attempts, 4) if attempts else 0.0,
+            "mean_ms": round(self.total_ms / self.count, 1) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.50), 1),
+            "p95_ms": round(self.percentile(0.95), 1),
+            "p99_ms": round(self.percentile(0.99), 1),
+            "max_ms": round(self.max_ms, 1),
+        }
 
 class RailwayMonitor:
-    def __init__(self, backend_url: str):
+    def __init__(self, backend_url: str, data_dir: str = "railway_metrics"):
         self.backend_url = backend_url.rstrip('/')
-        self.log_file = "railway_usage_log.json"
+        self.store = TimeSeriesStore(data_dir)
         self.alert_thresholds = {
             'cpu': 80,
             'memory': 80,
             'connections': 100,
-            'cost': 4.0  # Alert at $4 (80% of free tier)
+            'cost': 4.0,  # Alert at $4 (80% of free tier)
+            'p95_ms': 1500,  # Default p95 budget for probed endpoints
+            'error_rate': 0.01
         }
     
     def check_health(self) -> Dict[str, Any]:
@@ -50,15 +125,10 @@ class RailwayMonitor:
             return {"error": str(e)}
     
     def log_metrics(self, metrics: Dict[str, Any]) -> None:
-        """Log metrics to file"""
-        log_entry = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "metrics": metrics
-        }
-        
+        """Record the numeric metrics in the time-series store and roll up closed intervals"""
         try:
-            with open(self.log_file, "a") as f:
-                f.write(json.dumps(log_entry) + "\n")
+            self.store.append(time.time(), flatten_metrics(metrics))
+            self.store.rollup()
         except Exception as e:
             print(f"❌ Failed to log metrics: {e}")
     
@@ -178,20 +248,196 @@ class RailwayMonitor:
         except KeyboardInterrupt:
             print("\n🛑 Monitoring stopped by user")
 
+class SyntheticProber:
+    """Probes real read endpoints on one or more deployments concurrently and tracks latency"""
+    
+    def __init__(self, targets: List[str], probes: List[Dict[str, Any]] = None, budgets: Dict[str, float] = None,
+                 default_budget_ms: float = 1500, max_error_rate: float = 0.01, concurrency: int = 10,
+                 samples: int = 5, timeout: float = 10.0, search_terms: List[str] = None):
+        self.targets = [target.rstrip('/') for target in targets]
+        self.probes = probes or DEFAULT_PROBES
+        self.budgets = budgets or {}
+        self.default_budget_ms = default_budget_ms
+        self.max_error_rate = max_error_rate
+        self.concurrency = concurrency
+        self.samples = samples
+        self.timeout = timeout
+        self.search_terms = search_terms or DEFAULT_SEARCH_TERMS
+        self.totals = {}
+        self.rng = random.Random()
+    
+    async def _discover(self, client, target: str) -> Dict[str, list]:
+        """Real slugs and categories to substitute into probe paths"""
+        values = {"slug": [], "category": [], "search": self.search_terms}
+        try:
+            response = await client.get(f"{target}/api/articles", params={"limit": 50})
+            if response.status_code == 200:
+                values["slug"] = [article["slug"] for article in response.json() if article.get("slug")]
+            response = await client.get(f"{target}/api/gallery/categories/all")
+            if response.status_code == 200:
+                values["category"] = [item["category"] for item in response.json() if item.get("category")]
+        except Exception as e:
+            print(f"⚠️  Could not discover probe values on {target}: {e}")
+        return values
+    
+    def _fill(self, template: str, values: Dict[str, list]):
+        for name, choices in values.items():
+            placeholder = "{" + name + "}"
+            if placeholder in template:
+                if not choices:
+                    return None
+                template = template.replace(placeholder, str(self.rng.choice(choices)))
+        return template
+    
+    async def _probe(self, client, semaphore, target: str, probe: Dict[str, Any], values, histogram) -> None:
+        path = self._fill(probe["path"], values)
+        params = {key: self._fill(str(value), values) for key, value in probe.get("params", {}).items()}
+        if path is None or None in params.values():
+            return  # Nothing to substitute on this deployment (e.g. no published articles)
+        
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.get(f"{target}{path}", params=params)
+                latency_ms = (time.perf_counter() - started) * 1000
+                if response.status_code >= 400:
+                    histogram.record_error()
+                else:
+                    histogram.record(latency_ms)
+            except Exception:
+                histogram.record_error()
+    
+    async def run_round(self) -> Dict[str, Dict[str, LatencyHistogram]]:
+        """Probe every endpoint on every target `samples` times; returns histograms per target and endpoint"""
+        try:
+            import httpx
+        except ImportError:
+            raise SystemExit("❌ Probe mode needs httpx: pip install httpx")
+        
+        semaphore = asyncio.Semaphore(self.concurrency)
+        limits = httpx.Limits(max_connections=self.concurrency)
+        results = {target: {probe["name"]: LatencyHistogram() for probe in self.probes} for target in self.targets}
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits, follow_redirects=True) as client:
+            discovered = await asyncio.gather(*(self._discover(client, target) for target in self.targets))
+            tasks = [
+                self._probe(client, semaphore, target, probe, values, results[target][probe["name"]])
+                for target, values in zip(self.targets, discovered)
+                for probe in self.probes
+                for _ in range(self.samples)
+            ]
+            self.rng.shuffle(tasks)
+            await asyncio.gather(*tasks)
+        
+        for target, histograms in results.items():
+            for name, histogram in histograms.items():
+                self.totals.setdefault((target, name), LatencyHistogram()).merge(histogram)
+        return results
+    
+    def budget_for(self, name: str) -> float:
+        return self.budgets.get(name, self.default_budget_ms)
+    
+    def check_budgets(self, results: Dict[str, Dict[str, LatencyHistogram]]) -> list:
+        """Alerts for endpoints whose p95 or error rate is over budget"""
+        alerts = []
+        for target, histograms in results.items():
+            for name, histogram in histograms.items():
+                summary = histogram.summary()
+                if not summary["requests"]:
+                    continue
+                budget = self.budget_for(name)
+                if summary["p95_ms"] > budget:
+                    alerts.append(f"🐢 {target} {name}: p95 {summary['p95_ms']:.0f}ms over {budget:.0f}ms budget")
+                if summary["error_rate"] > self.max_error_rate:
+                    alerts.append(f"💥 {target} {name}: {summary['error_rate']:.1%} errors "
+                                  f"({summary['errors']}/{summary['requests']})")
+        return alerts
+    
+    def summarize(self, results: Dict[str, Dict[str, LatencyHistogram]]) -> Dict[str, Any]:
+        return {
+            target: {name: histogram.summary() for name, histogram in histograms.items()}
+            for target, histograms in results.items()
+        }
+    
+    def print_report(self, results: Dict[str, Dict[str, LatencyHistogram]]) -> None:
+        print("\n" + "="*78)
+        print(f"⏱️  Synthetic probes - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        for target, histograms in results.items():
+            print("="*78)
+            print(f"🌐 {target}")
+            print(f"{'endpoint':<22}{'req':>6}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'budget':>10}  run p95")
+            for name, histogram in histograms.items():
+                summary = histogram.summary()
+                total = self.totals[(target, name)].summary()
+                flag = "❌" if summary["requests"] and summary["p95_ms"] > self.budget_for(name) else "  "
+                print(f"{name:<22}{summary['requests']:>6}{summary['errors']:>5}{summary['p50_ms']:>10.1f}"
+                      f"{summary['p95_ms']:>10.1f}{summary['p99_ms']:>10.1f}{self.budget_for(name):>10.0f}"
+                      f"{flag} {total['p95_ms']:.1f}")
+        print("="*78)
+
+def load_probe_config(path: str) -> Dict[str, Any]:
+    """Probe config file: {"probes": [...], "budgets": {"article_slug": 800}, "search_terms": [...]}"""
+    with open(path) as f:
+        return json.load(f)
+
+def run_probes(monitor: RailwayMonitor, prober: SyntheticProber, continuous: bool, interval: int) -> None:
+    """Run probe rounds, log their percentiles and notify on budget breaches"""
+    print(f"🎯 Probing {len(prober.probes)} endpoints on {len(prober.targets)} deployment(s), "
+          f"{prober.samples} samples each, concurrency {prober.concurrency}")
+    try:
+        while True:
+            results = asyncio.run(prober.run_round())
+            prober.print_report(results)
+            monitor.log_metrics({"probes": prober.summarize(results)})
+            alerts = prober.check_budgets(results)
+            if alerts:
+                print("\n🚨 Alerts:")
+                for alert in alerts:
+                    print(f"   {alert}")
+                monitor.send_notifications(alerts)
+            else:
+                print("\n✅ All endpoints within budget")
+            if not continuous:
+                break
+            print(f"\n⏸️  Waiting {interval}s for next round...")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\n🛑 Probing stopped by user")
+
 def main():
     """Main function"""
     import argparse
     
     parser = argparse.ArgumentParser(description="Railway Usage Monitor")
-    parser.add_argument("--url", required=True, help="Backend URL (e.g., https://your-app.railway.app)")
+    parser.add_argument("--url", required=True, action="append",
+                        help="Backend URL (e.g., https://your-app.railway.app); repeat to probe several deployments")
     parser.add_argument("--continuous", action="store_true", help="Run continuously")
     parser.add_argument("--interval", type=int, default=300, help="Check interval in seconds (default: 300)")
+    parser.add_argument("--data-dir", default="railway_metrics",
+                        help="Time-series store directory (default: railway_metrics); query it with timeseries.py")
+    parser.add_argument("--probe", action="store_true", help="Probe real endpoints and check p95 latency budgets")
+    parser.add_argument("--probe-config", help="JSON file with probes, per-endpoint budgets and search terms")
+    parser.add_argument("--samples", type=int, default=5, help="Requests per endpoint per round (default: 5)")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent probe requests (default: 10)")
+    parser.add_argument("--p95-budget", type=float, help="Default p95 budget in ms (default: 1500)")
     
     args = parser.parse_args()
     
-    monitor = RailwayMonitor(args.url)
+    monitor = RailwayMonitor(args.url[0], args.data_dir)
     
-    if args.continuous:
+    if args.probe:
+        config = load_probe_config(args.probe_config) if args.probe_config else {}
+        prober = SyntheticProber(
+            args.url,
+            probes=config.get("probes"),
+            budgets=config.get("budgets"),
+            default_budget_ms=args.p95_budget or config.get("default_budget_ms", monitor.alert_thresholds['p95_ms']),
+            max_error_rate=config.get("max_error_rate", monitor.alert_thresholds['error_rate']),
+            concurrency=args.concurrency,
+            samples=args.samples,
+            search_terms=config.get("search_terms")
+        )
+        run_probes(monitor, prober, args.continuous, args.interval)
+    elif args.continuous:
         monitor.run_continuous(args.interval)
     else:
         monitor.run_once()
@@ -42,7 +42,7 @@ fi
 echo "🐍 Setting up Python environment..."
 python3 -m venv venv
 source venv/bin/activate
-pip install requests
+pip install requests httpx numpy
 
 # Create config file
 echo "⚙️  Creating monitoring configuration..."
@@ -56,7 +56,7 @@ cat > config.json << EOF
         "cost": 4.0
     },
     "monitoring_interval": 300,
-    "log_file": "railway_usage_log.json"
+    "data_dir": "railway_metrics"
 }
 EOF
 
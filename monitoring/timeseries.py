@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Monitor Time-Series Store
+Compact columnar storage for the numbers RailwayMonitor collects. Every series is
+a set of fixed-width binary files that NumPy reads in one call:
+
+    <dir>/raw/<series>/<YYYY-MM-DD>.bin    8-byte (time, value) records, one file per day
+    <dir>/1m/<series>/<YYYY-MM>.bin        per-minute rollups (count, min, max, mean, p95)
+    <dir>/1h/<series>/<YYYY-MM>.bin        per-hour rollups, kept forever
+
+Closed files are zlib-compressed to .bin.z. Raw and minute data expire after their
+retention period, so the store stays small while hourly history covers months.
+
+Usage:
+    python timeseries.py --dir railway_metrics series
+    python timeseries.py --dir railway_metrics query health.response_time --since 90d --percentiles 50,95,99
+    python timeseries.py --dir railway_metrics trend metrics.usage.cpu_percent --since 30d
+    python timeseries.py --dir railway_metrics import railway_usage_log.json
+"""
+
+import json
+import os
+import re
+import time
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, List
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+RAW_DTYPE = np.dtype([("t", "<u4"), ("v", "<f4")])
+ROLLUP_DTYPE = np.dtype([("t", "<u4"), ("count", "<u4"), ("min", "<f4"), ("max", "<f4"),
+                         ("mean", "<f4"), ("p95", "<f4")])
+TIERS = {"1m": 60, "1h": 3600}
+
+
+def flatten_metrics(metrics: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Numeric leaves of a nested metrics dict as dotted series names"""
+    values = {}
+    for key, value in metrics.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            values.update(flatten_metrics(value, f"{name}."))
+        elif isinstance(value, bool):
+            values[name] = float(value)
+        elif isinstance(value, (int, float)):
+            values[name] = float(value)
+        elif key == "status" and isinstance(value, str):
+            values[f"{prefix}up"] = 1.0 if value == "healthy" else 0.0
+    return values
+
+
+def parse_since(value: str) -> float:
+    """'90d', '12h', '30m' or an ISO date -> unix timestamp"""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([mhdw])", value.strip())
+    if match:
+        seconds = {"m": 60, "h": 3600, "d": 86400, "w": 604800}[match.group(2)]
+        return time.time() - float(match.group(1)) * seconds
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp()
+
+
+def _day(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d")
+
+
+def _month(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m")
+
+
+def _period_bounds(period: str):
+    """Unix [start, end) of a YYYY-MM-DD or YYYY-MM file period"""
+    if len(period) == 10:
+        start = datetime.strptime(period, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        return start.timestamp(), start.timestamp() + 86400
+    start = datetime.strptime(period, "%Y-%m").replace(tzinfo=timezone.utc)
+    end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+    return start.timestamp(), end.timestamp()
+
+
+def rollup_records(raw: np.ndarray, bucket_seconds: int) -> np.ndarray:
+    """Vectorized per-bucket count/min/max/mean/p95 over raw (t, v) records"""
+    if not len(raw):
+        return np.zeros(0, dtype=ROLLUP_DTYPE)
+    buckets = raw["t"] // bucket_seconds
+    order = np.lexsort((raw["v"], buckets))
+    buckets = buckets[order]
+    values = raw["v"][order].astype(np.float64)
+
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    counts = np.diff(np.r_[starts, len(values)])
+    out = np.zeros(len(starts), dtype=ROLLUP_DTYPE)
+    out["t"] = buckets[starts] * bucket_seconds
+    out["count"] = counts
+    # Values are sorted inside each bucket, so min/max/p95 are plain index lookups
+    out["min"] = values[starts]
+    out["max"] = values[starts + counts - 1]
+    out["mean"] = np.add.reduceat(values, starts) / counts
+    out["p95"] = values[starts + np.floor(0.95 * (counts - 1)).astype(np.int64)]
+    return out
+
+
+class TimeSeriesStore:
+    """Append-only binary time-series files with rotation, compression and rollups"""
+
+    def __init__(self, directory, raw_retention_days: int = 14, minute_retention_days: int = 90):
+        self.directory = Path(directory)
+        self.raw_retention_days = raw_retention_days
+        self.minute_retention_days = minute_retention_days
+        self.state_path = self.directory / "state.json"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.state = self._load_state()
+
+    def _load_state(self) -> Dict[str, Dict[str, int]]:
+        try:
+            return json.loads(self.state_path.read_text())
+        except (OSError, ValueError):
+            return {tier: {} for tier in TIERS}
+
+    def _save_state(self) -> None:
+        temp_path = self.state_path.with_suffix(".tmp")
+        temp_path.write_text(json.dumps(self.state))
+        os.replace(temp_path, self.state_path)
+
+    def _series_dir(self, tier: str, series: str) -> Path:
+        return self.directory / tier / quote(series, safe="._-")
+
+    def series(self) -> List[str]:
+        raw_dir = self.directory / "raw"
+        hour_dir = self.directory / "1h"
+        names = {path.name for path in raw_dir.iterdir()} if raw_dir.exists() else set()
+        names |= {path.name for path in hour_dir.iterdir()} if hour_dir.exists() else set()
+        return sorted(unquote(name) for name in names)
+
+    # Writing
+
+    def append(self, timestamp: float, values: Dict[str, float]) -> None:
+        """Append one sample per series at the given unix time"""
+        t = int(timestamp)
+        for series, value in values.items():
+            record = np.array([(t, value)], dtype=RAW_DTYPE)
+            self._append_records("raw", series, _day(t), record)
+
+    def append_many(self, series: str, records: np.ndarray) -> None:
+        """Bulk append raw records for one series, split into day files"""
+        records = np.sort(records, order="t")
+        days = np.array([_day(int(t)) for t in records["t"]])
+        for day in np.unique(days):
+            self._append_records("raw", series, str(day), records[days == day])
+
+    def _append_records(self, tier: str, series: str, period: str, records: np.ndarray) -> None:
+        directory = self._series_dir(tier, series)
+        directory.mkdir(parents=True, exist_ok=True)
+        with open(directory / f"{period}.bin", "ab") as f:
+            f.write(records.tobytes())
+
+    # Reading
+
+    def _read_file(self, path: Path, dtype: np.dtype) -> np.ndarray:
+        data = path.read_bytes()
+        if path.suffix == ".z":
+            data = zlib.decompress(data)
+        return np.frombuffer(data, dtype=dtype)
+
+    def read(self, series: str, start: float = 0, end: float = None, tier: str = "raw") -> np.ndarray:
+        """Records of one tier in [start, end), read only from files overlapping the range"""
+        end = end if end is not None else time.time() + 1
+        dtype = RAW_DTYPE if tier == "raw" else ROLLUP_DTYPE
+        directory = self._series_dir(tier, series)
+        if not directory.exists():
+            return np.zeros(0, dtype=dtype)
+
+        chunks = []
+        for path in sorted(directory.iterdir()):
+            if path.name.endswith(".tmp"):
+                continue
+            period_start, period_end = _period_bounds(path.name.split(".")[0])
+            if period_end > start and period_start < end:
+                chunks.append(self._read_file(path, dtype))
+        if not chunks:
+            return np.zeros(0, dtype=dtype)
+        records = np.concatenate(chunks)
+        records = records[(records["t"] >= start) & (records["t"] < end)]
+        return np.sort(records, order="t")
+
+    def best_tier(self, start: float) -> str:
+        """Finest tier still retained for data starting at `start`"""
+        age_days = (time.time() - start) / 86400
+        if age_days <= self.raw_retention_days:
+            return "raw"
+        if age_days <= self.minute_retention_days:
+            return "1m"
+        return "1h"
+
+    def values(self, series: str, start: float = 0, end: float = None, tier: str = None):
+        """(times, values) for a range; rollup tiers contribute their per-bucket means"""
+        tier = tier or self.best_tier(start)
+        records = self.read(series, start, end, tier)
+        if tier == "raw":
+            return records["t"], records["v"].astype(np.float64), np.ones(len(records))
+        return records["t"], records["mean"].astype(np.float64), records["count"].astype(np.float64)
+
+    # Maintenance
+
+    def rollup(self, now: float = None) -> Dict[str, int]:
+        """Roll closed buckets up from raw, compress closed files and enforce retention"""
+        now = int(now if now is not None else time.time())
+        written = {tier: 0 for tier in TIERS}
+        for series in self.series():
+            for tier, seconds in TIERS.items():
+                closed_until = now // seconds * seconds
+                since = self.state.setdefault(tier, {}).get(series, 0)
+                if since >= closed_until:
+                    continue
+                raw = self.read(series, since, closed_until, "raw")
+                rolled = rollup_records(raw, seconds)
+                months = np.array([_month(int(t)) for t in rolled["t"]])
+                for month in np.unique(months):
+                    self._append_records(tier, series, str(month), rolled[months == month])
+                self.state[tier][series] = closed_until
+                written[tier] += len(rolled)
+        self._save_state()
+        self._compress_closed(now)
+        self._expire(now)
+        return written
+
+    def _compress_closed(self, now: int) -> None:
+        current = {"raw": _day(now), "1m": _month(now), "1h": _month(now)}
+        for tier in ("raw", *TIERS):
+            tier_dir = self.directory / tier
+            if not tier_dir.exists():
+                continue
+            for path in tier_dir.glob("*/*.bin"):
+                if path.stem == current[tier]:
+                    continue
+                compressed = path.with_name(path.name + ".z")
+                data = path.read_bytes()
+                if compressed.exists():
+                    data = zlib.decompress(compressed.read_bytes()) + data
+                temp_path = path.with_name(path.name + ".tmp")
+                temp_path.write_bytes(zlib.compress(data, 6))
+                os.replace(temp_path, compressed)
+                path.unlink()
+
+    def _expire(self, now: int) -> None:
+        for tier, days in (("raw", self.raw_retention_days), ("1m", self.minute_retention_days)):
+            tier_dir = self.directory / tier
+            if not tier_dir.exists():
+                continue
+            cutoff = now - days * 86400
+            for path in tier_dir.glob("*/*"):
+                if _period_bounds(path.name.split(".")[0])[1] <= cutoff:
+                    path.unlink()
+
+    def disk_usage(self) -> int:
+        return sum(path.stat().st_size for path in self.directory.rglob("*") if path.is_file())
+
+
+def weighted_percentiles(values: np.ndarray, weights: np.ndarray, percentiles: List[float]) -> List[float]:
+    """Percentiles of values where each value stands for `weight` samples"""
+    if not len(values):
+        return [float("nan")] * len(percentiles)
+    order = np.argsort(values)
+    values = values[order]
+    cumulative = np.cumsum(weights[order])
+    ranks = np.array(percentiles) / 100.0 * cumulative[-1]
+    indexes = np.minimum(np.searchsorted(cumulative, ranks, side="left"), len(values) - 1)
+    return values[indexes].tolist()
+
+
+def trend(times: np.ndarray, values: np.ndarray) -> Dict[str, float]:
+    """Least-squares slope per day plus first-vs-last-week means"""
+    if len(values) < 2:
+        return {}
+    days = (times.astype(np.float64) - float(times[0])) / 86400
+    slope, intercept = np.polyfit(days, values, 1) if days[-1] > 0 else (0.0, float(values.mean()))
+    week = 7.0
+    first = values[days <= min(week, days[-1] / 2)]
+    last = values[days >= max(days[-1] - week, days[-1] / 2)]
+    return {
+        "slope_per_day": float(slope),
+        "first_week_mean": float(first.mean()),
+        "last_week_mean": float(last.mean()),
+        "change_percent": float((last.mean() - first.mean()) / first.mean() * 100) if first.mean() else 0.0,
+    }
+
+
+def import_json_log(store: TimeSeriesStore, path: str) -> int:
+    """Load the legacy railway_usage_log.json (one JSON object per line) into the store"""
+    columns = {}
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+                timestamp = datetime.fromisoformat(entry["timestamp"]).replace(tzinfo=timezone.utc).timestamp()
+            except (ValueError, KeyError):
+                continue
+            for series, value in flatten_metrics(entry.get("metrics", {})).items():
+                columns.setdefault(series, []).append((int(timestamp), value))
+    for series, records in columns.items():
+        store.append_many(series, np.array(records, dtype=RAW_DTYPE))
+    return sum(len(records) for records in columns.values())
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query the monitor's time-series store")
+    parser.add_argument("--dir", default="railway_metrics", help="Store directory (default: railway_metrics)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("series", help="List stored series")
+
+    query = commands.add_parser("query", help="Percentiles of a series over a time range")
+    query.add_argument("series")
+    query.add_argument("--since", default="7d", help="Range start: 30m, 12h, 90d, 4w or an ISO date (default: 7d)")
+    query.add_argument("--until", help="Range end (default: now)")
+    query.add_argument("--percentiles", default="50,95,99", help="Comma-separated percentiles (default: 50,95,99)")
+    query.add_argument("--tier", choices=["raw", *TIERS], help="Force a tier (default: finest retained)")
+
+    trend_parser = commands.add_parser("trend", help="Daily slope and week-over-week change of a series")
+    trend_parser.add_argument("series")
+    trend_parser.add_argument("--since", default="30d")
+    trend_parser.add_argument("--tier", choices=["raw", *TIERS], default="1h")
+
+    import_parser = commands.add_parser("import", help="Import a legacy JSON-lines usage log")
+    import_parser.add_argument("log_file")
+
+    commands.add_parser("rollup", help="Roll up, compress and expire data now")
+
+    args = parser.parse_args()
+    store = TimeSeriesStore(args.dir)
+    started = time.perf_counter()
+
+    if args.command == "series":
+        for name in store.series():
+            print(name)
+    elif args.command == "query":
+        start = parse_since(args.since)
+        end = parse_since(args.until) if args.until else None
+        tier = args.tier or store.best_tier(start)
+        times, values, weights = store.values(args.series, start, end, tier)
+        percentiles = [float(p) for p in args.percentiles.split(",")]
+        results = weighted_percentiles(values, weights, percentiles)
+        print(f"📈 {args.series} since {args.since} ({tier}, {int(weights.sum()):,} samples)")
+        if len(values):
+            print(f"   min {values.min():.2f}  mean {np.average(values, weights=weights):.2f}  max {values.max():.2f}")
+            for percentile, result in zip(percentiles, results):
+                print(f"   p{percentile:g}: {result:.2f}")
+    elif args.command == "trend":
+        times, values, _ = store.values(args.series, parse_since(args.since), tier=args.tier)
+        result = trend(times, values)
+        if not result:
+            print(f"Not enough data for {args.series}")
+        else:
+            direction = "📈" if result["slope_per_day"] > 0 else "📉"
+            print(f"{direction} {args.series}: {result['slope_per_day']:+.3f}/day, "
+                  f"first week {result['first_week_mean']:.2f} -> last week {result['last_week_mean']:.2f} "
+                  f"({result['change_percent']:+.1f}%)")
+    elif args.command == "import":
+        imported = import_json_log(store, args.log_file)
+        store.rollup()
+        print(f"✅ Imported {imported:,} samples from {args.log_file}")
+    elif args.command == "rollup":
+        written = store.rollup()
+        print(f"✅ Rolled up {written}; store is {store.disk_usage() / 1024:.1f} KB")
+
+    print(f"⏱️  {(time.perf_counter() - started) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+API Endpoint Benchmark
+Boots server:app in-process against a local MongoDB (or an in-memory stand-in)
+and a fake S3, loads realistic data and drives concurrent traffic at the public
+read endpoints. Reports throughput and p50/p95/p99 latency per endpoint and
+fails when a saved baseline regresses past a threshold.
+
+Usage:
+    python tests/benchmark.py --output bench.json
+    python tests/benchmark.py --mongo-url mongodb://localhost:27017 --baseline bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+
+class FakeS3Client:
+    """In-memory stand-in for the boto3 S3 client calls made by storage.S3Storage"""
+
+    def __init__(self):
+        self.objects = {}
+        self.modified = {}
+
+    def generate_presigned_url(self, operation, Params=None, ExpiresIn=3600):
+        return f"https://fake-s3.local/{Params['Bucket']}/{Params['Key']}?op={operation}&expires={ExpiresIn}"
+
+    def put_object(self, Bucket, Key, Body=b"", **kwargs):
+        self.objects[(Bucket, Key)] = Body if isinstance(Body, bytes) else Body.read()
+        self.modified[(Bucket, Key)] = datetime.now(timezone.utc)
+        return {}
+
+    def head_object(self, Bucket, Key):
+        from botocore.exceptions import ClientError
+        if (Bucket, Key) not in self.objects:
+            raise ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject")
+        return {"ContentLength": len(self.objects[(Bucket, Key)]), "LastModified": self.modified[(Bucket, Key)]}
+
+    def get_object(self, Bucket, Key, **kwargs):
+        import io
+        from botocore.exceptions import ClientError
+        if (Bucket, Key) not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey", "Message": "Not Found"}}, "GetObject")
+        return {"Body": io.BytesIO(self.objects[(Bucket, Key)])}
+
+    def delete_objects(self, Bucket, Delete):
+        for item in Delete["Objects"]:
+            self.objects.pop((Bucket, item["Key"]), None)
+            self.modified.pop((Bucket, item["Key"]), None)
+        return {}
+
+    def get_paginator(self, operation):
+        client = self
+
+        class Paginator:
+            def paginate(self, Bucket, Prefix="", **kwargs):
+                keys = sorted(key for bucket, key in client.objects if bucket == Bucket and key.startswith(Prefix))
+                yield {"Contents": [{"Key": key, "Size": len(client.objects[(Bucket, key)]),
+                                     "LastModified": client.modified[(Bucket, key)]} for key in keys]}
+
+        return Paginator()
+
+
+def boot_server(mongo_url: str = None):
+    """Import server.py wired to the requested database and storage backed by a fake S3"""
+    if mongo_url:
+        os.environ["MONGO_URL"] = mongo_url
+    os.environ.setdefault("DB_NAME", f"benchmark_{uuid.uuid4().hex[:8]}")
+    os.environ.setdefault("AWS_BUCKET_NAME", "benchmark-bucket")
+    sys.path.insert(0, str(BACKEND_DIR))
+    import server
+
+    if not mongo_url:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("❌ No --mongo-url given and mongomock-motor is not installed (pip install mongomock-motor)")
+        server.client = AsyncMongoMockClient()
+        server.db = server.client[os.environ["DB_NAME"]]
+        if getattr(server, "snapshot_exporter", None):
+            server.snapshot_exporter.db = server.db
+        server.job_queue.collection = server.db.jobs
+
+    from storage import S3Storage
+    server.storage = S3Storage(FakeS3Client(), os.environ["AWS_BUCKET_NAME"], server.AWS_REGION)
+    return server
+
+
+async def load_data(server, gallery: int, articles: int, comments: int, seed: int) -> dict:
+    """Seed the sample content plus a synthetic dataset, returning ids to request"""
+    from seed_dataset import CATEGORIES, TAGS, load_dataset
+
+    await server.init_sample_data()
+    await load_dataset(server.db, photos=50, gallery=gallery, articles=articles, comments=comments,
+                       seed=seed, progress=False)
+
+    photo_ids = [photo["id"] async for photo in server.db.photos.find({}, {"id": 1})]
+    slugs = [article["slug"] async for article in server.db.articles.find({"is_published": True}, {"slug": 1})]
+    return {"photo_ids": photo_ids, "slugs": slugs, "categories": CATEGORIES, "tags": TAGS}
+
+
+def build_scenarios(data: dict) -> dict:
+    """Endpoint name -> function returning (path, params) for the next request"""
+    return {
+        "gallery": lambda rng: ("/api/gallery", {"limit": 50}),
+        "gallery_category": lambda rng: ("/api/gallery", {"limit": 50, "category": rng.choice(data["categories"])}),
+        "articles": lambda rng: ("/api/articles", {"limit": 10}),
+        "articles_search": lambda rng: ("/api/articles", {"limit": 10, "search": rng.choice(data["tags"])}),
+        "article_slug": lambda rng: (f"/api/articles/slug/{rng.choice(data['slugs'])}", {}),
+        "comments": lambda rng: (f"/api/photos/{rng.choice(data['photo_ids'])}/comments", {}),
+        "portfolio_settings": lambda rng: ("/api/portfolio-settings", {}),
+        "seo_settings": lambda rng: ("/api/seo-settings", {}),
+    }
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+async def run_endpoint(app, next_request, concurrency: int, requests_per_endpoint: int, seed: int) -> dict:
+    from snapshot_export import asgi_get
+
+    latencies = []
+    errors = 0
+    remaining = requests_per_endpoint
+
+    async def worker(worker_id: int):
+        nonlocal remaining, errors
+        rng = random.Random(seed * 1000 + worker_id)
+        while remaining > 0:
+            remaining -= 1
+            path, params = next_request(rng)
+            started = time.perf_counter()
+            status, _ = await asgi_get(app, path, params)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if status >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+    }
+
+
+def compare_to_baseline(results: dict, baseline: dict, threshold: float) -> list:
+    """Regressions where p95 grew or throughput dropped by more than the threshold"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {previous['p95_ms']:.2f}ms -> {current['p95_ms']:.2f}ms")
+        if previous["throughput_rps"] and current["throughput_rps"] < previous["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput {previous['throughput_rps']:.1f} -> {current['throughput_rps']:.1f} req/s"
+            )
+        if current["errors"] > previous.get("errors", 0):
+            regressions.append(f"{name}: errors {previous.get('errors', 0)} -> {current['errors']}")
+    return regressions
+
+
+async def run(args) -> dict:
+    server = boot_server(args.mongo_url)
+    await server.startup_event()
+    try:
+        print("📦 Loading benchmark data...")
+        data = await load_data(server, args.gallery, args.articles, args.comments, args.seed)
+        scenarios = build_scenarios(data)
+        selected = args.endpoints.split(",") if args.endpoints else list(scenarios)
+
+        results = {}
+        for name in selected:
+            print(f"🚀 {name}: {args.requests} requests, concurrency {args.concurrency}")
+            # One untimed pass warms caches and connection pools the way a live server would be
+            await run_endpoint(server.app, scenarios[name], args.concurrency, min(args.requests, args.concurrency), args.seed)
+            results[name] = await run_endpoint(server.app, scenarios[name], args.concurrency, args.requests, args.seed)
+        return {
+            "meta": {
+                "timestamp": datetime.utcnow().isoformat(),
+                "database": "mongodb" if args.mongo_url else "mongomock",
+                "concurrency": args.concurrency,
+                "requests_per_endpoint": args.requests,
+                "dataset": {"gallery": args.gallery, "articles": args.articles, "comments": args.comments},
+                "seed": args.seed,
+            },
+            "results": results,
+        }
+    finally:
+        if args.mongo_url:
+            await server.client.drop_database(os.environ["DB_NAME"])
+
+
+def print_report(report: dict) -> None:
+    print("\n" + "=" * 78)
+    print(f"{'endpoint':<20}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>10}")
+    print("-" * 78)
+    for name, result in report["results"].items():
+        print(f"{name:<20}{result['throughput_rps']:>10.1f}{result['p50_ms']:>10.2f}"
+              f"{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}{result['errors']:>10}")
+    print("=" * 78)
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Benchmark the portfolio API endpoints")
+    parser.add_argument("--mongo-url", help="Local MongoDB to benchmark against (default: in-memory mongomock)")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent clients per endpoint (default: 20)")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per endpoint (default: 500)")
+    parser.add_argument("--endpoints", help="Comma-separated subset of endpoints to run")
+    parser.add_argument("--gallery", type=int, default=2000, help="Synthetic gallery items (default: 2000)")
+    parser.add_argument("--articles", type=int, default=200, help="Synthetic articles (default: 200)")
+    parser.add_argument("--comments", type=int, default=5000, help="Synthetic comments (default: 5000)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against a previous results file")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed regression as a fraction of the baseline (default: 0.25)")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report["results"], baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%} of baseline:")
+            for regression in regressions:
+                print(f"   {regression}")
+            sys.exit(1)
+        print(f"\n✅ No regressions beyond {args.threshold:.0%} of baseline")
+
+
+if __name__ == "__main__":
+    main()
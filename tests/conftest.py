@@ -0,0 +1,29 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+@pytest.fixture(scope="session")
+def server(tmp_path_factory):
+    """server.py on an in-memory database, with local storage and caches under a temp dir"""
+    root = tmp_path_factory.mktemp("server")
+    os.environ.update({
+        "STORAGE_BACKEND": "local",
+        "STORAGE_DIR": str(root / "uploads"),
+        "STORAGE_PUBLIC_URL": "http://api.test",
+        "RENDER_CACHE_DIR": str(root / "renders"),
+        "IMAGE_CACHE_DIR": str(root / "images"),
+        "FALLBACK_DB": str(root / "fallback.sqlite3"),
+    })
+    from mongomock_motor import AsyncMongoMockClient
+    import server
+
+    server.client = AsyncMongoMockClient()
+    server.db = server.client["tests"]
+    server.job_queue.collection = server.db.jobs
+    return server
@@ -0,0 +1,96 @@
+import asyncio
+from datetime import datetime
+
+
+def test_ttl_cache_hits_and_expiry(server, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(server.time, "monotonic", lambda: now[0])
+    cache = server.TTLCache(max_entries=10, ttl=30, negative_ttl=5)
+
+    cache.set("slug:a", "article")
+    cache.set_missing("slug:gone")
+    assert cache.get("slug:a") == "article"
+    assert cache.get("slug:gone") is server.TTLCache.MISSING
+
+    now[0] += 10
+    assert cache.get("slug:gone") is None  # Misses expire sooner
+    assert cache.get("slug:a") == "article"
+    now[0] += 30
+    assert cache.get("slug:a") is None
+    assert cache.stats()["hits"] == 2 and cache.stats()["negative_hits"] == 1
+
+
+def test_ttl_cache_evicts_least_recently_used(server):
+    cache = server.TTLCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_ttl_cache_invalidate(server):
+    cache = server.TTLCache(max_entries=10, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.invalidate("a", "missing")
+    assert cache.get("a") is None
+    cache.clear()
+    assert cache.get("b") is None
+    assert cache.stats()["invalidations"] == 2
+
+
+def test_ttl_cache_refuses_writes_from_before_an_invalidation(server):
+    cache = server.TTLCache(max_entries=10, ttl=60, negative_ttl=30)
+    generation = cache.generation("slug:a")
+    cache.invalidate("slug:a")  # An update lands while the read is in flight
+    cache.set("slug:a", "old copy", generation)
+    cache.set_missing("slug:a", generation)
+    assert cache.get("slug:a") is None
+
+    cache.set("slug:a", "new copy", cache.generation("slug:a"))
+    assert cache.get("slug:a") == "new copy"
+    assert cache.stats()["stale_writes"] == 2
+
+
+def test_ttl_cache_clear_refuses_older_tokens(server):
+    cache = server.TTLCache(max_entries=1, ttl=60)
+    generation = cache.generation("slug:a")
+    cache.clear()
+    cache.set("slug:a", "old copy", generation)
+    assert cache.get("slug:a") is None
+
+    generation = cache.generation("slug:a")
+    for index in range(6):
+        cache.invalidate(f"slug:{index}")  # Past the counter cap, which starts a new epoch
+    cache.set("slug:a", "old copy", generation)
+    assert cache.get("slug:a") is None
+
+
+def test_article_read_racing_an_update_is_not_cached(server, monkeypatch):
+    article = server.Article(title="T", slug="race", content="c", excerpt="e", author="A",
+                             updated_at=datetime.utcnow())
+    real_db = server.db
+
+    class UpdatedMidRead:
+        def __getattr__(self, name):
+            return getattr(real_db, name)
+
+        @property
+        def articles(self):
+            return self
+
+        async def find_one(self, query):
+            document = await real_db.articles.find_one(query)
+            server.invalidate_article(document["id"], document["slug"])  # The update commits after the read
+            return document
+
+    async def scenario():
+        await server.db.articles.insert_one(article.dict())
+        monkeypatch.setattr(server, "db", UpdatedMidRead())
+        return await server.get_article_by_slug("race")
+
+    assert asyncio.run(scenario()).status_code == 200
+    assert server.article_cache.get("slug:race") is None
+    assert server.article_cache.get(f"id:{article.id}") is None
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+
+def test_normalize_camera_settings(server):
+    normalized = server.normalize_camera_settings({
+        "aperture": "f/2.8",
+        "shutter_speed": "1/160s",
+        "iso": "ISO 800",
+        "focal_length": "35mm",
+        "lens": "XF 35mm F1.4 R",
+    })
+    assert normalized == {
+        "f_number": 2.8,
+        "exposure_seconds": 1 / 160,
+        "iso": 800,
+        "focal_length_mm": 35.0,
+        "lens_id": "xf-35mm-f1-4-r",
+    }
+
+
+@pytest.mark.parametrize("camera_settings", [None, {}, {"aperture": "wide open", "shutter_speed": "1/0", "lens": "!!"}])
+def test_normalize_camera_settings_unparseable(server, camera_settings):
+    assert set(server.normalize_camera_settings(camera_settings).values()) == {None}
+
+
+@pytest.mark.parametrize("value, seconds", [("1/250", 0.004), ("0.5s", 0.5), ('2"', 2.0), (30, 30.0), (None, None)])
+def test_parse_shutter_speed(server, value, seconds):
+    assert server.parse_shutter_speed(value) == seconds
+
+
+def test_camera_settings_backfill_runs_once(server):
+    async def scenario():
+        await server.db.migrations.delete_many({})
+        await server.db.photos.insert_one({"id": "old", "camera_settings": {"aperture": "f/8", "iso": 200}})
+        first = await server.run_migration_once("camera_settings_v1", server.backfill_camera_settings)
+        await server.db.photos.insert_one({"id": "older", "camera_settings": {"iso": 100}})
+        second = await server.run_migration_once("camera_settings_v1", server.backfill_camera_settings)
+        return first, second, await server.db.photos.find_one({"id": "older"})
+
+    first, second, untouched = asyncio.run(scenario())
+    assert first == 1
+    assert second is None
+    assert "iso" not in untouched
+
+
+def test_failed_migration_is_retried(server):
+    async def fail():
+        raise RuntimeError("database down")
+
+    async def succeed():
+        return 0
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await server.run_migration_once("flaky_v1", fail)
+        return await server.run_migration_once("flaky_v1", succeed)
+
+    assert asyncio.run(scenario()) == 0
@@ -0,0 +1,45 @@
+from fallback import FallbackStore
+
+
+def test_save_get_and_confirm(tmp_path):
+    store = FallbackStore(tmp_path / "fallback.sqlite3")
+    assert store.get("gallery") is None
+
+    store.save("gallery", b"[1]")
+    body, age = store.get("gallery")
+    assert body == b"[1]" and age < 5
+    # An unchanged body is only confirmed, a changed one needs saving
+    assert store.confirm("gallery", b"[1]") is False
+    assert store.confirm("gallery", b"[2]") is True
+    assert store.confirm("articles", b"[]") is True
+
+
+def test_discard(tmp_path):
+    store = FallbackStore(tmp_path / "fallback.sqlite3")
+    store.save("a", b"1")
+    store.save("b", b"2")
+    store.discard("a", "missing")
+    assert store.get("a") is None
+    assert len(store) == 1
+
+
+def test_evicts_least_recently_confirmed(tmp_path):
+    store = FallbackStore(tmp_path / "fallback.sqlite3", max_entries=2)
+    store.save("a", b"1")
+    store.save("b", b"2")
+    store.confirm("a", b"1")
+    store.save("c", b"3")
+    assert store.get("b") is None
+    assert store.get("a") is not None and store.get("c") is not None
+    assert store.stats()["evictions"] == 1
+
+
+def test_survives_reopen_within_the_cap(tmp_path):
+    path = tmp_path / "fallback.sqlite3"
+    store = FallbackStore(path)
+    for key in "abc":
+        store.save(key, key.encode())
+
+    reopened = FallbackStore(path, max_entries=2)
+    assert len(reopened) == 2
+    assert reopened.stats()["evictions"] == 1
@@ -0,0 +1,50 @@
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+
+def test_parse_fields(server):
+    assert server.parse_fields(server.Article, None) == (None, server.Article)
+
+    projection, row_model = server.parse_fields(server.Article, "summary", server.ArticleSummary)
+    assert row_model is server.ArticleSummary
+    assert projection["_id"] == 0 and "content" not in projection
+
+    projection, row_model = server.parse_fields(server.Article, " title, slug ,")
+    assert projection == {"_id": 0, "id": 1, "slug": 1, "title": 1}
+    assert set(row_model.model_fields) == {"id", "slug", "title"}
+    assert row_model is server.parse_fields(server.Article, "slug,title")[1]
+
+
+def test_explicit_fields_are_validated(server):
+    _, row_model = server.parse_fields(server.Photo, "title,camera_settings")
+    assert row_model(id="a").model_dump() == {"id": "a", "title": None, "camera_settings": None}
+    with pytest.raises(ValueError):
+        row_model(id="a", title=["not", "a", "title"])
+
+
+def test_parse_fields_rejects_unknown_names(server):
+    with pytest.raises(HTTPException) as error:
+        server.parse_fields(server.Article, "title,password,zzz")
+    assert error.value.status_code == 400
+    assert error.value.detail == "Unknown fields: password, zzz"
+
+
+def test_coalesced_lists_keep_the_response_model(server):
+    async def scenario():
+        await server.db.gallery.insert_one(
+            {"id": "contract-1", "title": "T", "image_url": "http://api.test/a.jpg", "category": "contract",
+             "timestamp": datetime.utcnow(), "owner_notes": "x"}
+        )
+        full = await server.get_gallery_photos(category="contract")
+        summary = await server.get_gallery_photos(category="contract", fields="summary")
+        explicit = await server.get_gallery_photos(category="contract", fields="title,description")
+        return json.loads(full.body), json.loads(summary.body), json.loads(explicit.body)
+
+    (full,), (summary,), (explicit,) = asyncio.run(scenario())
+    assert "owner_notes" not in full and full["category"] == "contract" and "timestamp" in full
+    assert set(summary) == set(server.GalleryPhotoSummary.model_fields)
+    assert explicit == {"id": "contract-1", "title": "T", "description": None}
@@ -0,0 +1,64 @@
+import pytest
+from fastapi import HTTPException
+
+
+class FakeResponse:
+    def __init__(self, status_code, location=None):
+        self.status_code = status_code
+        self.headers = {"location": location} if location else {}
+        self.is_redirect = location is not None
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def origin(server, monkeypatch):
+    """Maps URL -> FakeResponse and records every URL requested"""
+    responses, requested = {}, []
+
+    def get(url, **kwargs):
+        assert kwargs["allow_redirects"] is False
+        requested.append(url)
+        return responses[url]
+
+    monkeypatch.setattr(server.requests, "get", get)
+    return responses, requested
+
+
+def test_follows_redirects_within_allowed_hosts(server, origin):
+    responses, requested = origin
+    responses["https://images.unsplash.com/a"] = FakeResponse(302, "/b")
+    responses["https://images.unsplash.com/b"] = FakeResponse(200)
+    response = server.open_allowed_url("https://images.unsplash.com/a", ["images.unsplash.com"])
+    assert response is responses["https://images.unsplash.com/b"]
+    assert requested == ["https://images.unsplash.com/a", "https://images.unsplash.com/b"]
+
+
+@pytest.mark.parametrize("location", ["http://169.254.169.254/latest/meta-data", "file:///etc/passwd"])
+def test_refuses_redirects_off_the_allowlist(server, origin, location):
+    responses, requested = origin
+    responses["https://images.unsplash.com/a"] = FakeResponse(302, location)
+    with pytest.raises(HTTPException) as error:
+        server.open_allowed_url("https://images.unsplash.com/a", ["images.unsplash.com"])
+    assert error.value.status_code == 502
+    assert requested == ["https://images.unsplash.com/a"]
+    assert responses["https://images.unsplash.com/a"].closed
+
+
+def test_gives_up_on_redirect_loops(server, origin):
+    responses, _ = origin
+    responses["https://images.unsplash.com/a"] = FakeResponse(302, "/a")
+    with pytest.raises(HTTPException) as error:
+        server.open_allowed_url("https://images.unsplash.com/a", ["images.unsplash.com"])
+    assert error.value.detail == "Too many redirects"
+
+
+def test_render_sources_check_redirects_too(server, origin, monkeypatch):
+    responses, _ = origin
+    monkeypatch.setattr(server, "RENDER_ALLOWED_HOSTS", ["images.unsplash.com"])
+    responses["https://images.unsplash.com/a"] = FakeResponse(301, "http://localhost:27017/")
+    with pytest.raises(HTTPException) as error:
+        server.fetch_source_image("https://images.unsplash.com/a")
+    assert error.value.detail == "Image host not allowed"
@@ -0,0 +1,121 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from jobs import JobQueue
+
+
+@pytest.fixture
+def queue():
+    return JobQueue(AsyncMongoMockClient()["tests"].jobs, lease_seconds=60)
+
+
+def test_idempotency_key_returns_the_existing_job(queue):
+    async def scenario():
+        first = await queue.enqueue("thumbnail", {"photo_id": "a"}, idempotency_key="thumbnail:a")
+        second = await queue.enqueue("thumbnail", {"photo_id": "b"}, idempotency_key="thumbnail:a")
+        return first, second, await queue.collection.count_documents({})
+
+    first, second, count = asyncio.run(scenario())
+    assert second["id"] == first["id"]
+    assert second["payload"] == {"photo_id": "a"}
+    assert count == 1
+
+
+def test_failed_jobs_are_requeued(queue):
+    async def scenario():
+        job = await queue.enqueue("thumbnail", {}, idempotency_key="thumbnail:a")
+        await queue.collection.update_one(
+            {"id": job["id"]},
+            {"$set": {"status": "failed", "attempts": 5, "last_error": "boom", "finished_at": datetime.utcnow()}}
+        )
+        return job, await queue.enqueue("thumbnail", {"retry": True}, idempotency_key="thumbnail:a")
+
+    job, retried = asyncio.run(scenario())
+    assert retried["id"] == job["id"]
+    assert retried["status"] == "queued"
+    assert retried["attempts"] == 0
+    assert retried["payload"] == {"retry": True}
+    assert retried["last_error"] is None and retried["finished_at"] is None
+
+
+def test_succeeded_jobs_are_kept_unless_requeue_asks(queue):
+    async def scenario():
+        job = await queue.enqueue("render", {}, idempotency_key="render:a")
+        await queue.collection.update_one({"id": job["id"]}, {"$set": {"status": "succeeded"}})
+        kept = await queue.enqueue("render", {}, idempotency_key="render:a")
+        requeued = await queue.enqueue("render", {}, idempotency_key="render:a", requeue=("failed", "succeeded"))
+        return kept, requeued
+
+    kept, requeued = asyncio.run(scenario())
+    assert kept["status"] == "succeeded"
+    assert requeued["status"] == "queued"
+
+
+def test_claim_takes_a_lease(queue):
+    async def scenario():
+        queue.register("thumbnail", None)
+        job_type = queue.types["thumbnail"]
+        await queue.enqueue("thumbnail", {})
+        await queue.enqueue("thumbnail", {}, delay_seconds=3600)
+        claimed = await queue._claim(job_type)
+        return claimed, await queue._claim(job_type)
+
+    claimed, nothing_due = asyncio.run(scenario())
+    assert claimed["status"] == "running"
+    assert claimed["worker"] == queue.worker_id
+    assert claimed["attempts"] == 1
+    assert claimed["lease_expires_at"] > datetime.utcnow()
+    assert nothing_due is None  # The other job is delayed and this one is leased
+
+
+def test_expired_lease_is_reclaimed(queue):
+    async def scenario():
+        queue.register("thumbnail", None)
+        job_type = queue.types["thumbnail"]
+        job = await queue.enqueue("thumbnail", {})
+        await queue._claim(job_type)
+        await queue.collection.update_one(
+            {"id": job["id"]}, {"$set": {"worker": "dead", "lease_expires_at": datetime.utcnow() - timedelta(seconds=1)}}
+        )
+        return await queue._claim(job_type)
+
+    reclaimed = asyncio.run(scenario())
+    assert reclaimed["worker"] == queue.worker_id
+    assert reclaimed["attempts"] == 2
+
+
+def test_failures_back_off_then_give_up(queue):
+    async def scenario():
+        queue.register("thumbnail", None, max_attempts=2, backoff_seconds=10)
+        job_type = queue.types["thumbnail"]
+        job = await queue.enqueue("thumbnail", {})
+
+        claimed = await queue._claim(job_type)
+        await queue._fail(job_type, [claimed], "boom")
+        retry = await queue.get(job["id"])
+
+        await queue.collection.update_one({"id": job["id"]}, {"$set": {"run_at": datetime.utcnow()}})
+        claimed = await queue._claim(job_type)
+        await queue._fail(job_type, [claimed], "boom again")
+        return retry, await queue.get(job["id"])
+
+    retry, failed = asyncio.run(scenario())
+    assert retry["status"] == "queued"
+    assert retry["run_at"] > datetime.utcnow() + timedelta(seconds=5)
+    assert failed["status"] == "failed"
+    assert failed["last_error"] == "boom again"
+
+
+def test_only_the_lease_holder_finishes(queue):
+    async def scenario():
+        queue.register("thumbnail", None)
+        job = await queue.enqueue("thumbnail", {})
+        claimed = await queue._claim(queue.types["thumbnail"])
+        await queue.collection.update_one({"id": job["id"]}, {"$set": {"worker": "someone-else"}})
+        await queue._finish([claimed], "succeeded")
+        return await queue.get(job["id"])
+
+    assert asyncio.run(scenario())["status"] == "running"
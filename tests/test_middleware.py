@@ -0,0 +1,55 @@
+import asyncio
+
+from profiling import ProfilingMiddleware, current_profile
+from tracing import InMemoryExporter, Tracer, TracingMiddleware, current_span
+
+
+def call(middleware, headers=()):
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/api/gallery", "headers": list(headers)}
+    asyncio.run(middleware(scope, None, send))
+    return messages[0], dict(messages[0]["headers"])
+
+
+def make_app(seen):
+    async def app(scope, receive, send):
+        seen.append((current_profile.get(), current_span.get()))
+        profile = current_profile.get()
+        if profile is not None:
+            profile.record(12.5)
+        await send({"type": "http.response.start", "status": 201, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": b"ok"})
+    return app
+
+
+def test_profiling_adds_server_timing():
+    seen = []
+    start, headers = call(ProfilingMiddleware(make_app(seen)))
+    assert start["status"] == 201
+    assert headers[b"server-timing"].startswith(b'db;dur=12.5;desc="1 queries", total;dur=')
+    assert headers[b"content-type"] == b"text/plain"
+    assert current_profile.get() is None
+
+
+def test_tracing_passes_unsampled_requests_through():
+    seen = []
+    exporter = InMemoryExporter()
+    _, headers = call(TracingMiddleware(make_app(seen), tracer=Tracer(sample_rate=0, exporters=[exporter])))
+    assert b"x-trace-id" not in headers
+    assert seen == [(None, None)]
+    assert len(exporter.traces) == 0
+
+
+def test_tracing_forced_request():
+    seen = []
+    exporter = InMemoryExporter()
+    middleware = TracingMiddleware(make_app(seen), tracer=Tracer(sample_rate=0, exporters=[exporter]))
+    _, headers = call(middleware, headers=[(b"x-trace", b"1")])
+    trace = exporter.traces[-1]
+    assert headers[b"x-trace-id"].decode() == trace["trace_id"]
+    assert trace["attributes"]["status"] == 201
+    assert seen[0][1] is not None and current_span.get() is None
@@ -0,0 +1,23 @@
+import numpy as np
+
+import recipe_renderer
+
+
+def noisy_image(seed=1):
+    rng = np.random.default_rng(seed)
+    return rng.integers(96, 160, size=(32, 32, 3), dtype=np.uint8)
+
+
+def test_partial_recipes_render_like_the_defaults():
+    image = noisy_image()
+    assert np.array_equal(recipe_renderer.render(image, {}), recipe_renderer.render(image, recipe_renderer.DEFAULT_SETTINGS))
+
+
+def test_noise_reduction_smooths_positive_levels_only():
+    image = noisy_image()
+    texture = {}
+    for level in (-4, 0, 4):
+        rendered = recipe_renderer.render(image, {"isoNoiseReduction": level}).astype(np.float32)
+        texture[level] = np.abs(np.diff(rendered, axis=1)).mean()
+    assert texture[4] < texture[0] * 0.8
+    assert texture[-4] == texture[0]
@@ -0,0 +1,35 @@
+import asyncio
+
+
+def test_single_flight_coalesces_concurrent_calls(server):
+    flight = server.SingleFlight()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def scenario():
+        results = await asyncio.gather(*(flight.do("gallery", load) for _ in range(5)))
+        return results, await flight.do("gallery", load)
+
+    results, later = asyncio.run(scenario())
+    assert results == [1] * 5
+    assert later == 2  # The key is released once the shared call finishes
+    assert flight.stats() == {"calls": 6, "executions": 2, "coalesced": 4, "in_flight": 0}
+
+
+def test_single_flight_shares_errors(server):
+    flight = server.SingleFlight()
+
+    async def load():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("database down")
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("gallery", load) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.executions == 1
@@ -0,0 +1,16 @@
+import threading
+
+from snapshot_export import LocalSnapshotStore
+
+
+def test_concurrent_writes_publish_whole_files(tmp_path):
+    store = LocalSnapshotStore(tmp_path)
+    bodies = [bytes([index]) * 200_000 for index in range(8)]
+    threads = [threading.Thread(target=store.write, args=("gallery.json", body)) for body in bodies]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert store.read("gallery.json") in bodies
+    assert [path.name for path in tmp_path.iterdir() if path.is_file()] == ["gallery.json"]
@@ -0,0 +1,164 @@
+import asyncio
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from starlette.requests import Request
+
+from storage import FileRangeResponse, LocalStorage, file_etag, file_response, parse_range
+
+
+def make_request(headers=None, method="GET"):
+    raw = [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    return Request({"type": "http", "method": method, "path": "/", "headers": raw, "query_string": b""})
+
+
+@pytest.fixture
+def local(tmp_path):
+    return LocalStorage(tmp_path / "uploads", "http://api.test/", "secret")
+
+
+# parse_range
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=990-5000", (990, 999)),
+    ("bytes=0-1,5-6", None),
+    ("items=0-1", None),
+    ("bytes=abc", None),
+    ("bytes=-", None),
+    ("bytes=50-10", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=-0"])
+def test_parse_range_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 1000)
+
+
+# file_response
+
+def test_file_response_full_and_partial(tmp_path):
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(b"0123456789")
+
+    response = file_response(make_request(), path)
+    assert response.status_code == 200
+    assert response.headers["content-length"] == "10"
+    assert response.headers["content-type"] == "image/jpeg"
+    assert response.headers["x-content-type-options"] == "nosniff"
+    assert "content-disposition" not in response.headers
+
+    response = file_response(make_request({"Range": "bytes=2-5"}), path)
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 2-5/10"
+    assert response.headers["content-length"] == "4"
+
+
+def test_file_response_conditionals(tmp_path):
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(b"0123456789")
+    etag = file_etag(path.stat())
+
+    assert file_response(make_request({"If-None-Match": etag}), path).status_code == 304
+    assert file_response(make_request({"If-None-Match": '"other"'}), path).status_code == 200
+    # A stale If-Range sends the whole file instead of the range
+    assert file_response(make_request({"Range": "bytes=0-1", "If-Range": '"old"'}), path).status_code == 200
+
+    response = file_response(make_request({"Range": "bytes=50-"}), path)
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */10"
+
+
+def test_file_response_non_images_download(tmp_path):
+    path = tmp_path / "page.html"
+    path.write_bytes(b"<script></script>")
+    response = file_response(make_request(), path)
+    assert response.headers["content-disposition"] == "attachment"
+
+
+def send_response(response, method="GET"):
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": method, "extensions": {"http.response.pathsend": {}}}
+    asyncio.run(response(scope, None, send))
+    return messages
+
+
+def test_file_range_response_streams_chunks(tmp_path):
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(bytes(range(256)) * 1024)
+    response = FileRangeResponse(path, 256 * 1024, status_code=206, byte_range=(1000, 200_000))
+    response.chunk_size = 64 * 1024
+
+    messages = send_response(response)
+    bodies = [message for message in messages if message["type"] == "http.response.body"]
+    assert messages[0]["type"] == "http.response.start"
+    assert b"".join(message["body"] for message in bodies) == path.read_bytes()[1000:200_001]
+    assert len(bodies) == 4 and not bodies[-1]["more_body"]
+
+
+def test_file_range_response_head_has_no_body(tmp_path):
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(b"0123456789")
+    messages = send_response(FileRangeResponse(path, 10), method="HEAD")
+    assert messages[1] == {"type": "http.response.body", "body": b"", "more_body": False}
+
+
+def test_file_response_rejects_directories(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        file_response(make_request(), tmp_path)
+
+
+# LocalStorage
+
+def test_local_storage_round_trip(local):
+    local.put("uploads/gallery/a.jpg", b"data", "image/jpeg")
+    assert local.get("uploads/gallery/a.jpg") == b"data"
+    assert local.head("uploads/gallery/a.jpg").size == 4
+    assert [item.key for page in local.list("uploads/") for item in page] == ["uploads/gallery/a.jpg"]
+    assert local.delete(["uploads/gallery/a.jpg"]) == []
+    assert local.head("uploads/gallery/a.jpg") is None
+
+
+def test_local_storage_put_file(local):
+    temp_path = local.temp_path_for("uploads/gallery/b.jpg")
+    temp_path.write_bytes(b"streamed")
+    assert [item.key for page in local.list() for item in page] == []  # Hidden until published
+    local.put_file("uploads/gallery/b.jpg", temp_path)
+    assert local.get("uploads/gallery/b.jpg") == b"streamed"
+    assert not temp_path.exists()
+
+
+def test_local_storage_urls(local):
+    url = local.url("uploads/gallery/a b.jpg")
+    assert url == "http://api.test/media/uploads/gallery/a%20b.jpg"
+    assert local.key_for_url(url) == "uploads/gallery/a b.jpg"
+    assert local.key_for_url("https://images.unsplash.com/photo") is None
+    assert local.key_for_url("http://api.test/media/") is None
+
+
+def test_local_storage_rejects_traversal(local):
+    with pytest.raises(ValueError):
+        local.path_for("../outside.jpg")
+
+
+def test_local_storage_presigned_put(local):
+    url = urlparse(local.presign_put("uploads/a.jpg", "image/jpeg"))
+    query = {name: values[0] for name, values in parse_qs(url.query).items()}
+    expires, signature = int(query["expires"]), query["signature"]
+    assert url.path == "/api/upload/uploads/a.jpg"
+    assert local.verify_put("uploads/a.jpg", "image/jpeg", expires, signature)
+    assert not local.verify_put("uploads/a.jpg", "text/html", expires, signature)
+    assert not local.verify_put("uploads/b.jpg", "image/jpeg", expires, signature)
+    assert not local.verify_put("uploads/a.jpg", "image/jpeg", int(time.time()) - 1, signature)
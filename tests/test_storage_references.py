@@ -0,0 +1,44 @@
+import asyncio
+from datetime import datetime
+
+
+def test_referenced_storage_keys(server):
+    url = server.storage.url
+
+    async def scenario():
+        await server.db.photos.insert_one({"id": "p", "image_url": url("uploads/photo.jpg")})
+        await server.db.gallery.insert_one({"id": "g", "image_url": "https://images.unsplash.com/x",
+                                            "thumbnail_url": url("thumbnails/g.jpg")})
+        await server.db.articles.insert_one({
+            "id": "a", "featured_image": url("uploads/featured.jpg"),
+            "content": f'<p><img src="{url("uploads/inline.png")}"></p>', "publish_date": datetime.utcnow()
+        })
+        await server.db.portfolio_settings.insert_one({"avatar_urls": [url("uploads/avatar.jpg")]})
+        await server.db.seo_settings.insert_one({"og_image": url("uploads/og.jpg"), "twitter_image": None})
+        return await server.referenced_storage_keys()
+
+    referenced = asyncio.run(scenario())
+    expected = ["uploads/photo.jpg", "thumbnails/g.jpg", "uploads/featured.jpg", "uploads/inline.png",
+                "uploads/avatar.jpg", "uploads/og.jpg"]
+    assert referenced == {server.key_digest(key) for key in expected}
+    assert server.key_digest("uploads/orphan.jpg") not in referenced
+
+
+def test_still_referenced_keys_only_checks_candidates(server):
+    url = server.storage.url
+
+    async def scenario():
+        await server.db.gallery.insert_one({"id": "g2", "image_url": url("uploads/gallery/shared.jpg")})
+        await server.db.articles.insert_one({
+            "id": "a2", "content": f"![inline]({url('uploads/featured/pasted.png')}?w=800)",
+            "publish_date": datetime.utcnow()
+        })
+        await server.db.portfolio_settings.insert_one({"avatar_urls": [url("uploads/avatars/me 1.jpg")]})
+        candidates = ["uploads/gallery/shared.jpg", "uploads/featured/pasted.png", "uploads/avatars/me 1.jpg",
+                      "uploads/gallery/unshared.jpg"]
+        return await server.still_referenced_keys(candidates), await server.still_referenced_keys([])
+
+    referenced, nothing = asyncio.run(scenario())
+    assert referenced == {server.key_digest(key) for key in
+                          ["uploads/gallery/shared.jpg", "uploads/featured/pasted.png", "uploads/avatars/me 1.jpg"]}
+    assert nothing == set()
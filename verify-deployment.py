@@ -1,14 +1,28 @@
 #!/usr/bin/env python3
 """
 Railway Configuration Verification Script
-This script verifies that your Railway configuration is correct
+This script verifies that your Railway configuration is correct and, given a
+deployed URL, that the deployment stays within the performance budget in
+perf-budget.json.
+
+Usage:
+    python verify-deployment.py
+    python verify-deployment.py --url https://your-app.railway.app
+    python verify-deployment.py --url https://your-app.railway.app --record-budget
 """
 
 import os
 import json
 import sys
+import time
+import argparse
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+PERF_BUDGET_FILE = 'perf-budget.json'
+
 def check_file_exists(filepath, description):
     """Check if a file exists and print status"""
     if os.path.exists(filepath):
@@ -117,8 +131,142 @@ def check_server_file():
     
     return all_good
 
+def timed_get(url, timeout=30):
+    """GET a URL and return (status, elapsed ms, body)"""
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            body = response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        body = b''
+        status = e.code
+    except (urllib.error.URLError, OSError):
+        body = b''
+        status = 0
+    return status, (time.perf_counter() - started) * 1000, body
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+def wait_for_first_ok(base_url, timeout):
+    """Seconds until /health first answers 200 OK, or None if it never does"""
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        status, _, _ = timed_get(f"{base_url}/health", timeout=10)
+        if status == 200:
+            return time.perf_counter() - started
+        time.sleep(0.5)
+    return None
+
+def resolve_path(base_url, path):
+    """Fill {slug} with a real published article slug"""
+    if '{slug}' not in path:
+        return path
+    status, _, body = timed_get(f"{base_url}/api/articles?limit=1")
+    articles = json.loads(body) if status == 200 and body else []
+    if not articles:
+        return None
+    return path.replace('{slug}', articles[0]['slug'])
+
+def measure_endpoint(url, requests_count, concurrency, warmup):
+    """Warm an endpoint up, then time concurrent requests against it"""
+    for _ in range(warmup):
+        timed_get(url)
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: timed_get(url), range(requests_count)))
+    elapsed = time.perf_counter() - started
+    
+    latencies = sorted(latency for status, latency, _ in results if status == 200)
+    return {
+        "requests": requests_count,
+        "errors": sum(1 for status, _, _ in results if status != 200),
+        "p50_ms": round(percentile(latencies, 0.50), 1),
+        "p95_ms": round(percentile(latencies, 0.95), 1),
+        "throughput_rps": round(requests_count / elapsed, 1) if elapsed else 0.0
+    }
+
+def check_performance(base_url, budget_file, record_budget=False):
+    """Post-deploy gate: cold start, warm latency and throughput against the budget file"""
+    base_url = base_url.rstrip('/')
+    with open(budget_file, 'r') as f:
+        budget = json.load(f)
+    settings = budget.get('settings', {})
+    
+    print(f"🚀 Performance check against {base_url}")
+    failures = []
+    
+    cold_start = wait_for_first_ok(base_url, settings.get('cold_start_timeout_seconds', 300))
+    if cold_start is None:
+        print("❌ Deployment never answered /health with 200 OK")
+        return False
+    cold_budget = budget.get('cold_start_seconds')
+    status = "✅" if cold_budget is None or cold_start <= cold_budget else "❌"
+    print(f"{status} Time to first 200 OK: {cold_start:.1f}s (budget {cold_budget}s)")
+    if status == "❌":
+        failures.append(f"cold start {cold_start:.1f}s > {cold_budget}s")
+    
+    measured = {}
+    print(f"{'endpoint':<22}{'p50 ms':>10}{'p95 ms':>10}{'budget':>10}{'req/s':>10}{'min':>8}{'errors':>8}")
+    for name, endpoint in budget.get('endpoints', {}).items():
+        path = resolve_path(base_url, endpoint['path'])
+        if path is None:
+            print(f"⚠️  {name}: nothing to request (no published articles?), skipped")
+            continue
+        result = measure_endpoint(
+            f"{base_url}{path}",
+            settings.get('requests', 100),
+            settings.get('concurrency', 10),
+            settings.get('warmup', 5)
+        )
+        measured[name] = result
+        
+        problems = []
+        if result['errors']:
+            problems.append(f"{result['errors']} errors")
+        if endpoint.get('p95_ms') and result['p95_ms'] > endpoint['p95_ms']:
+            problems.append(f"p95 {result['p95_ms']:.0f}ms > {endpoint['p95_ms']:.0f}ms")
+        if endpoint.get('min_rps') and result['throughput_rps'] < endpoint['min_rps']:
+            problems.append(f"{result['throughput_rps']:.1f} req/s < {endpoint['min_rps']:.1f} req/s")
+        status = "❌" if problems else "✅"
+        print(f"{status} {name:<19}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}{endpoint.get('p95_ms', 0):>10.0f}"
+              f"{result['throughput_rps']:>10.1f}{endpoint.get('min_rps', 0):>8.1f}{result['errors']:>8}")
+        failures.extend(f"{name}: {problem}" for problem in problems)
+    
+    if record_budget:
+        # Leave headroom for normal run-to-run noise; a deploy that doubles latency still fails
+        headroom = settings.get('record_headroom', 1.5)
+        budget['cold_start_seconds'] = round(max(cold_start * headroom, cold_budget or 0), 1)
+        for name, result in measured.items():
+            budget['endpoints'][name]['p95_ms'] = round(result['p95_ms'] * headroom)
+            budget['endpoints'][name]['min_rps'] = round(result['throughput_rps'] / headroom, 1)
+        with open(budget_file, 'w') as f:
+            json.dump(budget, f, indent=2)
+            f.write('\n')
+        print(f"💾 Recorded new budget in {budget_file} (headroom x{headroom})")
+        return True
+    
+    if failures:
+        print("❌ Performance regressions:")
+        for failure in failures:
+            print(f"   - {failure}")
+        return False
+    print("✅ Performance within budget")
+    return True
+
 def main():
     """Main verification function"""
+    parser = argparse.ArgumentParser(description="Verify Railway configuration and deployment performance")
+    parser.add_argument("--url", help="Deployed backend URL; enables the performance check")
+    parser.add_argument("--budget", default=PERF_BUDGET_FILE, help=f"Performance budget file (default: {PERF_BUDGET_FILE})")
+    parser.add_argument("--record-budget", action="store_true",
+                        help="Write measured numbers plus headroom to the budget file instead of enforcing it")
+    args = parser.parse_args()
+    
     print("🔍 Railway Configuration Verification")
     print("=" * 40)
     
@@ -165,9 +313,20 @@ def main():
     # Check server.py
     server_ok = check_server_file()
     
+    # Check deployed performance
+    performance_ok = True
+    if args.url:
+        print()
+        performance_ok = check_performance(args.url, args.budget, args.record_budget)
+    
     print()
     print("=" * 40)
     
+    if not performance_ok:
+        print("❌ The deployment is slower than its performance budget.")
+        print(f"   Fix the regression, or re-record {args.budget} with --record-budget if it is expected.")
+        return False
+    
     if all_files_present and railway_config_ok and requirements_ok and server_ok:
         print("🎉 All checks passed! Your configuration is ready for Railway deployment.")
         print()